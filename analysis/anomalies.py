@@ -0,0 +1,279 @@
+import numpy as np
+import pandas as pd
+from core_functionality.data_validator import PARTITION_COLUMNS
+from core_functionality.instrumentation import span
+
+# Grading Anomaly Detection
+#
+# Looks for suspicious grading patterns within every (subject, teacher) group
+# (the whole subject is one group when it has no teacher column):
+#   - robust z-scores: (marks − group median) / (1.4826 × group MAD), so one
+#     extreme mark cannot hide itself by inflating the spread,
+#   - attendance residuals: marks far from the subject's attendance → marks
+#     regression line, in robust units of that subject's residuals,
+#   - histogram spikes: integer mark bins holding far more students than their
+#     neighbouring bins (many identical marks in a class), and a band just above
+#     the pass mark holding more students than the bands on either side of it
+#     (marks pushed over the line).
+#
+# All subjects are stacked into one long (row, subject) table and every group
+# statistic is computed at once: grouped medians from one sort, the
+# regression lines and the histograms from `np.bincount` on integer group codes.
+# Only the loop that stacks the columns goes over subjects, never over rows.
+
+PASS_MARK = 40.0
+ROBUST_Z_THRESHOLD = 3.5  # Iglewicz & Hoaglin's cut-off for modified z-scores
+SPIKE_ALPHA = 0.01  # significance of the histogram tests (Bonferroni-corrected over the bins)
+MIN_SPIKE_COUNT = 5  # fewest students in a bin (or above the pass mark) worth flagging
+PASS_WINDOW = 3.0  # width, in marks, of the bands compared around the pass mark
+SPIKE_NEIGHBOURS = 2  # bins on each side forming the expected count of a bin
+EXCESS_RATIO = 1.5  # a spike or clump must also hold this many times its expected count
+
+MAD_SCALE = 1.4826  # MAD × this estimates the standard deviation of normal data
+MARK_BINS = 101  # integer marks 0-100
+
+NO_TEACHER = "All"
+
+REASON_ROBUST_Z = "outlier in class"
+REASON_RESIDUAL = "marks don't match attendance"
+REASON_SPIKE = "identical-mark spike"
+REASON_CLUMP = "clumped above pass mark"
+
+
+def _stack(df, subject_names):
+    """
+    Long (row, subject) arrays of every student with attendance and marks.
+
+    Returns:
+    dict: rows, subject (code), group (code), attendance, marks arrays and the
+        group labels as a (subject, teacher) frame indexed by group code.
+    """
+    rows, subjects, groups, attendance, marks, labels = [], [], [], [], [], []
+    offset = 0
+    for index, subject in enumerate(subject_names):
+        att = df[f"{subject} Attendance"].to_numpy(dtype=float)
+        mks = df[f"{subject} Marks"].to_numpy(dtype=float)
+        teacher_col = f"{subject} Teacher"
+        if teacher_col in df.columns:
+            codes, teachers = pd.factorize(df[teacher_col], sort=True)
+        else:
+            codes, teachers = np.zeros(len(df), dtype=np.intp), pd.Index([NO_TEACHER])
+        keep = np.flatnonzero(~(np.isnan(att) | np.isnan(mks)) & (codes >= 0))
+        rows.append(keep)
+        subjects.append(np.full(len(keep), index))
+        groups.append(codes[keep] + offset)
+        attendance.append(att[keep])
+        marks.append(mks[keep])
+        labels.append(pd.DataFrame({"Subject": subject, "Teacher": teachers.astype(str)}))
+        offset += len(teachers)
+    return {
+        "rows": np.concatenate(rows) if rows else np.array([], dtype=np.intp),
+        "subject": np.concatenate(subjects) if subjects else np.array([], dtype=int),
+        "group": np.concatenate(groups) if groups else np.array([], dtype=np.intp),
+        "attendance": np.concatenate(attendance) if attendance else np.array([]),
+        "marks": np.concatenate(marks) if marks else np.array([]),
+        "labels": pd.concat(labels, ignore_index=True) if labels else pd.DataFrame(columns=["Subject", "Teacher"]),
+    }
+
+
+def grouped_median(values, codes, n_groups):
+    """
+    Median of `values` within each group, from one sort.
+
+    Args:
+    values (np.ndarray): Values without NaNs.
+    codes (np.ndarray): Group code (0 … n_groups-1) of every value.
+    n_groups (int): Number of groups.
+
+    Returns:
+    np.ndarray: Median per group (NaN for empty groups).
+    """
+    # Sort by value, then stably by group (a radix sort on integers); about
+    # twice as fast as np.lexsort on millions of values
+    order = np.argsort(values)
+    order = order[np.argsort(codes[order], kind="stable")]
+    ordered = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    medians = np.full(n_groups, np.nan)
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def robust_z_scores(values, codes, n_groups):
+    """
+    Modified z-scores within groups: (value − median) / (1.4826 × MAD).
+
+    Returns:
+    tuple: (z-scores, medians, MADs). Groups whose MAD is 0 (at least half of
+        the values identical) get NaN z-scores; the spike test covers them.
+    """
+    medians = grouped_median(values, codes, n_groups)
+    deviations = values - medians[codes]
+    mads = grouped_median(np.abs(deviations), codes, n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = deviations / (MAD_SCALE * mads[codes])
+    z[mads[codes] == 0] = np.nan
+    return z, medians, mads
+
+
+def attendance_lines(attendance, marks, codes, n_groups):
+    """
+    OLS line of marks on attendance within every group (closed form, from bincounts).
+
+    Returns:
+    tuple: (slope, intercept) arrays; a group without attendance spread gets a flat line at its mean.
+    """
+    counts = np.bincount(codes, minlength=n_groups).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.bincount(codes, attendance, n_groups) / counts
+        mean_y = np.bincount(codes, marks, n_groups) / counts
+        dx = attendance - mean_x[codes]
+        sxx = np.bincount(codes, dx * dx, n_groups)
+        sxy = np.bincount(codes, dx * (marks - mean_y[codes]), n_groups)
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+    return slope, mean_y - slope * mean_x
+
+
+def mark_histograms(marks, codes, n_groups):
+    """Students per integer mark (0-100) in every group: n_groups × 101 counts."""
+    bins = np.clip(np.rint(marks), 0, MARK_BINS - 1).astype(np.intp)
+    return np.bincount(codes * MARK_BINS + bins, minlength=n_groups * MARK_BINS).reshape(n_groups, MARK_BINS)
+
+
+def spike_test(histograms, alpha=SPIKE_ALPHA, min_count=MIN_SPIKE_COUNT, neighbours=SPIKE_NEIGHBOURS):
+    """
+    Most significant spike of every group's mark histogram.
+
+    A bin's expected count is the mean of the `neighbours` bins on each side; a
+    bin is a spike when its Poisson tail probability is below alpha / 101
+    (Bonferroni) and it holds EXCESS_RATIO times the expected count. Marks 0 and
+    100 are not tested: scores pile up at the ends of the scale without anyone
+    tampering with them.
+
+    Returns:
+    tuple: (bin, count, p-value) per group; bin is -1 where no bin is a spike.
+    """
+    from scipy.stats import poisson
+
+    kernel = np.ones(2 * neighbours + 1)
+    kernel[neighbours] = 0
+    padded = np.pad(histograms.astype(float), ((0, 0), (neighbours, neighbours)), mode="reflect")
+    # Mean of the neighbouring bins of every bin, over all groups at once
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * neighbours + 1, axis=1)
+    expected = np.maximum(windows @ kernel / (2 * neighbours), 0.5)
+    p_values = poisson.sf(histograms - 1, expected)
+    p_values[(histograms < min_count) | (histograms < EXCESS_RATIO * expected)] = 1.0
+    p_values[:, [0, MARK_BINS - 1]] = 1.0
+    best = np.argmin(p_values, axis=1)
+    best_p = p_values[np.arange(len(histograms)), best]
+    significant = best_p < alpha / MARK_BINS
+    return np.where(significant, best, -1), histograms[np.arange(len(histograms)), best], best_p
+
+
+def pass_mark_clump_test(marks, codes, n_groups, pass_mark=PASS_MARK, window=PASS_WINDOW,
+                         alpha=SPIKE_ALPHA, min_count=MIN_SPIKE_COUNT):
+    """
+    Students just above the pass mark compared with the bands around them.
+
+    The band [pass, pass + window) is compared with [pass − window, pass) and
+    [pass + window, pass + 2·window). Where the density of marks is smooth
+    (locally linear), the middle band holds a third of the three; pushing marks
+    over the line moves students from the band below into it. A one-sided
+    binomial test and EXCESS_RATIO flag the excess.
+
+    Returns:
+    tuple: (above, below, p-value, flagged) arrays per group; `above` is the middle
+        band, `below` the band under the pass mark.
+    """
+    from scipy.stats import binom
+
+    def band(low, high):
+        return np.bincount(codes, (marks >= low) & (marks < high), n_groups).astype(int)
+
+    below = band(pass_mark - window, pass_mark)
+    above = band(pass_mark, pass_mark + window)
+    beyond = band(pass_mark + window, pass_mark + 2 * window)
+    p_values = binom.sf(above - 1, below + above + beyond, 1 / 3)
+    expected = (below + beyond) / 2
+    return above, below, p_values, (p_values < alpha) & (above >= min_count) & (above >= EXCESS_RATIO * expected)
+
+
+def detect_anomalies(df, subject_names, pass_mark=PASS_MARK, threshold=ROBUST_Z_THRESHOLD, alpha=SPIKE_ALPHA):
+    """
+    Flags suspicious marks within every (subject, teacher) group.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    subject_names (list): List of subject names.
+    pass_mark (float): Pass mark used by the clumping test.
+    threshold (float): |robust z| (in class, or of the attendance residual) above which a mark is flagged.
+    alpha (float): Significance of the histogram-spike and clumping tests.
+
+    Returns:
+    tuple: (flagged, groups)
+        - flagged (pd.DataFrame): One row per flagged (student, subject): identity columns,
+          Subject, Teacher, Attendance, Marks, Robust Z, Residual Z and Reasons.
+        - groups (pd.DataFrame): One row per (subject, teacher): Students, Median, MAD,
+          Above Pass / Below Pass / Clump p, Spike Mark / Spike Count / Spike p.
+    """
+    subject_names = list(subject_names)
+    with span("anomalies.detect", rows=len(df), subjects=len(subject_names)) as record:
+        stacked = _stack(df, subject_names)
+        codes, marks, attendance = stacked["group"], stacked["marks"], stacked["attendance"]
+        n_groups = len(stacked["labels"])
+
+        robust_z, medians, mads = robust_z_scores(marks, codes, n_groups)
+
+        # Residuals from each subject's own attendance regression, in robust units of that subject
+        subject = stacked["subject"]
+        n_subjects = len(subject_names)
+        slope, intercept = attendance_lines(attendance, marks, subject, n_subjects)
+        residuals = marks - (slope[subject] * attendance + intercept[subject])
+        residuals = residuals - grouped_median(residuals, subject, n_subjects)[subject]
+        residual_mads = grouped_median(np.abs(residuals), subject, n_subjects)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            residual_z = residuals / (MAD_SCALE * residual_mads[subject])
+        residual_z[residual_mads[subject] == 0] = np.nan
+
+        histograms = mark_histograms(marks, codes, n_groups)
+        spike_bin, spike_count, spike_p = spike_test(histograms, alpha)
+        above, below, clump_p, clumped = pass_mark_clump_test(marks, codes, n_groups, pass_mark, alpha=alpha)
+
+        flags = {
+            REASON_ROBUST_Z: np.abs(robust_z) > threshold,
+            REASON_RESIDUAL: np.abs(residual_z) > threshold,
+            REASON_SPIKE: (spike_bin[codes] >= 0) & (np.rint(marks) == spike_bin[codes]),
+            REASON_CLUMP: clumped[codes] & (marks >= pass_mark) & (marks < pass_mark + PASS_WINDOW),
+        }
+        any_flag = np.logical_or.reduce(list(flags.values()))
+        record["flagged"] = int(any_flag.sum())
+
+        picked = np.flatnonzero(any_flag)
+        rows = stacked["rows"][picked]
+        identity = [col for col in (*PARTITION_COLUMNS, "Roll No", "Name") if col in df.columns]
+        flagged = df[identity].iloc[rows].reset_index(drop=True)
+        labels = stacked["labels"].iloc[codes[picked]].reset_index(drop=True)
+        flagged["Subject"] = labels["Subject"]
+        flagged["Teacher"] = labels["Teacher"]
+        flagged["Attendance"] = attendance[picked]
+        flagged["Marks"] = marks[picked]
+        flagged["Robust Z"] = robust_z[picked]
+        flagged["Residual Z"] = residual_z[picked]
+        # One label per distinct combination of reasons, not per row
+        combos, combo_index = np.unique(np.column_stack(list(flags.values()))[picked], axis=0, return_inverse=True)
+        reasons = np.array([", ".join(name for name, hit in zip(flags, combo) if hit) for combo in combos], dtype=object)
+        flagged["Reasons"] = reasons[combo_index.ravel()]
+
+        groups = stacked["labels"].copy()
+        groups["Students"] = np.bincount(codes, minlength=n_groups)
+        groups["Median"] = medians
+        groups["MAD"] = mads
+        groups["Above Pass"], groups["Below Pass"], groups["Clump p"] = above, below, clump_p
+        groups["Spike Mark"] = pd.Series(spike_bin).where(spike_bin >= 0).astype("Int64")
+        groups["Spike Count"], groups["Spike p"] = spike_count, spike_p
+
+    return flagged, groups
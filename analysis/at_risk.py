@@ -0,0 +1,319 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from core_functionality.data_validator import PARTITION_COLUMNS
+from core_functionality.instrumentation import span
+
+# At-Risk Student Scoring
+#
+# A regularized logistic regression estimates, for every student and subject,
+# the probability of finishing below the pass mark. It only uses what is known
+# before the subject's marks are in:
+#   - attendance in the subject,
+#   - the marks expected from that attendance, on the subject's
+#     attendance → marks line (the regression `analyze_subject_performance` fits),
+#   - the student's average marks and attendance in their other subjects.
+#
+# Training stacks every (student, subject) pair of the historical marksheets
+# into one feature matrix (NumPy, no per-student loops) and fits scikit-learn's
+# LogisticRegression once. The fitted model is a handful of numbers, saved as
+# JSON; scoring is a matrix product and a sigmoid over blocks of rows, so
+# millions of students are scored in bounded memory without scikit-learn.
+
+PASS_MARK = 40.0
+DEFAULT_MODEL_PATH = os.path.join("term_store", "at_risk_model.json")
+MODEL_VERSION = 1
+
+# Rows scored per batch (each row contributes one feature vector per subject)
+BATCH_ROWS = 200_000
+
+FEATURES = ("attendance", "expected_marks", "other_marks", "other_attendance")
+
+
+def _subject_matrices(df, subject_names):
+    """Attendance and marks as n × subjects float matrices (NaN where missing)."""
+    attendance = df[[f"{subject} Attendance" for subject in subject_names]].to_numpy(dtype=float)
+    marks = df[[f"{subject} Marks" for subject in subject_names]].to_numpy(dtype=float)
+    return attendance, marks
+
+
+def _leave_one_out_mean(matrix, fill):
+    """Row mean of every other column, per cell (`fill` where a row has no other value)."""
+    present = ~np.isnan(matrix)
+    totals = np.where(present, matrix, 0.0).sum(axis=1, keepdims=True)
+    counts = present.sum(axis=1, keepdims=True)
+    others = counts - present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (totals - np.where(present, matrix, 0.0)) / others
+    return np.where(others > 0, means, fill)
+
+
+def build_features(attendance, marks, lines, fill):
+    """
+    Feature tensor of every (student, subject) pair.
+
+    Args:
+    attendance, marks (np.ndarray): n × subjects matrices.
+    lines (np.ndarray): subjects × 2 array of (slope, intercept) per subject.
+    fill (dict): Values for students without other subjects: {"other_marks", "other_attendance"}.
+
+    Returns:
+    np.ndarray: n × subjects × len(FEATURES).
+    """
+    expected = attendance * lines[:, 0] + lines[:, 1]
+    return np.stack([
+        attendance,
+        expected,
+        _leave_one_out_mean(marks, fill["other_marks"]),
+        _leave_one_out_mean(attendance, fill["other_attendance"]),
+    ], axis=-1)
+
+
+class AtRiskModel:
+    """
+    Fitted at-risk model: standardization, logistic coefficients and the subject lines.
+
+    Attributes:
+    coef (np.ndarray): One weight per feature (on standardized features).
+    intercept (float): Logistic intercept.
+    mean, scale (np.ndarray): Feature standardization.
+    lines (dict): {subject: (slope, intercept)} of the attendance → marks lines.
+    pooled_line (tuple): Line used for subjects not seen in training.
+    fill (dict): Fill values for students without other subjects.
+    pass_mark (float): Marks below this count as failing.
+    """
+    def __init__(self, coef, intercept, mean, scale, lines, pooled_line, fill, pass_mark=PASS_MARK):
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = float(intercept)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.lines = {subject: tuple(map(float, line)) for subject, line in lines.items()}
+        self.pooled_line = tuple(map(float, pooled_line))
+        self.fill = {key: float(value) for key, value in fill.items()}
+        self.pass_mark = float(pass_mark)
+
+    # ---- serialization ----
+
+    def to_dict(self):
+        return {
+            "version": MODEL_VERSION,
+            "features": list(FEATURES),
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "lines": {subject: list(line) for subject, line in self.lines.items()},
+            "pooled_line": list(self.pooled_line),
+            "fill": self.fill,
+            "pass_mark": self.pass_mark,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != MODEL_VERSION or data.get("features") != list(FEATURES):
+            raise ValueError("The saved at-risk model was made by another version; train it again.")
+        return cls(data["coef"], data["intercept"], data["mean"], data["scale"], data["lines"],
+                   data["pooled_line"], data["fill"], data["pass_mark"])
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Writes the model as JSON (atomically, so readers never see half a file)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=1)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with open(path, "r", encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+    # ---- scoring ----
+
+    def _lines_for(self, subject_names):
+        return np.array([self.lines.get(subject, self.pooled_line) for subject in subject_names], dtype=float)
+
+    def predict_proba(self, attendance, marks, subject_names):
+        """Failing probability of every (student, subject): n × subjects (NaN without attendance)."""
+        features = build_features(attendance, marks, self._lines_for(subject_names), self.fill)
+        logits = ((features - self.mean) / self.scale) @ self.coef + self.intercept
+        probabilities = 1.0 / (1.0 + np.exp(-logits))
+        probabilities[np.isnan(attendance)] = np.nan
+        return probabilities
+
+    def score(self, df, subject_names, batch_rows=BATCH_ROWS):
+        """
+        Failing probability of every student in every subject.
+
+        Args:
+        df (pd.DataFrame): A validated marksheet (marks of the scored subjects may be missing).
+        subject_names (list): Subjects to score.
+        batch_rows (int): Rows per batch; bounds the memory of the feature tensor.
+
+        Returns:
+        pd.DataFrame: "[Subject] Risk" columns (0-1), same index as `df`.
+        """
+        subject_names = list(subject_names)
+        risk = np.empty((len(df), len(subject_names)))
+        with span("at_risk.score", rows=len(df), subjects=len(subject_names), batch_rows=batch_rows):
+            attendance, marks = _subject_matrices(df, subject_names)
+            for start in range(0, len(df), batch_rows):
+                block = slice(start, start + batch_rows)
+                risk[block] = self.predict_proba(attendance[block], marks[block], subject_names)
+        return pd.DataFrame(risk, index=df.index, columns=[f"{subject} Risk" for subject in subject_names])
+
+
+def training_data(marksheets, pass_mark=PASS_MARK):
+    """
+    Stacks the (student, subject) pairs of historical marksheets.
+
+    Args:
+    marksheets (iterable): (df, subject_names) pairs of validated marksheets.
+    pass_mark (float): Marks below this are labelled as failing.
+
+    Returns:
+    tuple: (attendance/marks/subject blocks, lines, pooled line)
+    """
+    import analysis.subject_analysis as sa
+
+    blocks, line_sums = [], {}
+    for df, subject_names in marksheets:
+        subject_names = list(subject_names)
+        attendance, marks = _subject_matrices(df, subject_names)
+        for subject in subject_names:
+            data = df[[f"{subject} Attendance", f"{subject} Marks"]].dropna()
+            if len(data) >= 3:
+                # Subjects seen in several marksheets get the students-weighted average line
+                slope, intercept = sa.fit_attendance_regression(data, subject)
+                total = line_sums.setdefault(subject, np.zeros(3))
+                total += (slope * len(data), intercept * len(data), len(data))
+        blocks.append((attendance, marks, subject_names))
+
+    if not line_sums:
+        raise ValueError("Training needs at least one subject with 3 or more students.")
+    lines = {subject: (total[0] / total[2], total[1] / total[2]) for subject, total in line_sums.items()}
+    weights = np.array([total[2] for total in line_sums.values()])
+    pooled = tuple(np.average(np.array(list(lines.values())), axis=0, weights=weights))
+    return blocks, lines, pooled
+
+
+def train_at_risk_model(marksheets, pass_mark=PASS_MARK, C=1.0):
+    """
+    Fits the at-risk model on historical marksheets.
+
+    Args:
+    marksheets (iterable): (df, subject_names) pairs of validated marksheets (e.g. past terms).
+    pass_mark (float): Marks below this count as failing.
+    C (float): Inverse L2 regularization strength of the logistic regression.
+
+    Returns:
+    AtRiskModel: The fitted model.
+
+    Raises:
+    ValueError: If there is no usable training data, or only one outcome (nobody or everybody fails).
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    with span("at_risk.prepare") as record:
+        blocks, lines, pooled = training_data(marksheets, pass_mark)
+        all_marks = np.concatenate([marks.ravel() for _, marks, _ in blocks])
+        all_attendance = np.concatenate([attendance.ravel() for attendance, _, _ in blocks])
+        fill = {"other_marks": float(np.nanmean(all_marks)), "other_attendance": float(np.nanmean(all_attendance))}
+
+        features, labels = [], []
+        for attendance, marks, subject_names in blocks:
+            subject_lines = np.array([lines.get(subject, pooled) for subject in subject_names], dtype=float)
+            block = build_features(attendance, marks, subject_lines, fill).reshape(-1, len(FEATURES))
+            observed = ~(np.isnan(attendance) | np.isnan(marks)).ravel()
+            features.append(block[observed])
+            labels.append(marks.ravel()[observed] < pass_mark)
+        X, y = np.concatenate(features), np.concatenate(labels)
+        record["pairs"], record["fail_rate"] = len(y), float(y.mean()) if len(y) else 0.0
+
+    if len(np.unique(y)) < 2:
+        raise ValueError("Training data needs both passing and failing students.")
+
+    mean, scale = X.mean(axis=0), X.std(axis=0)
+    scale[scale == 0] = 1.0
+    with span("at_risk.fit", pairs=len(y)):
+        classifier = LogisticRegression(C=C, max_iter=500).fit((X - mean) / scale, y)
+    return AtRiskModel(classifier.coef_[0], classifier.intercept_[0], mean, scale, lines, pooled, fill, pass_mark)
+
+
+def train_from_term_store(store, pass_mark=PASS_MARK, C=1.0):
+    """Fits the model on every marksheet kept in a TermStore (see core_functionality/term_store.py)."""
+    import core_functionality.data_validator as dv
+
+    def marksheets():
+        for term in store.terms()["term"]:
+            df = store.load_marksheet(term)
+            if df is not None:
+                yield df, dv.check_structure(df)
+
+    return train_at_risk_model(marksheets(), pass_mark, C)
+
+
+def at_risk_students(df, subject_names, model, threshold=0.5):
+    """
+    The (student, subject) pairs whose failing probability is at least `threshold`.
+
+    Returns:
+    pd.DataFrame: Identity columns (School, Section, Term, Roll No, Name if present), Subject, Attendance,
+        Marks and Risk, highest risk first.
+    """
+    risk = model.score(df, subject_names).to_numpy()
+    rows, subjects = np.nonzero(risk >= threshold)
+    identity = [col for col in (*PARTITION_COLUMNS, "Roll No", "Name") if col in df.columns]
+    flagged = df[identity].iloc[rows].reset_index(drop=True)
+    subject_names = np.asarray(list(subject_names), dtype=object)
+    attendance, marks = _subject_matrices(df, subject_names)
+    flagged["Subject"] = subject_names[subjects]
+    flagged["Attendance"] = attendance[rows, subjects]
+    flagged["Marks"] = marks[rows, subjects]
+    flagged["Risk"] = risk[rows, subjects]
+    return flagged.sort_values("Risk", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def calibration_report(probabilities, outcomes, bins=10):
+    """
+    How well predicted risks match observed failure rates.
+
+    Args:
+    probabilities (np.ndarray): Predicted failing probabilities.
+    outcomes (np.ndarray): True where the student failed.
+    bins (int): Equal-width probability bins.
+
+    Returns:
+    tuple: (table, metrics)
+        - table (pd.DataFrame): per bin: predicted (mean risk), observed (failure rate), pairs.
+        - metrics (dict): brier, log_loss, ece (expected calibration error), base_rate.
+    """
+    probabilities = np.asarray(probabilities, dtype=float).ravel()
+    outcomes = np.asarray(outcomes, dtype=float).ravel()
+    keep = ~(np.isnan(probabilities) | np.isnan(outcomes))
+    probabilities, outcomes = probabilities[keep], outcomes[keep]
+
+    bin_index = np.minimum((probabilities * bins).astype(int), bins - 1)
+    counts = np.bincount(bin_index, minlength=bins)
+    predicted = np.bincount(bin_index, probabilities, minlength=bins)
+    observed = np.bincount(bin_index, outcomes, minlength=bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table = pd.DataFrame({
+            "bin": [f"{i / bins:.1f}-{(i + 1) / bins:.1f}" for i in range(bins)],
+            "predicted": predicted / counts,
+            "observed": observed / counts,
+            "pairs": counts,
+        })
+
+    clipped = np.clip(probabilities, 1e-15, 1 - 1e-15)
+    metrics = {
+        "brier": float(np.mean((probabilities - outcomes) ** 2)),
+        "log_loss": float(-np.mean(outcomes * np.log(clipped) + (1 - outcomes) * np.log(1 - clipped))),
+        "ece": float(np.abs(predicted - observed).sum() / max(len(probabilities), 1)),
+        "base_rate": float(outcomes.mean()) if len(outcomes) else float("nan"),
+    }
+    return table[table["pairs"] > 0].reset_index(drop=True), metrics
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from core_functionality.instrumentation import span
+
+# Grade Distribution Summaries
+#
+# Summarizes the marks of every subject, and of every teacher's class within
+# it, in one pass: a fixed-bin histogram, mean, standard deviation, skew,
+# excess kurtosis and the share of students at or above each pass threshold.
+# Every group gets an integer code and each statistic is one `np.bincount`
+# over the stacked (group, marks) arrays, whatever the number of groups.
+#
+# Histogram charts are drawn from these summaries (bins × groups counts), so a
+# chart never needs the students' marks themselves.
+
+BIN_WIDTH = 10  # marks per histogram bin (0-10, 10-20, ..., 90-100)
+PASS_THRESHOLDS = (33, 40, 50)  # default pass marks to report pass rates for
+
+ALL_TEACHERS = "All"
+
+
+def bin_labels(bin_width=BIN_WIDTH):
+    edges = np.arange(0, 100 + bin_width, bin_width)
+    edges[-1] = min(edges[-1], 100)
+    return [f"{low:g}-{high:g}" for low, high in zip(edges[:-1], edges[1:])]
+
+
+def pass_rate_column(threshold):
+    return f"Pass ≥{threshold:g}"
+
+
+def _stack(df, subject_names):
+    """Marks of every subject twice: under the subject ("All") and under its teacher."""
+    codes, marks, labels = [], [], []
+    for subject in subject_names:
+        values = df[f"{subject} Marks"].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        codes.append(np.full(present.sum(), len(labels)))
+        marks.append(values[present])
+        labels.append((subject, ALL_TEACHERS))
+
+        teacher_col = f"{subject} Teacher"
+        if teacher_col in df.columns:
+            teacher_codes, teachers = pd.factorize(df[teacher_col], sort=True)
+            keep = present & (teacher_codes >= 0)
+            codes.append(teacher_codes[keep] + len(labels))
+            marks.append(values[keep])
+            labels.extend((subject, str(teacher)) for teacher in teachers)
+
+    labels = pd.DataFrame(labels, columns=["Subject", "Teacher"])
+    if not codes:
+        return np.array([], dtype=np.intp), np.array([]), labels
+    return np.concatenate(codes), np.concatenate(marks), labels
+
+
+def distribution_summaries(df, subject_names, bin_width=BIN_WIDTH, thresholds=PASS_THRESHOLDS):
+    """
+    Histogram and shape of the marks of every subject and teacher group.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    subject_names (list): List of subject names.
+    bin_width (float): Width of the histogram bins; the last bin includes 100.
+    thresholds (iterable): Pass marks to report pass rates for.
+
+    Returns:
+    tuple: (summary, histograms)
+        - summary (pd.DataFrame): One row per group: Subject, Teacher ("All" for the
+          whole subject), Students, Mean, Std (ddof=1), Skew, Kurtosis (excess; both
+          the population moments, as scipy.stats) and "Pass ≥<t>" (share 0-1) per threshold.
+        - histograms (pd.DataFrame): Students per bin, same rows as `summary`,
+          one column per bin ("0-10", "10-20", ...).
+    """
+    thresholds = np.sort(np.asarray(list(thresholds), dtype=float))
+    columns = bin_labels(bin_width)
+    n_bins = len(columns)
+
+    with span("distributions.summaries", rows=len(df), subjects=len(subject_names)) as record:
+        codes, marks, groups = _stack(df, subject_names)
+        n_groups = len(groups)
+        record["groups"] = n_groups
+
+        counts = np.bincount(codes, minlength=n_groups).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(codes, marks, n_groups) / counts
+            centered = marks - mean[codes]
+            squared = centered * centered
+            m2 = np.bincount(codes, squared, n_groups) / counts
+            m3 = np.bincount(codes, squared * centered, n_groups) / counts
+            m4 = np.bincount(codes, squared * squared, n_groups) / counts
+            std = np.sqrt(m2 * counts / (counts - 1))
+            skew = np.where(m2 > 0, m3 / m2 ** 1.5, np.nan)
+            kurtosis = np.where(m2 > 0, m4 / (m2 * m2) - 3.0, np.nan)
+
+            # Fixed bins: one bincount over (group, bin) pairs
+            bins = np.clip((marks // bin_width).astype(np.intp), 0, n_bins - 1)
+            histograms = np.bincount(codes * n_bins + bins, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+
+            # Pass rates: count students per (group, number of thresholds reached), then
+            # a reverse cumulative sum gives the students at or above each threshold
+            reached = np.searchsorted(thresholds, marks, side="right")
+            slots = len(thresholds) + 1
+            per_slot = np.bincount(codes * slots + reached, minlength=n_groups * slots).reshape(n_groups, slots)
+            at_or_above = np.cumsum(per_slot[:, ::-1], axis=1)[:, ::-1][:, 1:]
+            pass_rates = at_or_above / counts[:, None]
+
+        summary = groups.copy()
+        summary["Students"] = counts.astype(int)
+        summary["Mean"], summary["Std"], summary["Skew"], summary["Kurtosis"] = mean, std, skew, kurtosis
+        for index, threshold in enumerate(thresholds):
+            summary[pass_rate_column(threshold)] = pass_rates[:, index]
+        histograms = pd.DataFrame(histograms, index=summary.index, columns=columns)
+
+    return summary, histograms
+
+
+def histogram_figure(summary, histograms, subject, by_teacher=False):
+    """
+    Bar chart of one subject's marks distribution, drawn from the summaries.
+
+    Args:
+    summary, histograms (pd.DataFrame): Output of `distribution_summaries`.
+    subject (str): Subject to chart.
+    by_teacher (bool): One series per teacher (as shares of their students) instead of the whole subject.
+    """
+    import plotly.express as px
+
+    rows = summary["Subject"] == subject
+    rows &= (summary["Teacher"] != ALL_TEACHERS) if by_teacher else (summary["Teacher"] == ALL_TEACHERS)
+    groups = summary[rows]
+    long = histograms[rows].assign(Teacher=groups["Teacher"]).melt(id_vars="Teacher", var_name="Marks",
+                                                                   value_name="Count")
+    students = long["Teacher"].map(dict(zip(groups["Teacher"], groups["Students"])))
+    long["Students (%)"] = long["Count"] / students.replace(0, np.nan) * 100
+
+    fig = px.bar(long, x="Marks", y="Students (%)", color="Teacher" if by_teacher else None, barmode="group",
+                 hover_data=["Count"], category_orders={"Marks": list(histograms.columns)},
+                 title=f"{subject}: Distribution of Marks" + (" by Teacher" if by_teacher else ""))
+    fig.update_xaxes(type="category")
+    return fig
@@ -0,0 +1,213 @@
+import contextvars
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import analysis.subject_analysis as sa
+import analysis.teacher_analysis as ta
+import bias_analysis.bias_detection as bd
+from core_functionality.data_validator import PARTITION_COLUMNS
+from core_functionality.instrumentation import span
+
+# Partitioned Analysis (per School / Section / Term)
+#
+# A marksheet covering several schools, sections or terms is one cohort per
+# partition, not one flat cohort. `run_partitioned` splits the frame by the
+# partition columns, runs an analysis on every partition in parallel and stacks
+# the per-partition results into one tidy DataFrame, with the partition columns first.
+#
+# Partitions are found with a single group-by: `groupby(...).indices` gives
+# every partition's row positions at once, and partitions smaller than the
+# analysis' student minimum are dropped from the size table before any work is
+# scheduled, so small partitions cost nothing.
+#
+# Threads are used by default; the analyses spend most of their time in NumPy,
+# SciPy and statsmodels code. Each thread task runs in a copy of the caller's
+# context, so the analyses' spans land in the caller's `collect_spans`. `processes=True` uses worker processes instead
+# (for many small partitions, where pandas' Python-level overhead holds the GIL).
+
+# Smallest partition each analysis can say anything about (the analyses' own minimums):
+#   teacher: 3 students per teacher, and ANOVA needs two teachers
+#   subjects: a regression line needs 3 points
+#   bias: `detect_bias` needs more than 5 students
+MIN_STUDENTS = {"teacher": 6, "subjects": 3, "bias": 6}
+
+
+def default_workers():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def partition_columns(df):
+    """The partition columns (School, Section, Term) present in `df`, in that order."""
+    return [col for col in PARTITION_COLUMNS if col in df.columns]
+
+
+def partition_sizes(df, by):
+    """
+    Students per partition.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    by (list): Partition columns.
+
+    Returns:
+    pd.Series: Row count per partition (MultiIndex over `by`, sorted). Rows with a
+        missing partition value belong to no partition.
+    """
+    return df.groupby(list(by), sort=True, observed=True, dropna=True).size()
+
+
+def run_partitioned(df, by, func, min_students=1, workers=None, processes=False, **kwargs):
+    """
+    Runs `func` on every partition of `df` in parallel and stacks the results.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    by (list): Partition columns, e.g. ["School", "Term"].
+    func (callable): `func(partition_df, **kwargs)` returning a tidy DataFrame (or None),
+        or a (DataFrame, reasons) tuple, where `reasons` lists the parts of the partition
+        it could not analyze. Must be a module-level function when `processes` is True.
+    min_students (int): Partitions with fewer rows are skipped without being analyzed.
+    workers (int): Parallel workers (default: CPU count, up to 8).
+    processes (bool): Use worker processes instead of threads.
+    **kwargs: Passed on to `func`.
+
+    Returns:
+    tuple: (results, skipped)
+        - results (pd.DataFrame): The stacked results, with the partition columns first.
+        - skipped (pd.DataFrame): One row per skipped partition (or skipped part of one,
+          e.g. a subject) with its size and the reason.
+    """
+    by = list(by)
+    missing = [col for col in by if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing partition columns: {', '.join(missing)}")
+
+    with span("partitioned.split", partitions_by=",".join(by), rows=len(df)) as record:
+        grouped = df.groupby(by, sort=True, observed=True, dropna=True)
+        sizes = grouped.size()
+        too_small = sizes[sizes < min_students]
+        # Row positions of the partitions that are large enough, from one group-by
+        indices = grouped.indices
+        keys = list(sizes.index[sizes >= min_students])
+        record["partitions"], record["skipped"] = len(sizes), len(too_small)
+
+    skipped = [_key_dict(by, key) | {"students": int(size), "reason": f"fewer than {min_students} students"}
+               for key, size in too_small.items()]
+
+    results = []
+    workers = workers or default_workers()
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with span("partitioned.run", partitions=len(keys), workers=workers):
+        with executor_class(max_workers=workers) as executor:
+            if processes:
+                futures = [executor.submit(func, df.take(indices[key]), **kwargs) for key in keys]
+            else:
+                futures = [executor.submit(contextvars.copy_context().run, func, df.take(indices[key]), **kwargs)
+                           for key in keys]
+            for key, future in zip(keys, futures):
+                try:
+                    result = future.result()
+                except ValueError as e:
+                    skipped.append(_key_dict(by, key) | {"students": int(sizes[key]), "reason": str(e)})
+                    continue
+                if isinstance(result, tuple):
+                    result, reasons = result
+                    skipped.extend(_key_dict(by, key) | {"students": int(sizes[key]), "reason": reason}
+                                   for reason in reasons)
+                if result is None or result.empty:
+                    continue
+                results.append(result.assign(**_key_dict(by, key))[by + list(result.columns)])
+
+    stacked = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=by)
+    return stacked, pd.DataFrame(skipped, columns=by + ["students", "reason"])
+
+
+def _key_dict(by, key):
+    key = key if isinstance(key, tuple) else (key,)
+    return dict(zip(by, key))
+
+
+# ---- per-partition analyses (module level so they can run in worker processes) ----
+
+def teacher_score_rows(df, subject_names):
+    """Tidy `analyze_all_teachers` result: one row per (subject, metric, teacher)."""
+    rows = [
+        {"Subject": subject, "Metric": metric, "Teacher": teacher, "Score": score}
+        for subject, metrics in ta.analyze_all_teachers(df, subject_names).items()
+        for metric, scores in metrics.items()
+        for teacher, score in scores.items()
+    ]
+    return pd.DataFrame(rows, columns=["Subject", "Metric", "Teacher", "Score"])
+
+
+def subject_regression_rows(df, subject_names):
+    """Tidy `subject_regressions` result: one row per subject with slope, intercept and students."""
+    rows = []
+    for subject in subject_names:
+        data = df[[f"{subject} Attendance", f"{subject} Marks"]].dropna()
+        if len(data) < MIN_STUDENTS["subjects"]:
+            continue
+        slope, intercept = sa.fit_attendance_regression(data, subject)
+        rows.append({"Subject": subject, "Slope": slope, "Intercept": intercept, "Students": len(data)})
+    return pd.DataFrame(rows, columns=["Subject", "Slope", "Intercept", "Students"])
+
+
+def bias_rows(df, subject_names, factor, teacher_model="fixed"):
+    """
+    Tidy `compute_bias_shap` result: one row per (subject, feature) with its bias impact (signed mean |SHAP|).
+
+    Returns:
+    tuple: (rows, reasons) — subjects that cannot be analyzed in this partition
+        (e.g. too few students per teacher) are listed in `reasons` instead.
+    """
+    rows, reasons = [], []
+    for subject in subject_names:
+        try:
+            shap_values = bd.compute_bias_shap(bd.bias_subject_frame(df, subject, factor), teacher_model)
+        except ValueError as e:
+            reasons.append(f"{subject}: {e}")
+            continue
+        rows.extend({"Subject": subject, "Feature": feature, "SHAP": value} for feature, value in shap_values.items())
+    return pd.DataFrame(rows, columns=["Subject", "Feature", "SHAP"]), reasons
+
+
+def partitioned_teacher_scores(df, subject_names, by, workers=None):
+    """
+    Teacher effectiveness scores per partition.
+
+    Returns:
+    tuple: (results, skipped) — see `run_partitioned`; results have the partition
+        columns plus Subject, Metric, Teacher and Score.
+    """
+    with span("partitioned_teacher_scores"):
+        return run_partitioned(df, by, teacher_score_rows, MIN_STUDENTS["teacher"], workers,
+                               subject_names=list(subject_names))
+
+
+def partitioned_subject_regressions(df, subject_names, by, workers=None):
+    """
+    Attendance → marks regressions per partition.
+
+    Returns:
+    tuple: (results, skipped) — results have the partition columns plus Subject,
+        Slope, Intercept and Students.
+    """
+    with span("partitioned_subject_regressions"):
+        return run_partitioned(df, by, subject_regression_rows, MIN_STUDENTS["subjects"], workers,
+                               subject_names=list(subject_names))
+
+
+def partitioned_bias(df, subject_names, by, factor, teacher_model="fixed", workers=None, processes=False):
+    """
+    Bias impacts (signed mean |SHAP| values, in marks) per partition.
+
+    Returns:
+    tuple: (results, skipped) — results have the partition columns plus Subject,
+        Feature and SHAP.
+    """
+    if factor not in df.columns:
+        raise ValueError(f"Missing necessary columns: {factor}")
+    with span("partitioned_bias", factor=factor):
+        return run_partitioned(df, by, bias_rows, MIN_STUDENTS["bias"], workers, processes,
+                               subject_names=list(subject_names), factor=factor, teacher_model=teacher_model)
@@ -0,0 +1,197 @@
+import hashlib
+import threading
+
+import pandas as pd
+import analysis.subject_analysis as sa
+import analysis.teacher_analysis as ta
+import bias_analysis.bias_detection as bd
+from core_functionality.dataframe_engine import get_engine
+from core_functionality.instrumentation import span
+
+# Dependency-Tracked Analysis Planner
+#
+# Every analysis result is stored with the columns it was computed from and
+# the content fingerprint of each of them. Asking for a result again compares
+# those fingerprints with the current frame: if none changed the stored result
+# is returned, otherwise only that result is recomputed. After an edit or an
+# appended delta touching one subject's columns, the other subjects' teacher
+# scores, regressions and bias values are reused as they are.
+#
+# Intermediates shared by several analyses are results too: the per-teacher
+# statistics of a subject are computed once and feed both the teacher scores
+# and the teacher-average feature of the "average" bias model.
+#
+# Column fingerprints are hashes of the column values (row order included, so
+# swapping two students' marks or teachers invalidates results too);
+# they are computed once per column and frame, and `update` only re-hashes the
+# columns the caller says have changed.
+
+
+def column_fingerprint(series):
+    """Content hash of one column (values and row order, not row labels)."""
+    # Digest of the per-row hashes in row order (a sum would ignore the order)
+    row_hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    return int.from_bytes(hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest(), "little")
+
+
+class AnalysisPlanner:
+    """
+    Cache of analysis results that recomputes only the invalidated ones.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    subject_names (list): List of subject names.
+    engine (str): DataFrame engine for the group-bys; defaults to the configured one.
+
+    Attributes:
+    computed, reused (int): Number of results computed and served from the cache.
+    """
+    def __init__(self, df, subject_names, engine=None):
+        self.df = df
+        self.subject_names = list(subject_names)
+        self.engine = engine
+        self.computed = 0
+        self.reused = 0
+        self._fingerprints = {}
+        self._results = {}  # name -> (columns, fingerprints, value)
+        self._lock = threading.RLock()
+
+    # ---- dependency tracking ----
+
+    def fingerprint(self, column):
+        """Fingerprint of `column` in the current frame (None if the column does not exist)."""
+        if column not in self._fingerprints:
+            self._fingerprints[column] = column_fingerprint(self.df[column]) if column in self.df.columns else None
+        return self._fingerprints[column]
+
+    def update(self, df, subject_names=None, changed=None):
+        """
+        Switches to a new version of the marksheet.
+
+        Args:
+        df (pd.DataFrame): The edited or extended marksheet.
+        subject_names (list): Subjects of the new frame (default: unchanged).
+        changed (list): Columns that may differ from the previous frame. Only these
+            are re-hashed; None re-hashes every column (e.g. after appending rows).
+
+        Returns:
+        list: Names of the stored results that are now out of date (they are dropped
+            and recomputed when next requested).
+        """
+        with self._lock:
+            self.df = df
+            if subject_names is not None:
+                self.subject_names = list(subject_names)
+            if changed is None:
+                self._fingerprints.clear()
+            else:
+                for column in changed:
+                    self._fingerprints.pop(column, None)
+
+            stale = [name for name, (columns, fingerprints, _) in self._results.items()
+                     if [self.fingerprint(column) for column in columns] != fingerprints]
+            for name in stale:
+                del self._results[name]
+            return stale
+
+    def result(self, name, columns, build):
+        """
+        Returns the result `name`, computing it with `build()` only if one of its columns changed.
+
+        Args:
+        name (str/tuple): Result key.
+        columns (list): Columns the result is computed from.
+        build (callable): Computes the result from the current frame.
+        """
+        with self._lock:
+            fingerprints = [self.fingerprint(column) for column in columns]
+            stored = self._results.get(name)
+            if stored is not None and stored[1] == fingerprints:
+                self.reused += 1
+                return stored[2]
+
+            with span("planner.compute", result=str(name)):
+                value = build()
+            self._results[name] = (list(columns), fingerprints, value)
+            self.computed += 1
+            return value
+
+    def dependencies(self):
+        """{result name: columns it depends on} for every stored result."""
+        return {name: columns for name, (columns, _, _) in self._results.items()}
+
+    # ---- analyses ----
+
+    def _teacher_columns(self, subject):
+        return [f"{subject} Teacher", f"{subject} Attendance", f"{subject} Marks"]
+
+    def teacher_stats(self, subject):
+        """
+        Shared intermediate: per-teacher count, mean, variance and quartiles of a subject.
+
+        Returns:
+        dict: {'Attendance': frame, 'Marks': frame} (see the engine's `group_stats`),
+            from the rows with a teacher, attendance and marks.
+        """
+        columns = self._teacher_columns(subject)
+
+        def build():
+            engine = get_engine(self.engine)
+            teacher_df = self.df[columns].dropna()
+            return {metric: engine.group_stats(teacher_df[[columns[0], col]], columns[0], col)
+                    for metric, col in (("Attendance", columns[1]), ("Marks", columns[2]))}
+
+        return self.result(("teacher_stats", subject), columns, build)
+
+    def teacher_scores(self, subject):
+        """`analyze_teacher_effectiveness` for one subject, from the shared teacher statistics."""
+        return self.result(("teacher_scores", subject), self._teacher_columns(subject),
+                           lambda: ta.teacher_scores_from_stats(self.teacher_stats(subject)))
+
+    def all_teacher_scores(self):
+        """Same as `analyze_all_teachers(df, subject_names)`."""
+        return {subject: self.teacher_scores(subject) for subject in self.subject_names
+                if f"{subject} Teacher" in self.df.columns}
+
+    def subject_regression(self, subject):
+        """Attendance → marks regression of one subject: {'slope': float, 'intercept': float}."""
+        columns = [f"{subject} Attendance", f"{subject} Marks"]
+
+        def build():
+            slope, intercept = sa.fit_attendance_regression(self.df, subject)
+            return {"slope": slope, "intercept": intercept}
+
+        return self.result(("subject_regression", subject), columns, build)
+
+    def subject_regressions(self):
+        """Same as `subject_regressions(df, subject_names)`."""
+        return {subject: self.subject_regression(subject) for subject in self.subject_names}
+
+    def correlation(self):
+        """Correlation matrix of the subjects' marks."""
+        columns = [f"{subject} Marks" for subject in self.subject_names]
+        return self.result(("correlation", tuple(columns)), columns,
+                           lambda: get_engine(self.engine).corr(self.df, columns))
+
+    def bias_shap(self, subject, factor, teacher_model="fixed"):
+        """
+        Bias impact (signed mean |SHAP| value) of every feature for one subject and factor (`compute_bias_shap`).
+
+        With the "average" teacher model, the teacher averages come from the shared
+        teacher statistics instead of being grouped again.
+
+        Raises:
+        ValueError: As `detect_bias` (the error is not cached).
+        """
+        if factor not in self.df.columns:
+            raise ValueError(f"Missing necessary columns: {factor}")
+        frame_columns = list(bd.bias_subject_frame(self.df.head(0), subject, factor).columns)
+        has_teacher = f"{subject} Teacher" in frame_columns
+
+        def build():
+            teacher_means = None
+            if has_teacher and teacher_model == "average":
+                teacher_means = self.teacher_stats(subject)["Marks"]["mean"]
+            return bd.compute_bias_shap(bd.bias_subject_frame(self.df, subject, factor), teacher_model, teacher_means)
+
+        return self.result(("bias", subject, factor, teacher_model), frame_columns, build)
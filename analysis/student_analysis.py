@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from core_functionality.data_validator import PARTITION_COLUMNS
+from core_functionality.instrumentation import span
+
+# Student Rankings
+#
+# Percentiles, dense ranks and z-scores are computed for every student and
+# subject at once, column-wise over the marks matrix. Leaderboards use
+# `np.argpartition` to pick the k best (or worst) students in linear time and
+# only sort those k, per subject or per teacher of a subject. `StudentIndex`
+# maps roll numbers to rows for constant-time drill-down.
+
+OVERALL = "Overall"
+
+
+def student_rankings(df, subject_names):
+    """
+    Per-subject and overall standing of every student.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    subject_names (list): List of subject names.
+
+    Returns:
+    pd.DataFrame: One row per student (same row order as `df`) with, for every subject
+        and for "Overall" (the student's average marks over their subjects):
+        - "[Subject] Marks"
+        - "[Subject] Rank": dense rank, 1 = highest marks
+        - "[Subject] Percentile": share of students with the same or lower marks (0-100]
+        - "[Subject] Z": (marks − mean) / standard deviation
+        Students without marks in a subject get NaN for it.
+    """
+    with span("students.rankings", rows=len(df), subjects=len(subject_names)):
+        marks = df[[f"{subject} Marks" for subject in subject_names]].astype(float)
+        marks.columns = list(subject_names)
+        marks[OVERALL] = marks.mean(axis=1)
+
+        z_scores = (marks - marks.mean()) / marks.std().replace(0, np.nan)
+
+        columns = {}
+        for name in marks.columns:
+            rank, percentile = _standing(marks[name].to_numpy())
+            columns[f"{name} Marks"] = marks[name]
+            columns[f"{name} Rank"] = pd.array(rank, dtype="Int64")
+            columns[f"{name} Percentile"] = percentile
+            columns[f"{name} Z"] = z_scores[name]
+        rankings = pd.DataFrame(columns, index=df.index)
+        return pd.concat([_identity(df), rankings], axis=1)
+
+
+def _standing(values):
+    """
+    Dense rank (1 = highest) and percentile of every value, from one sort.
+
+    Same as pandas' `rank(method="dense", ascending=False)` and
+    `rank(method="max", pct=True) * 100`; NaNs get NaN (rank: <NA>).
+    """
+    valid = ~np.isnan(values)
+    distinct, inverse, counts = np.unique(values[valid], return_inverse=True, return_counts=True)
+    rank = np.full(len(values), np.nan)
+    percentile = np.full(len(values), np.nan)
+    rank[valid] = len(distinct) - inverse
+    # Students at or below each distinct mark
+    percentile[valid] = np.cumsum(counts)[inverse] * (100.0 / max(valid.sum(), 1))
+    return rank, percentile
+
+
+def _identity(df):
+    """The columns identifying a student: partition columns, Roll No and Name (if present)."""
+    return df[[col for col in (*PARTITION_COLUMNS, "Roll No", "Name") if col in df.columns]]
+
+
+def top_k_positions(values, k, largest=True):
+    """
+    Positions of the k largest (or smallest) values, best first, without sorting all of them.
+
+    Args:
+    values (np.ndarray): 1-D numeric array; NaNs are never selected.
+    k (int): Number of positions to return (fewer if there are fewer values).
+    largest (bool): True for the top, False for the bottom.
+
+    Returns:
+    np.ndarray: Positions into `values`.
+    """
+    valid = np.flatnonzero(~np.isnan(values))
+    keys = -values[valid] if largest else values[valid]
+    if k <= 0 or valid.size == 0:
+        return valid[:0]
+    if k < valid.size:
+        # Linear-time selection of the k best, then a sort of those k only
+        chosen = np.argpartition(keys, k - 1)[:k]
+    else:
+        chosen = np.arange(valid.size)
+    return valid[chosen[np.argsort(keys[chosen], kind="stable")]]
+
+
+def leaderboard(df, subject, k=10, largest=True, by_teacher=False):
+    """
+    Top (or bottom) k students of a subject, overall or per teacher.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    subject (str): Subject name.
+    k (int): Students per leaderboard.
+    largest (bool): True for the top k, False for the bottom k.
+    by_teacher (bool): One leaderboard per '[Subject] Teacher' instead of one overall.
+
+    Returns:
+    pd.DataFrame: The students' identity columns, the teacher (if present),
+        the marks and their "Position" (1 = first on the board).
+
+    Raises:
+    ValueError: If `by_teacher` is set but the subject has no teacher column.
+    """
+    marks_col, teacher_col = f"{subject} Marks", f"{subject} Teacher"
+    if by_teacher and teacher_col not in df.columns:
+        raise ValueError(f"Missing necessary columns: {teacher_col}")
+
+    with span("students.leaderboard", subject=subject, k=k, by_teacher=by_teacher):
+        values = df[marks_col].to_numpy(dtype=float)
+        if by_teacher:
+            # Row positions of every teacher from one group-by; select within each group
+            groups = df.groupby(teacher_col, sort=True).indices
+            positions = [group[top_k_positions(values[group], k, largest)] for group in groups.values()]
+            ranks = [np.arange(1, len(chosen) + 1) for chosen in positions]
+            positions = np.concatenate(positions) if positions else np.array([], dtype=int)
+            ranks = np.concatenate(ranks) if ranks else np.array([], dtype=int)
+        else:
+            positions = top_k_positions(values, k, largest)
+            ranks = np.arange(1, len(positions) + 1)
+
+        board = _identity(df).iloc[positions].copy()
+        if teacher_col in df.columns:
+            board[teacher_col] = df[teacher_col].to_numpy()[positions]
+        board[marks_col] = values[positions]
+        board.insert(0, "Position", ranks)
+        return board.reset_index(drop=True)
+
+
+class StudentIndex:
+    """
+    Roll No → rows lookup over a rankings frame (built once, O(1) per lookup).
+
+    Roll numbers may repeat across schools, sections or terms; a lookup returns
+    every student with that roll number.
+
+    Args:
+    rankings (pd.DataFrame): Output of `student_rankings` (or any frame with a Roll No column).
+    """
+    def __init__(self, rankings):
+        self.rankings = rankings
+        with span("students.index", rows=len(rankings)):
+            self._positions = rankings.groupby("Roll No", sort=False).indices
+
+    def __contains__(self, roll_no):
+        return roll_no in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def lookup(self, roll_no):
+        """
+        Rows of the students with `roll_no`.
+
+        Raises:
+        KeyError: If no student has this roll number.
+        """
+        return self.rankings.iloc[self._positions[roll_no]]
+
+    def subject_table(self, roll_no, subject_names):
+        """
+        One student's standing as a subject × (Marks, Rank, Percentile, Z) table.
+
+        With repeated roll numbers, the first matching student is shown.
+        """
+        row = self.lookup(roll_no).iloc[0]
+        names = [*subject_names, OVERALL]
+        return pd.DataFrame(
+            {stat: [row[f"{name} {stat}"] for name in names] for stat in ("Marks", "Rank", "Percentile", "Z")},
+            index=pd.Index(names, name="Subject"),
+        )
@@ -1,80 +1,75 @@
 import pandas as pd
-import plotly.express as px
-import statsmodels.api as sm
+from core_functionality.dataframe_engine import get_engine
+from core_functionality.instrumentation import span
+from core_functionality.lazy_figures import LazyFigures
 
-def analyze_subject_performance(df, subject_names):
+# plotly and statsmodels are imported inside the functions that use them so that
+# importing this module (e.g. from a view) stays cheap until an analysis runs.
+
+def fit_attendance_regression(df, subject):
     """
-    Analyzes subject-wise performance based on marks and attendance.
+    Fits a simple OLS regression of a subject's marks on its attendance.
 
     Args:
         df (pd.DataFrame): The main dataset containing student performance details.
-        subject_names (list): List of subject names (e.g., ["Math", "Science", "English"]).
+        subject (str): Subject name (e.g., "Math").
 
     Returns:
-        tuple: (correlation_matrix_fig, subject_marks_boxplot, attendance_vs_marks_scatter_list)
-            - Correlation Matrix Heatmap (Plotly) or None if only one subject.
-            - Box Plot of Subject Marks (Plotly) or None if only one subject.
-            - List of Scatter Plots (one per subject) showing Attendance vs. Marks with regression line.
+        tuple: (slope, intercept) of Marks = slope × Attendance + intercept.
     """
+    import statsmodels.api as sm
 
-    # Default to None for correlation matrix and box plot
-    correlation_matrix_fig = None
-    subject_marks_boxplot = None
+    X = df[f"{subject} Attendance"].astype(float)
+    y = df[f"{subject} Marks"].astype(float)
 
-    # 1️⃣ CORRELATION MATRIX (Heatmap)
-    if len(subject_names) > 1:
-        # Extract only marks columns for correlation analysis
-        marks_df = df[[f"{sub} Marks" for sub in subject_names]]
-        correlation_matrix = marks_df.corr()
-
-        correlation_matrix_fig = px.imshow(
-            correlation_matrix,
-            text_auto=True,
-            labels=dict(color="Correlation"),
-            title="Subject Marks Correlation Matrix",
-            color_continuous_scale="viridis",
-        )
+    with span("subject.regression", subject=subject) as record:
+        X = sm.add_constant(X)  # Add intercept for OLS regression
+        model = sm.OLS(y, X).fit()
 
-    # 2️⃣ BOX PLOT OF SUBJECT-WISE MARKS
-    if len(subject_names) > 1:
-        # Convert marks columns to long format for Plotly
-        marks_long_df = df.melt(id_vars=["Roll No", "Name"], 
-                                value_vars=[f"{sub} Marks" for sub in subject_names], 
-                                var_name="Subject", 
-                                value_name="Marks")
-
-        marks_long_df["Subject"] = marks_long_df["Subject"].str.replace(" Marks", "")
-
-        subject_marks_boxplot = px.box(
-            marks_long_df,
-            x="Subject",
-            y="Marks",
-            title="Distribution of Marks Across Subjects",
-            color="Subject"
-        )
+        intercept = float(model.params.iloc[0])  # Constant (c)
+        slope = float(model.params.iloc[1])  # Coefficient of attendance (m)
+        record["slope"], record["intercept"] = slope, intercept
+
+    return slope, intercept
 
-    # 3️⃣ SCATTER PLOTS (Attendance vs. Marks per Subject)
-    scatter_plots = []
+def subject_regressions(df, subject_names):
+    """
+    Fits the attendance → marks regression for every subject.
+
+    Args:
+        df (pd.DataFrame): The main dataset containing student performance details.
+        subject_names (list): List of subject names.
 
+    Returns:
+        dict: {subject: {"slope": float, "intercept": float}}
+    """
+    regressions = {}
     for subject in subject_names:
-        # Extract attendance and marks for the subject
-        attendance_col = f"{subject} Attendance"
-        marks_col = f"{subject} Marks"
+        slope, intercept = fit_attendance_regression(df, subject)
+        regressions[subject] = {"slope": slope, "intercept": intercept}
+    return regressions
 
-        # Fit a simple linear regression model
-        X = df[attendance_col].astype(float)
-        y = df[marks_col].astype(float)
+def attendance_scatter_plot(df, subject):
+    """
+    Scatter plot of a subject's attendance vs. marks with its regression line.
 
-        X = sm.add_constant(X)  # Add intercept for OLS regression
-        model = sm.OLS(y, X).fit()
+    Args:
+        df (pd.DataFrame): The main dataset containing student performance details.
+        subject (str): Subject name (e.g., "Math").
 
-        # Extract regression parameters
-        intercept = model.params[0]  # Constant (c)
-        slope = model.params[1]  # Coefficient of attendance (m)
+    Returns:
+        plotly.graph_objects.Figure: The scatter plot, annotated with the fitted equation.
+    """
+    import plotly.express as px
 
-        # Print regression equation
-        print(f"{subject}: Marks = {slope:.2f} × Attendance + {intercept:.2f}")
+    # Extract attendance and marks for the subject
+    attendance_col = f"{subject} Attendance"
+    marks_col = f"{subject} Marks"
 
+    # Fit a simple linear regression model
+    slope, intercept = fit_attendance_regression(df, subject)
+
+    with span("subject.scatter", subject=subject):
         # Create scatter plot with regression line
         scatter_plot = px.scatter(
             df,
@@ -94,10 +89,76 @@ def analyze_subject_performance(df, subject_names):
             font=dict(size=14, color="red")
         )
 
-        scatter_plots.append(scatter_plot)
+    return scatter_plot
+
+def analyze_subject_performance(df, subject_names):
+    """
+    Analyzes subject-wise performance based on marks and attendance.
+
+    Args:
+        df (pd.DataFrame): The main dataset containing student performance details.
+        subject_names (list): List of subject names (e.g., ["Math", "Science", "English"]).
+
+    Returns:
+        tuple: (correlation_matrix_fig, subject_marks_boxplot, attendance_vs_marks_scatter_list)
+            - Correlation Matrix Heatmap (Plotly) or None if only one subject.
+            - Box Plot of Subject Marks (Plotly) or None if only one subject.
+            - LazyFigures of Scatter Plots (one per subject) showing Attendance vs. Marks with
+              regression line. Each plot is built when first accessed (`.get(subject)`,
+              indexing or iteration), so views can show one subject without building all.
+    """
+
+    with span("analyze_subject_performance", subjects=len(subject_names), rows=len(df)):
+        correlation_matrix_fig, subject_marks_boxplot = _analyze_subject_performance(df, subject_names)
+
+    # 3️⃣ SCATTER PLOTS (Attendance vs. Marks per Subject), built on demand
+    scatter_plots = LazyFigures(subject_names, lambda subject: attendance_scatter_plot(df, subject))
 
     return correlation_matrix_fig, subject_marks_boxplot, scatter_plots
 
+def _analyze_subject_performance(df, subject_names):
+    import plotly.express as px
+
+    # Default to None for correlation matrix and box plot
+    correlation_matrix_fig = None
+    subject_marks_boxplot = None
+
+    # 1️⃣ CORRELATION MATRIX (Heatmap)
+    if len(subject_names) > 1:
+        with span("subject.correlation"):
+            # Extract only marks columns for correlation analysis
+            marks_columns = [f"{sub} Marks" for sub in subject_names]
+            correlation_matrix = get_engine().corr(df, marks_columns)
+
+            correlation_matrix_fig = px.imshow(
+                correlation_matrix,
+                text_auto=True,
+                labels=dict(color="Correlation"),
+                title="Subject Marks Correlation Matrix",
+                color_continuous_scale="viridis",
+            )
+
+    # 2️⃣ BOX PLOT OF SUBJECT-WISE MARKS
+    if len(subject_names) > 1:
+        with span("subject.boxplot"):
+            # Convert marks columns to long format for Plotly
+            marks_long_df = df.melt(id_vars=["Roll No", "Name"], 
+                                    value_vars=[f"{sub} Marks" for sub in subject_names], 
+                                    var_name="Subject", 
+                                    value_name="Marks")
+
+            marks_long_df["Subject"] = marks_long_df["Subject"].str.replace(" Marks", "")
+
+            subject_marks_boxplot = px.box(
+                marks_long_df,
+                x="Subject",
+                y="Marks",
+                title="Distribution of Marks Across Subjects",
+                color="Subject"
+            )
+
+    return correlation_matrix_fig, subject_marks_boxplot
+
 if __name__ == "__main__":
     # Sample dataset
     data = {
@@ -1,9 +1,13 @@
-from scipy.stats import f_oneway
+import numpy as np
 import pandas as pd
-from scipy.stats import iqr
-import plotly.express as px
+from core_functionality.dataframe_engine import get_engine
+from core_functionality.instrumentation import span
+from core_functionality.lazy_figures import LazyFigures
 
-def anova_significance(df):
+# scipy and plotly are imported inside the functions that use them so that
+# importing this module (e.g. from a view) stays cheap until an analysis runs.
+
+def anova_significance(df, engine=None):
     """
     Performs a one-way ANOVA test to check if there is a significant difference 
     in the given metric (either Marks or Attendance) across different teachers.
@@ -16,6 +20,10 @@ def anova_significance(df):
     Returns:
     bool: True if the ANOVA test finds a significant difference (p-value < 0.1), 
             otherwise False.
+
+    The F statistic is computed from per-teacher counts, means and variances
+    (one group-by in the selected DataFrame engine) instead of splitting the
+    data into one array per teacher.
     
     Raises:
     ValueError: If the DataFrame does not have exactly two columns, 
@@ -34,20 +42,37 @@ def anova_significance(df):
     if not pd.api.types.is_numeric_dtype(df[value_col]):
         raise ValueError(f"Column '{value_col}' must be numeric.")
 
-    # Group data by teacher and extract the values for ANOVA
-    groups = [group[value_col].values for _, group in df.groupby(teacher_col)]
+    # Per-teacher counts, means and variances for ANOVA
+    stats = get_engine(engine).group_stats(df.dropna(), teacher_col, value_col)
+    return _anova_significant(stats)
+
+def _anova_significant(stats):
+    """One-way ANOVA (as `scipy.stats.f_oneway`) from per-group count/mean/var; True if p < 0.1."""
+    from scipy.stats import f as f_distribution
 
     # ANOVA requires at least two groups to compare
-    if len(groups) < 2:
+    if len(stats) < 2:
         return False  # Not enough data to perform ANOVA
 
     # Perform one-way ANOVA test
-    _, p_value = f_oneway(*groups)
+    with span("teacher.anova", groups=len(stats)):
+        counts = stats["count"].to_numpy(dtype=float)
+        means = stats["mean"].to_numpy(dtype=float)
+        grand_mean = (counts * means).sum() / counts.sum()
+        between = (counts * (means - grand_mean) ** 2).sum()
+        within = ((counts - 1) * np.nan_to_num(stats["var"].to_numpy(dtype=float))).sum()
+        df_between, df_within = len(stats) - 1, counts.sum() - len(stats)
+        if df_within <= 0:
+            return False
+        if within == 0:
+            # Constant within every group: f_oneway gives F = inf (p = 0), or NaN if all groups agree
+            return bool(between > 0)
+        p_value = f_distribution.sf((between / df_between) / (within / df_within), df_between, df_within)
 
     # Return True if the p-value is less than 0.1 (statistically significant difference)
     return p_value < 0.1
 
-def calculate_teacher_mean(df):
+def calculate_teacher_mean(df, engine=None):
     """
     Calculates the mean of the numeric column for each teacher.
 
@@ -60,9 +85,10 @@ def calculate_teacher_mean(df):
     teacher_col = [col for col in df.columns if "Teacher" in col][0]
     value_col = [col for col in df.columns if col != teacher_col][0]
 
-    return df.groupby(teacher_col)[value_col].mean().to_dict()
+    with span("teacher.mean"):
+        return get_engine(engine).group_stats(df, teacher_col, value_col)["mean"].to_dict()
 
-def calculate_teacher_iqr(df):
+def calculate_teacher_iqr(df, engine=None):
     """
     Calculates the Interquartile Range (IQR) of the numeric column for each teacher.
 
@@ -75,9 +101,12 @@ def calculate_teacher_iqr(df):
     teacher_col = [col for col in df.columns if "Teacher" in col][0]
     value_col = [col for col in df.columns if col != teacher_col][0]
 
-    return df.groupby(teacher_col)[value_col].apply(iqr).to_dict()
+    with span("teacher.iqr"):
+        # Same as scipy.stats.iqr per teacher (linear interpolation), in one group-by
+        stats = get_engine(engine).group_stats(df.dropna(), teacher_col, value_col)
+        return (stats["q3"] - stats["q1"]).to_dict()
 
-def analyze_teacher_effectiveness(df):
+def analyze_teacher_effectiveness(df, engine=None):
     """
     Analyzes teacher effectiveness by checking if there is a significant difference 
     in both Attendance and Marks across teachers using ANOVA.
@@ -87,6 +116,7 @@ def analyze_teacher_effectiveness(df):
     Args:
     df (pd.DataFrame): A DataFrame with at least three columns: 
                 one 'Teacher' column and two numeric columns ('Marks' and 'Attendance').
+    engine (str): DataFrame engine ("pandas"/"polars"); defaults to the configured one.
 
     Returns:
     dict: A dictionary containing two sub-dictionaries:
@@ -95,33 +125,65 @@ def analyze_teacher_effectiveness(df):
             If ANOVA does not find significance for a category, it returns an empty dictionary for that category.
     """
     teacher_col = [col for col in df.columns if "Teacher" in col][0]
+    with span("analyze_teacher_effectiveness", teacher_col=teacher_col, rows=len(df)):
+        return _analyze_teacher_effectiveness(df, teacher_col, get_engine(engine))
+
+def _analyze_teacher_effectiveness(df, teacher_col, engine):
     attendance_col = [col for col in df.columns if "Attendance" in col][0]
     marks_col = [col for col in df.columns if "Marks" in col][0]
 
-    results = {"Marks": {}, "Attendance": {}}
+    # One group-by per metric gives the counts, means, variances and quartiles
+    # used by the ANOVA, the mean and the IQR
+    stats = {}
+    for metric, value_col in (("Attendance", attendance_col), ("Marks", marks_col)):
+        with span("teacher.stats", metric=metric, engine=engine.name):
+            stats[metric] = engine.group_stats(df[[teacher_col, value_col]].dropna(), teacher_col, value_col)
 
-    # Process Attendance Scores
-    attendance_df = df[[teacher_col, attendance_col]].dropna()
-    attendance_counts = attendance_df[teacher_col].value_counts()
-    attendance_df = attendance_df[attendance_df[teacher_col].isin(attendance_counts[attendance_counts >= 3].index)]
+    return teacher_scores_from_stats(stats)
 
-    if anova_significance(attendance_df):
-        mean_scores = calculate_teacher_mean(attendance_df)
-        iqr_scores = calculate_teacher_iqr(attendance_df)
-        results["Attendance"] = calculate_weighted_score(mean_scores, iqr_scores)
+def teacher_scores_from_stats(stats):
+    """
+    Teacher effectiveness scores from per-teacher statistics that are already computed.
 
-    # Process Marks Scores
-    marks_df = df[[teacher_col, marks_col]].dropna()
-    marks_counts = marks_df[teacher_col].value_counts()
-    marks_df = marks_df[marks_df[teacher_col].isin(marks_counts[marks_counts >= 3].index)]
+    Args:
+    stats (dict): {'Attendance': frame, 'Marks': frame}, each as returned by the
+            engine's `group_stats` (count, mean, var, q1, q3 per teacher).
+
+    Returns:
+    dict: Same as `analyze_teacher_effectiveness`.
+    """
+    results = {"Marks": {}, "Attendance": {}}
+    for metric, metric_stats in stats.items():
+        metric_stats = metric_stats[metric_stats["count"] >= 3]  # A teacher needs at least 3 students
 
-    if anova_significance(marks_df):
-        mean_scores = calculate_teacher_mean(marks_df)
-        iqr_scores = calculate_teacher_iqr(marks_df)
-        results["Marks"] = calculate_weighted_score(mean_scores, iqr_scores)
+        if _anova_significant(metric_stats):
+            mean_scores = metric_stats["mean"].to_dict()
+            iqr_scores = (metric_stats["q3"] - metric_stats["q1"]).to_dict()
+            results[metric] = calculate_weighted_score(mean_scores, iqr_scores)
 
     return results
 
+def analyze_all_teachers(df, subject_names, engine=None):
+    """
+    Runs `analyze_teacher_effectiveness` for every subject that has a teacher column.
+
+    Args:
+    df (pd.DataFrame): The validated marksheet.
+    subject_names (list): List of subject names.
+    engine (str): DataFrame engine ("pandas"/"polars"); defaults to the configured one.
+
+    Returns:
+    dict: {subject: {'Marks': {...}, 'Attendance': {...}}} for subjects with a '[Subject] Teacher' column.
+    """
+    teacher_scores = {}
+    for subject in subject_names:
+        teacher_col = f"{subject} Teacher"
+        if teacher_col not in df.columns:
+            continue
+        teacher_df = df[[teacher_col, f"{subject} Attendance", f"{subject} Marks"]].dropna()
+        teacher_scores[subject] = analyze_teacher_effectiveness(teacher_df, engine)
+    return teacher_scores
+
 def calculate_weighted_score(mean_scores, iqr_scores):
     """
     Calculates the weighted score for teachers using Mean (0.6) and IQR (0.4),
@@ -158,7 +220,10 @@ def generate_boxplot(df, category_col, value_col, title):
     Returns:
     plotly.graph_objects.Figure: A Plotly figure object representing the box plot.
     """
-    fig = px.box(df, x=category_col, y=value_col, title=title, points="all")
+    import plotly.express as px
+
+    with span("teacher.boxplot", value_col=value_col):
+        fig = px.box(df, x=category_col, y=value_col, title=title, points="all")
     return fig 
 
 def plot_teacher_distributions(df):
@@ -176,6 +241,59 @@ def plot_teacher_distributions(df):
 
     return attendance_fig, marks_fig
 
+def teacher_distribution_frame(df, subject):
+    """
+    Extracts one subject's Teacher/Attendance/Marks columns under generic names.
+
+    Args:
+    df (pd.DataFrame): The full marksheet.
+    subject (str): Subject with a "[Subject] Teacher" column.
+
+    Returns:
+    pd.DataFrame: Columns "Teacher", "Attendance" and "Marks", without missing values.
+    """
+    teacher_df = df[[f"{subject} Teacher", f"{subject} Attendance", f"{subject} Marks"]].dropna()
+    return teacher_df.rename(columns={
+        f"{subject} Teacher": "Teacher",
+        f"{subject} Attendance": "Attendance",
+        f"{subject} Marks": "Marks",
+    })
+
+def teacher_distribution_figures(df, subject_names):
+    """
+    Lazily builds the attendance and marks box plots of every subject with a teacher column.
+
+    Args:
+    df (pd.DataFrame): The full marksheet.
+    subject_names (list): List of subject names.
+
+    Returns:
+    LazyFigures: subject → (attendance_fig, marks_fig), built on first access.
+    """
+    teacher_subjects = [subject for subject in subject_names if f"{subject} Teacher" in df.columns]
+    return LazyFigures(teacher_subjects, lambda subject: plot_teacher_distributions(teacher_distribution_frame(df, subject)))
+
+def teacher_score_matrix(teacher_scores):
+    """
+    Formats the output of `analyze_all_teachers` as a score matrix.
+
+    Args:
+    teacher_scores (dict): {subject: {"Marks": {teacher: score}, "Attendance": {teacher: score}}}
+
+    Returns:
+    pd.DataFrame: Scores indexed by (Subject, Teacher) with one column per category,
+        or None if no teacher could be scored.
+    """
+    formatted_data = [
+        {"Subject": subject, "Teacher": teacher, "Category": category, "Score": round(score, 2)}
+        for subject, subject_data in teacher_scores.items()
+        for category, teacher_dict in subject_data.items()  # 'Marks' and 'Attendance'
+        for teacher, score in teacher_dict.items()
+    ]
+    if not formatted_data:
+        return None
+    return pd.DataFrame(formatted_data).pivot(index=["Subject", "Teacher"], columns="Category", values="Score")
+
 if __name__ == "__main__":
     # Sample test DataFrame for effectiveness analysis
     data = {
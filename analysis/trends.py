@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import analysis.subject_analysis as sa
+import analysis.teacher_analysis as ta
+from core_functionality.dataframe_engine import get_engine
+from core_functionality.instrumentation import span
+from core_functionality.term_store import SUBJECT_STAT_COLUMNS, TEACHER_STAT_COLUMNS, marksheet_fingerprint
+
+# Term Trends
+#
+# Summarizes a validated marksheet into the rows kept by the TermStore (one per
+# subject, one per subject and teacher) and charts those rows across terms.
+# A term is analyzed once, when it is stored; the trend charts only read summaries.
+
+# Labels of the summary columns in charts and tables
+STAT_LABELS = {
+    "students": "Students",
+    "mean_marks": "Average Marks",
+    "std_marks": "Marks Std. Dev.",
+    "iqr_marks": "Marks IQR",
+    "mean_attendance": "Average Attendance",
+    "slope": "Attendance → Marks Slope",
+    "intercept": "Attendance → Marks Intercept",
+    "marks_score": "Teacher Score (Marks)",
+    "attendance_score": "Teacher Score (Attendance)",
+}
+
+
+def subject_summary(df, subject_names):
+    """
+    One summary row per subject.
+
+    Returns:
+    pd.DataFrame: subject, students, mean_marks, std_marks, mean_attendance, slope, intercept
+        (slope/intercept are NaN with fewer than 3 students).
+    """
+    rows = []
+    for subject in subject_names:
+        data = df[[f"{subject} Attendance", f"{subject} Marks"]].dropna()
+        marks, attendance = data[f"{subject} Marks"], data[f"{subject} Attendance"]
+        slope, intercept = sa.fit_attendance_regression(data, subject) if len(data) >= 3 else (np.nan, np.nan)
+        rows.append({
+            "subject": subject,
+            "students": len(data),
+            "mean_marks": marks.mean(),
+            "std_marks": marks.std(),
+            "mean_attendance": attendance.mean(),
+            "slope": slope,
+            "intercept": intercept,
+        })
+    return pd.DataFrame(rows, columns=["subject"] + SUBJECT_STAT_COLUMNS)
+
+
+def teacher_summary(df, subject_names, engine=None):
+    """
+    One summary row per subject and teacher.
+
+    Returns:
+    pd.DataFrame: subject, teacher, students, mean_marks, iqr_marks, mean_attendance,
+        marks_score, attendance_score. Scores are those of `analyze_teacher_effectiveness`
+        (NaN where ANOVA found no difference or the teacher has fewer than 3 students).
+    """
+    engine = get_engine(engine)
+    frames = []
+    for subject in subject_names:
+        teacher_col = f"{subject} Teacher"
+        if teacher_col not in df.columns:
+            continue
+        teacher_df = df[[teacher_col, f"{subject} Attendance", f"{subject} Marks"]].dropna()
+        if teacher_df.empty:
+            continue
+        marks = engine.group_stats(teacher_df, teacher_col, f"{subject} Marks")
+        attendance = engine.group_stats(teacher_df, teacher_col, f"{subject} Attendance")
+        scores = ta.analyze_teacher_effectiveness(teacher_df, engine)
+        frames.append(pd.DataFrame({
+            "subject": subject,
+            "teacher": marks.index.astype(str),
+            "students": marks["count"].to_numpy(),
+            "mean_marks": marks["mean"].to_numpy(),
+            "iqr_marks": (marks["q3"] - marks["q1"]).to_numpy(),
+            "mean_attendance": attendance["mean"].reindex(marks.index).to_numpy(),
+            "marks_score": marks.index.map(scores["Marks"]).to_numpy(dtype=float),
+            "attendance_score": marks.index.map(scores["Attendance"]).to_numpy(dtype=float),
+        }))
+    columns = ["subject", "teacher"] + TEACHER_STAT_COLUMNS
+    return pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
+
+
+def store_marksheet(store, df, subject_names, term=None):
+    """
+    Summarizes a marksheet and saves it in the term store.
+
+    Args:
+    store (TermStore): Destination store.
+    df (pd.DataFrame): The validated marksheet.
+    subject_names (list): List of subject names.
+    term (str): Term label. If omitted, the marksheet's `Term` column splits it
+        into one stored term per value.
+
+    Returns:
+    dict: {term: "stored" | "unchanged"}; a term whose marksheet is already
+        stored unchanged is not re-analyzed.
+    """
+    if term is None:
+        if "Term" not in df.columns:
+            raise ValueError("Name the term, or add a 'Term' column to the marksheet.")
+        parts = {str(label): part for label, part in df.groupby("Term", sort=False)}
+    else:
+        parts = {str(term): df}
+
+    status = {}
+    for label, part in parts.items():
+        fingerprint = marksheet_fingerprint(part)
+        if store.fingerprint(label) == fingerprint:
+            status[label] = "unchanged"
+            continue
+        with span("trends.summarize", term=label, rows=len(part)):
+            subjects = subject_summary(part, subject_names)
+            teachers = teacher_summary(part, subject_names)
+        with span("trends.store", term=label):
+            store.save_term(label, part.reset_index(drop=True), subjects, teachers, fingerprint)
+        status[label] = "stored"
+    return status
+
+
+def trend_figure(trend, value, group, title):
+    """
+    Line chart of `value` across terms, one line per `group`.
+
+    Args:
+    trend (pd.DataFrame): Rows from `TermStore.subject_trend` or `teacher_trend`.
+    value (str): Summary column to plot (see STAT_LABELS).
+    group (str): Column naming the lines ("subject" or "teacher").
+    title (str): Chart title.
+    """
+    import plotly.express as px
+
+    terms = trend.drop_duplicates("term").sort_values("seq")["term"].tolist()
+    fig = px.line(trend.dropna(subset=[value]), x="term", y=value, color=group, markers=True, title=title,
+                  category_orders={"term": terms},
+                  labels={"term": "Term", value: STAT_LABELS.get(value, value), group: group.title()})
+    fig.update_xaxes(type="category")
+    return fig
@@ -0,0 +1,95 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Allow running as `python benchmarks/at_risk.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import analysis.at_risk as ar
+import core_functionality.synthetic_marksheet as synthetic
+
+# At-Risk Model Benchmark
+#
+# Trains the at-risk model on several synthetic "past terms", then:
+#   - checks that the saved (JSON) model scores exactly like the fitted one and
+#     like scikit-learn's `predict_proba` on the same features,
+#   - times batched scoring at each --sizes (students × --subjects pairs per second),
+#   - reports the calibration of a held-out term: Brier score, log loss, expected
+#     calibration error and the reliability table (predicted vs observed failure rate).
+#
+# Usage (from the repository root):
+#     python benchmarks/at_risk.py --sizes 100000 1000000 --subjects 6
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_parity(model, df, subject_names):
+    """Largest difference between the saved model, the fitted model and scikit-learn."""
+    from sklearn.linear_model import LogisticRegression
+
+    path = os.path.join(tempfile.mkdtemp(), "at_risk_model.json")
+    model.save(path)
+    loaded = ar.AtRiskModel.load(path)
+    fitted = model.score(df, subject_names).to_numpy()
+    saved = loaded.score(df, subject_names, batch_rows=997).to_numpy()
+
+    # The same coefficients in a scikit-learn classifier
+    attendance, marks = ar._subject_matrices(df, subject_names)
+    features = ar.build_features(attendance, marks, model._lines_for(subject_names), model.fill)
+    classifier = LogisticRegression()
+    classifier.classes_ = np.array([False, True])
+    classifier.coef_, classifier.intercept_ = model.coef[None, :], np.array([model.intercept])
+    reference = classifier.predict_proba(((features - model.mean) / model.scale).reshape(-1, len(ar.FEATURES)))[:, 1]
+    return np.abs(fitted - saved).max(), np.abs(fitted.ravel() - reference).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train, score and calibrate the at-risk model on synthetic terms.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Students scored")
+    parser.add_argument("--subjects", type=int, default=6)
+    parser.add_argument("--train-terms", type=int, default=3, help="Synthetic past terms to train on")
+    parser.add_argument("--train-rows", type=int, default=50_000, help="Students per past term")
+    parser.add_argument("--pass-mark", type=float, default=ar.PASS_MARK)
+    parser.add_argument("--batch-rows", type=int, default=ar.BATCH_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    subject_names = synthetic.subject_names_for(args.subjects)
+    history = [(synthetic.generate_marksheet(args.train_rows, args.subjects, 5, seed=seed)[0], subject_names)
+               for seed in range(args.train_terms)]
+    start = time.perf_counter()
+    model = ar.train_at_risk_model(history, args.pass_mark)
+    print(f"trained on {args.train_terms} × {args.train_rows:,} students in {time.perf_counter() - start:.2f}s")
+    print("  coefficients: " + ", ".join(f"{name}={value:+.3f}" for name, value in zip(ar.FEATURES, model.coef)))
+
+    holdout, _ = synthetic.generate_marksheet(args.train_rows, args.subjects, 5, seed=1_000)
+    saved_diff, sklearn_diff = check_parity(model, holdout, subject_names)
+    print(f"parity: saved model {saved_diff:.2e}, scikit-learn {sklearn_diff:.2e}")
+
+    print(f"\n{'students':>10} {'pairs':>12} {'seconds':>9} {'pairs/s':>12}")
+    for size in args.sizes:
+        df, _ = synthetic.generate_marksheet(size, args.subjects, 5, seed=2_000 + size)
+        seconds = best_of(lambda: model.score(df, subject_names, batch_rows=args.batch_rows), args.repeat)
+        pairs = size * args.subjects
+        print(f"{size:>10,} {pairs:>12,} {seconds:>9.3f} {pairs / seconds:>12,.0f}")
+
+    _, marks = ar._subject_matrices(holdout, subject_names)
+    risk = model.score(holdout, subject_names).to_numpy()
+    table, metrics = ar.calibration_report(risk, np.where(np.isnan(marks), np.nan, marks < args.pass_mark))
+    print("\ncalibration (held-out term): " + ", ".join(f"{name} {value:.4f}" for name, value in metrics.items()))
+    print(table.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Allow running as `python benchmarks/dataframe_engines.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import analysis.teacher_analysis as ta
+import bias_analysis.bias_detection as bd
+import core_functionality.data_validator as dv
+import core_functionality.synthetic_marksheet as synthetic
+from core_functionality.dataframe_engine import ENGINE_ENV_VAR, get_engine
+
+# DataFrame Engine Comparison
+#
+# Runs the engine-backed steps of the analyses with the pandas and the Polars
+# engine on the same synthetic marksheet, checks that both give the same
+# results, and reports the best wall time of each:
+#   - validate:   validate_and_convert_file on the CSV (parse + range checks)
+#   - teacher:    analyze_all_teachers (per-teacher counts, means, variances, quartiles)
+#   - corr:       the subject marks correlation matrix
+#   - bias-fixed: the teacher fixed-effects bias design (within-teacher demeaning)
+#
+# The *-na cases repeat the engine operations on a copy of the marksheet with
+# missing teachers, marks and attendance (and an all-empty column in the CSV),
+# where the engines must skip missing values and leave rows without a group
+# key out of every group, as pandas does.
+#
+# Usage (from the repository root; needs `pip install polars`):
+#     python benchmarks/dataframe_engines.py --rows 100000 1000000 --subjects 8 --teachers 50
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def assert_same(name, expected, actual):
+    """Raises AssertionError if the two engines' results differ beyond float round-off."""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), f"{name}: keys differ"
+        for key in expected:
+            assert_same(f"{name}[{key}]", expected[key], actual[key])
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_exact=False, rtol=1e-9, atol=1e-9,
+                                      obj=name)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual, check_dtype=False, check_exact=False, rtol=1e-9, atol=1e-9,
+                                       obj=name)
+    elif isinstance(expected, (float, int, np.floating)):
+        assert np.isclose(expected, actual, rtol=1e-9, atol=1e-9), f"{name}: {expected} != {actual}"
+    else:
+        assert expected == actual, f"{name}: {expected!r} != {actual!r}"
+
+
+def with_missing(df, subject_names, share=0.02, seed=0):
+    """Copy of the marksheet with `share` of the teachers, marks and attendance blanked out."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    for subject in subject_names:
+        for column in (f"{subject} Teacher", f"{subject} Marks", f"{subject} Attendance"):
+            if column in df.columns:
+                df.loc[rng.random(len(df)) < share, column] = np.nan
+    return df
+
+
+def cases(df, csv_path, subject_names, missing_df, missing_csv_path):
+    subject = subject_names[0]
+    teacher_col = f"{subject} Teacher"
+    numeric = [f"{subject} Marks", f"{subject} Attendance"]
+
+    def validate():
+        # Times the in-memory path: the plan is made without a memory budget
+        with open(csv_path, "rb") as file:
+            return dv.validate_and_convert_file(file, dv.plan_ingestion(file, budget=float("inf")))[0]
+
+    def bias_fixed():
+        X, y = bd.bias_design(bd.bias_subject_frame(df, subject, "Gender"), "fixed")
+        return X.assign(marks=y).reset_index(drop=True)
+
+    def group_mean_na():
+        engine = get_engine()
+        return {"list": engine.group_transform_mean(missing_df, teacher_col, numeric),
+                "str": engine.group_transform_mean(missing_df, teacher_col, numeric[0]),
+                "series": engine.group_transform_mean(missing_df[numeric], missing_df[teacher_col], numeric)}
+
+    def read_csv_na():
+        with open(missing_csv_path, "rb") as file:
+            return get_engine().read_csv(file)
+
+    return {
+        "validate": validate,
+        "teacher": lambda: ta.analyze_all_teachers(df, subject_names),
+        "corr": lambda: get_engine().corr(df, [f"{name} Marks" for name in subject_names]),
+        "bias-fixed": bias_fixed,
+        "group-mean-na": group_mean_na,
+        "group-stats-na": lambda: get_engine().group_stats(missing_df, teacher_col, numeric[0]),
+        "corr-na": lambda: get_engine().corr(missing_df, [f"{name} Marks" for name in subject_names]),
+        "read-csv-na": read_csv_na,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the pandas and Polars DataFrame engines.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--teachers", type=int, default=50, help="Teachers per subject.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    get_engine("polars")  # Fail early if Polars is missing
+    previous = os.environ.get(ENGINE_ENV_VAR)
+    print(f"{'case':<16}{'rows':>12}{'pandas s':>12}{'polars s':>12}{'speedup':>10}")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for rows in args.rows:
+                df, _ = synthetic.generate_marksheet(rows, args.subjects, args.teachers, seed=0)
+                csv_path = os.path.join(workdir, f"marksheet_{rows}.csv")
+                synthetic.write_marksheet(df, csv_path)
+                subject_names = synthetic.subject_names_for(args.subjects)
+                missing_df = with_missing(df, subject_names)
+                missing_csv_path = os.path.join(workdir, f"marksheet_{rows}_missing.csv")
+                synthetic.write_marksheet(missing_df.assign(Remarks=np.nan), missing_csv_path)
+
+                for name, func in cases(df, csv_path, subject_names, missing_df, missing_csv_path).items():
+                    timings, results = {}, {}
+                    for engine in ("pandas", "polars"):
+                        os.environ[ENGINE_ENV_VAR] = engine
+                        timings[engine], results[engine] = best_of(func, args.repeat)
+                    assert_same(name, results["pandas"], results["polars"])
+                    speedup = timings["pandas"] / timings["polars"]
+                    print(f"{name:<16}{rows:>12,}{timings['pandas']:>12.4f}{timings['polars']:>12.4f}{speedup:>9.1f}x")
+    finally:
+        if previous is None:
+            os.environ.pop(ENGINE_ENV_VAR, None)
+        else:
+            os.environ[ENGINE_ENV_VAR] = previous
+    print("Results identical across engines.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+# Cold-Start Import Benchmark for the Streamlit Pages
+#
+# Before a page can paint anything, Python has to execute its module-level
+# imports. For each page we extract those import statements, run them in a
+# *fresh* interpreter (so nothing is cached in sys.modules) and record:
+#   - import_seconds: wall time of the page's module-level imports,
+#   - heavy_modules:  which heavy analysis libraries those imports dragged in.
+# `import streamlit` is timed separately as the shared baseline and is not
+# included in the per-page numbers.
+#
+# Usage (from the repository root):
+#     python benchmarks/import_time.py
+#     python benchmarks/import_time.py --pages Home Reviews --repeat 5 --output cold_start.json
+
+# Every page script under views/, so a new page is benchmarked without being listed here
+PAGES = tuple(sorted(
+    os.path.splitext(name)[0]
+    for name in os.listdir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "views"))
+    if name.endswith(".py")
+))
+
+HEAVY_MODULES = ("shap", "statsmodels", "sklearn", "scipy", "plotly", "wordcloud", "matplotlib", "pandas")
+
+_CHILD_SCRIPT = r"""
+import json, sys, time
+import streamlit
+baseline = set(sys.modules)
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<page imports>", "exec"), {})
+elapsed = time.perf_counter() - start
+heavy = [name for name in sys.argv[2].split(",") if name in sys.modules and name not in baseline]
+print(json.dumps({"import_seconds": elapsed, "heavy_modules": heavy}))
+"""
+
+_BASELINE_SCRIPT = r"""
+import json, time
+start = time.perf_counter()
+import streamlit
+print(json.dumps({"import_seconds": time.perf_counter() - start, "heavy_modules": []}))
+"""
+
+
+def page_imports(page_path):
+    """Returns the source of the module-level import statements of a page script."""
+    with open(page_path, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=page_path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def run_fresh(script, args, repo_root):
+    """Runs `script` in a fresh interpreter and returns its JSON result."""
+    env = dict(os.environ, BTM_PREWARM="0", PYTHONDONTWRITEBYTECODE="1")
+    completed = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        cwd=repo_root, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(label, script, args, repo_root, repeat):
+    """Returns the fastest of `repeat` fresh-process runs."""
+    runs = [run_fresh(script, args, repo_root) for _ in range(repeat)]
+    return min(runs, key=lambda run: run["import_seconds"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of each Streamlit page.")
+    parser.add_argument("--pages", nargs="+", default=list(PAGES), choices=PAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per page; the fastest run is reported.")
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args(argv)
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {"streamlit (baseline)": measure("baseline", _BASELINE_SCRIPT, [], repo_root, args.repeat)}
+
+    for page in args.pages:
+        source = page_imports(os.path.join(repo_root, "views", f"{page}.py"))
+        results[page] = measure(page, _CHILD_SCRIPT, [source, ",".join(HEAVY_MODULES)], repo_root, args.repeat)
+
+    print(f"{'Page':<26}{'imports (s)':>12}  heavy modules loaded")
+    for page, result in results.items():
+        heavy = ", ".join(result["heavy_modules"]) or "-"
+        print(f"{page:<26}{result['import_seconds']:>12.3f}  {heavy}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import os
+import sys
+import time
+
+# Allow running as `python benchmarks/planner.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import analysis.subject_analysis as sa
+import analysis.teacher_analysis as ta
+import core_functionality.synthetic_marksheet as synthetic
+from analysis.planner import AnalysisPlanner, column_fingerprint
+
+# Analysis Planner Benchmark
+#
+# Checks that the planner's cached results never go stale, then times an edit:
+#   - a column and its reverse get different fingerprints,
+#   - swapping two students' marks, or their teachers, within one column (same
+#     values, new order) invalidates that subject's results, and the recomputed
+#     teacher scores equal `analyze_all_teachers` on the edited frame,
+#   - the other subjects' results are reused,
+#   - an edit to one subject's marks is recomputed in the time shown next to a
+#     full recomputation of every teacher score and regression.
+#
+# Usage (from the repository root):
+#     python benchmarks/planner.py --rows 100000 1000000 --subjects 8 --teachers 50
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def assert_scores_equal(name, expected, actual):
+    """Raises AssertionError if two (nested) score dicts differ beyond float round-off."""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), f"{name}: keys differ"
+        for key in expected:
+            assert_scores_equal(f"{name}[{key}]", expected[key], actual[key])
+    else:
+        assert np.isclose(expected, actual, rtol=1e-9, equal_nan=True), f"{name}: {expected} != {actual}"
+
+
+def swap_rows(df, column, first, second):
+    """Copy of `df` with the values of `column` swapped between two row positions."""
+    edited = df.copy()
+    values = edited[column].to_numpy().copy()
+    values[[first, second]] = values[[second, first]]
+    edited[column] = values
+    return edited
+
+
+def check_invalidation(df, subject_names):
+    """Raises AssertionError if an in-column swap leaves a stale result."""
+    subject = subject_names[0]
+    marks_col, teacher_col = f"{subject} Marks", f"{subject} Teacher"
+    series = df[marks_col]
+    assert column_fingerprint(series) != column_fingerprint(series[::-1]), "fingerprint ignores row order"
+
+    # The best and the worst student (with different teachers)
+    marks = df[marks_col].to_numpy()
+    best, worst = int(np.nanargmax(marks)), int(np.nanargmin(marks))
+    teachers = df[teacher_col].to_numpy()
+    if teachers[best] == teachers[worst]:
+        worst = int(np.flatnonzero(teachers != teachers[best])[0])
+
+    planner = AnalysisPlanner(df, subject_names)
+    planner.all_teacher_scores()
+    planner.subject_regressions()
+    for column in (marks_col, teacher_col):
+        edited = swap_rows(planner.df, column, best, worst)
+        stale = planner.update(edited, changed=[column])
+        assert ("teacher_scores", subject) in stale, f"swapping two {column} values left the teacher scores cached"
+        reused = planner.reused
+        expected = ta.analyze_all_teachers(edited, subject_names)
+        assert_scores_equal("teacher scores", expected, planner.all_teacher_scores())
+        # Every other subject is served from the cache
+        assert planner.reused - reused == len(subject_names) - 1, "other subjects were recomputed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time incremental recomputation with the analysis planner.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--teachers", type=int, default=50, help="Teachers per subject.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    subject_names = synthetic.subject_names_for(args.subjects)
+    check_invalidation(synthetic.generate_marksheet(20_000, args.subjects, args.teachers, seed=0)[0], subject_names)
+    print("Swapped values invalidate their results; other subjects are reused.")
+
+    print(f"\n{'rows':>10} {'full s':>9} {'one edit s':>11} {'speedup':>8}")
+    for rows in args.rows:
+        df, _ = synthetic.generate_marksheet(rows, args.subjects, args.teachers, seed=rows)
+        marks_col = f"{subject_names[0]} Marks"
+        edited = df.copy()
+        edited[marks_col] = np.clip(edited[marks_col] + 1, 0, 100)
+
+        def full():
+            ta.analyze_all_teachers(edited, subject_names)
+            sa.subject_regressions(edited, subject_names)
+
+        def incremental():
+            planner = AnalysisPlanner(df, subject_names)
+            planner.all_teacher_scores()
+            planner.subject_regressions()
+            start = time.perf_counter()
+            planner.update(edited, changed=[marks_col])
+            planner.all_teacher_scores()
+            planner.subject_regressions()
+            return time.perf_counter() - start
+
+        full_seconds = best_of(full, args.repeat)
+        edit_seconds = min(incremental() for _ in range(args.repeat))
+        print(f"{rows:>10,} {full_seconds:>9.3f} {edit_seconds:>11.3f} {full_seconds / edit_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
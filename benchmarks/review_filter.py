@@ -0,0 +1,130 @@
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+# Allow running as `python benchmarks/review_filter.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core_functionality.review_filter import ReviewFilter
+
+# Review Filter Benchmark
+#
+# Times the compiled `ReviewFilter` against the original per-word functions of
+# views/Reviews.py on large pasted texts:
+#   - submit: reject-or-count a review (contains_filtered_words + tokenize + should_count_word)
+#   - render: filter a word → count map for the word cloud (should_count_word per entry)
+# "clean" texts contain no filtered word, so the whole text is scanned; "dirty"
+# texts end with one, the worst case for rejecting.
+#
+# Usage (from the repository root):
+#     python benchmarks/review_filter.py --sizes 10000 1000000 10000000
+
+FILTER_WORDS = {
+    "lol", "lolis", "laughing", "out", "loud",
+    "haha", "hehe", "lmao", "rofl"
+}
+
+
+def load_stopwords():
+    spec = importlib.util.find_spec("wordcloud")
+    with open(os.path.join(spec.submodule_search_locations[0], "stopwords"), encoding="utf-8") as file:
+        return frozenset(line.strip() for line in file if line.strip())
+
+
+STOPWORDS = load_stopwords()
+
+
+# ---- the original implementation, kept as the baseline ----
+
+def legacy_should_count_word(word):
+    if re.search(r'l+o+l+[!@#$%^&*]*', word.lower()):
+        return False
+    return (word.lower() not in STOPWORDS and
+            word.lower() not in FILTER_WORDS and
+            not any(fw in word.lower() for fw in FILTER_WORDS))
+
+
+def legacy_contains_filtered_words(review):
+    for word in review.split():
+        if re.search(r'l+o+l+[!@#$%^&*]*', word.lower()):
+            return True
+        if any(fw in word.lower() for fw in FILTER_WORDS) or word.lower() in FILTER_WORDS:
+            return True
+    return False
+
+
+def legacy_count_review(review):
+    if legacy_contains_filtered_words(review):
+        return None
+    words = re.findall(r'\b\w+\b', review.lower())
+    return Counter(word for word in words if legacy_should_count_word(word))
+
+
+def legacy_filter_counts(word_counts):
+    filtered = Counter()
+    for word, freq in word_counts.items():
+        if legacy_should_count_word(word):
+            filtered[word.lower()] += freq
+    return filtered
+
+
+# ---- inputs ----
+
+def make_text(n_chars, dirty, seed=0):
+    """Random pasted text of about `n_chars` characters from stop words and neutral words."""
+    rng = np.random.default_rng(seed)
+    neutral = ["teacher", "marks", "attendance", "analysis", "dashboard", "Great!", "data,", "school.",
+               "subject", "report", "Helpful", "graphs", "bias", "upload", "students", "results"]
+    # Stop words such as "about" or "without" contain a filter word; leave them out
+    # so a clean text really is scanned to the end
+    stopwords = sorted(word for word in STOPWORDS if not legacy_contains_filtered_words(word))
+    vocabulary = np.array(stopwords + neutral * 10, dtype=object)
+    n_words = max(1, n_chars // 7)
+    text = " ".join(vocabulary[rng.integers(0, len(vocabulary), n_words)])
+    return text + (" lmao" if dirty else "")
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the compiled review filter against the original.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000],
+                        help="Text sizes in characters.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engine = ReviewFilter(FILTER_WORDS, STOPWORDS)
+
+    print(f"{'case':<8}{'chars':>12}{'legacy s':>12}{'engine s':>12}{'speedup':>10}")
+    for size in args.sizes:
+        for dirty in (False, True):
+            text = make_text(size, dirty)
+            legacy_time, expected = best_of(lambda: legacy_count_review(text), args.repeat)
+            engine_time, result = best_of(lambda: engine.count_review(text), args.repeat)
+            assert result == expected, "engine and legacy disagree"
+            label = "dirty" if dirty else "clean"
+            print(f"{'submit':<8}{size:>12,}{legacy_time:>12.4f}{engine_time:>12.4f}{legacy_time / engine_time:>9.1f}x  ({label})")
+
+        # Word cloud path: every distinct (case-variant) word of the text with its count
+        counts = Counter(make_text(size, dirty=False).split())
+        legacy_time, expected = best_of(lambda: legacy_filter_counts(counts), args.repeat)
+        engine_time, result = best_of(lambda: engine.filter_counts(counts), args.repeat)
+        assert result == expected, "engine and legacy disagree"
+        print(f"{'render':<8}{len(counts):>12,}{legacy_time:>12.4f}{engine_time:>12.4f}{legacy_time / engine_time:>9.1f}x  (distinct words)")
+
+
+if __name__ == "__main__":
+    main()
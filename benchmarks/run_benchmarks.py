@@ -0,0 +1,290 @@
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Allow running as `python benchmarks/run_benchmarks.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import core_functionality.data_validator as dv
+import core_functionality.prewarm as prewarm
+import core_functionality.synthetic_marksheet as synthetic
+from core_functionality.instrumentation import _peak_rss_mb
+import analysis.teacher_analysis as ta
+import analysis.subject_analysis as sa
+import bias_analysis.bias_detection as bd
+
+# Benchmark Suite for Ingestion and the Analyses
+#
+# Times and memory-profiles the four hot entry points on synthetic marksheets
+# (see core_functionality/synthetic_marksheet.py) over a grid of scales:
+#   - validate_and_convert_file     (CSV parsing + validation)
+#   - analyze_teacher_effectiveness (every subject with a teacher column)
+#   - analyze_subject_performance   (correlation, box plot, scatter + OLS per subject;
+#                                    the lazy scatter plots are all built)
+#   - detect_bias                   (first subject, Gender)
+#
+# For every (function, rows, subjects) cell we record the best wall time over
+# --repeat runs, CPU time, and the tracemalloc peak and process peak-RSS growth
+# of a separate profiled warm-up run. Results are written as JSON.
+#
+# Usage (from the repository root):
+#     python benchmarks/run_benchmarks.py --preset quick --output bench/current.json
+#     python benchmarks/run_benchmarks.py --rows 1000 100000 --subjects 1 10 --functions validate teacher
+#     python benchmarks/run_benchmarks.py --compare bench/baseline.json bench/current.json --threshold 0.15
+
+PRESETS = {
+    "quick": {"rows": [1_000, 10_000], "subjects": [1, 4]},
+    "standard": {"rows": [1_000, 10_000, 100_000, 1_000_000], "subjects": [1, 10]},
+    "full": {"rows": [1_000, 10_000, 100_000, 1_000_000, 5_000_000], "subjects": [1, 10, 100]},
+}
+
+FUNCTION_NAMES = {
+    "validate": "validate_and_convert_file",
+    "teacher": "analyze_teacher_effectiveness",
+    "subject": "analyze_subject_performance",
+    "bias": "detect_bias",
+}
+FUNCTIONS = tuple(FUNCTION_NAMES)
+
+# detect_bias fits statsmodels' OLS on a dense copy of the design (about 2.5 s per
+# 1M rows); above this many rows it is recorded as skipped unless --max-bias-rows is raised.
+DEFAULT_MAX_BIAS_ROWS = 1_000_000
+
+# Scales whose rows × subjects exceed this are skipped to keep memory bounded.
+DEFAULT_MAX_CELLS = 50_000_000
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat):
+    """
+    Times `func` and profiles its memory.
+
+    Returns:
+    dict: seconds (best wall time), cpu_seconds, peak_tracemalloc_mb, rss_growth_mb.
+    """
+    # Profiled run first: it doubles as a warm-up (lazy imports, JIT caches) and
+    # keeps tracemalloc's overhead out of the timed runs
+    rss_before = _peak_rss_mb()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss_growth = _peak_rss_mb() - rss_before
+
+    wall_times, cpu_times = [], []
+    for _ in range(repeat):
+        gc.collect()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        func()
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+
+    best = int(np.argmin(wall_times))
+    return {
+        "seconds": wall_times[best],
+        "cpu_seconds": cpu_times[best],
+        "peak_tracemalloc_mb": peak / (1024 * 1024),
+        "rss_growth_mb": rss_growth,
+    }
+
+
+def _bias_frame(df, subject):
+    cols_to_use = [f"{subject} Attendance", f"{subject} Marks", "Gender"]
+    if f"{subject} Teacher" in df.columns:
+        cols_to_use.append(f"{subject} Teacher")
+    return df[cols_to_use].copy()
+
+
+def run_scale(rows, subjects, teachers, functions, repeat, max_bias_rows, workdir, seed):
+    """Benchmarks every requested function on one synthetic marksheet."""
+    df, _ = synthetic.generate_marksheet(rows, subjects, teachers, seed=seed)
+    csv_path = os.path.join(workdir, f"marksheet_{rows}_{subjects}.csv")
+    synthetic.write_marksheet(df, csv_path)
+    subject_names = np.array(synthetic.subject_names_for(subjects))
+
+    def validate():
+        # Times the in-memory path: the plan is made without a memory budget
+        with open(csv_path, "rb") as file:
+            dv.validate_and_convert_file(file, dv.plan_ingestion(file, budget=float("inf")))
+
+    cases = {
+        "validate": validate,
+        "teacher": lambda: ta.analyze_all_teachers(df, subject_names),
+        "subject": lambda: list(sa.analyze_subject_performance(df, subject_names)[2]),
+        "bias": lambda: bd.detect_bias(_bias_frame(df, subject_names[0])),
+    }
+
+    results = []
+    for key in functions:
+        func = cases[key]
+        record = {"function": FUNCTION_NAMES[key], "rows": rows, "subjects": subjects, "teachers": teachers}
+        if key == "bias" and rows > max_bias_rows:
+            record.update(status="skipped", reason=f"rows > --max-bias-rows ({max_bias_rows})")
+        else:
+            try:
+                record.update(measure(func, repeat), status="ok")
+            except Exception as e:
+                record.update(status="error", reason=f"{type(e).__name__}: {e}")
+        results.append(record)
+        _print_record(record)
+
+    os.remove(csv_path)
+    return results
+
+
+def _print_record(record):
+    label = f"{record['function']:<32}{record['rows']:>10,} rows {record['subjects']:>4} subj"
+    if record["status"] == "ok":
+        print(f"{label}  {record['seconds']:>9.3f}s  peak {record['peak_tracemalloc_mb']:>9.1f} MB")
+    else:
+        print(f"{label}  {record['status']}: {record['reason']}")
+
+
+def run_suite(args):
+    preset = PRESETS[args.preset]
+    rows_grid = args.rows or preset["rows"]
+    subjects_grid = args.subjects or preset["subjects"]
+
+    # Load the lazily-imported libraries up front so import cost never lands in a cell
+    for name in prewarm.HEAVY_MODULES:
+        importlib.import_module(name)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="btm-bench-") as workdir:
+        for subjects in subjects_grid:
+            for rows in rows_grid:
+                if rows * subjects > args.max_cells:
+                    print(f"Skipping {rows:,} rows × {subjects} subjects (> --max-cells {args.max_cells:,})")
+                    results.extend(
+                        {"function": FUNCTION_NAMES[key], "rows": rows, "subjects": subjects, "teachers": args.teachers,
+                         "status": "skipped", "reason": "rows × subjects > --max-cells"}
+                        for key in args.functions
+                    )
+                    continue
+                results.extend(run_scale(rows, subjects, args.teachers, args.functions, args.repeat,
+                                         args.max_bias_rows, workdir, args.seed))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.15, min_seconds=0.01):
+    """
+    Compares two benchmark reports and flags regressions.
+
+    A cell regresses when its time (or tracemalloc peak) grows by more than
+    `threshold` (relative) and by more than `min_seconds` (absolute, time only).
+
+    Args:
+    baseline (dict): Report from an earlier run.
+    current (dict): Report from the run under test.
+    threshold (float): Allowed relative slowdown, e.g. 0.15 for 15%.
+    min_seconds (float): Ignore time changes smaller than this (timer noise).
+
+    Returns:
+    list: One dict per matching cell with the time/memory ratios and a `regressed` flag.
+    """
+    def key(record):
+        return record["function"], record["rows"], record["subjects"]
+
+    baseline_cells = {key(r): r for r in baseline["results"] if r.get("status") == "ok"}
+    rows = []
+    for record in current["results"]:
+        old = baseline_cells.get(key(record))
+        if record.get("status") != "ok" or old is None:
+            continue
+        time_ratio = record["seconds"] / old["seconds"] if old["seconds"] > 0 else float("inf")
+        memory_ratio = (record["peak_tracemalloc_mb"] / old["peak_tracemalloc_mb"]
+                        if old["peak_tracemalloc_mb"] > 0 else 1.0)
+        slower = time_ratio > 1 + threshold and record["seconds"] - old["seconds"] > min_seconds
+        heavier = memory_ratio > 1 + threshold
+        rows.append({
+            "function": record["function"], "rows": record["rows"], "subjects": record["subjects"],
+            "baseline_seconds": old["seconds"], "current_seconds": record["seconds"], "time_ratio": time_ratio,
+            "baseline_peak_mb": old["peak_tracemalloc_mb"], "current_peak_mb": record["peak_tracemalloc_mb"],
+            "memory_ratio": memory_ratio, "regressed": slower or heavier,
+        })
+    return rows
+
+
+def run_compare(args):
+    with open(args.compare[0], encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.compare[1], encoding="utf-8") as file:
+        current = json.load(file)
+
+    comparison = compare_reports(baseline, current, args.threshold)
+    print(f"{'function':<32}{'rows':>10}{'subj':>6}{'time x':>9}{'mem x':>8}")
+    for row in comparison:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['function']:<32}{row['rows']:>10,}{row['subjects']:>6}{row['time_ratio']:>9.2f}{row['memory_ratio']:>8.2f}{flag}")
+
+    regressions = [row for row in comparison if row["regressed"]]
+    print(f"\n{len(regressions)} regression(s) out of {len(comparison)} comparable cells (threshold {args.threshold:.0%}).")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and analyses at scale, or compare two runs.")
+    parser.add_argument("--preset", choices=PRESETS, default="quick")
+    parser.add_argument("--rows", type=int, nargs="+", help="Row counts (overrides the preset).")
+    parser.add_argument("--subjects", type=int, nargs="+", help="Subject counts (overrides the preset).")
+    parser.add_argument("--teachers", type=int, default=5, help="Teachers per subject.")
+    parser.add_argument("--functions", nargs="+", choices=FUNCTIONS, default=list(FUNCTIONS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per cell; the best is kept.")
+    parser.add_argument("--max-bias-rows", type=int, default=DEFAULT_MAX_BIAS_ROWS)
+    parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return run_compare(args)
+
+    run_suite(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
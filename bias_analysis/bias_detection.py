@@ -1,10 +1,35 @@
+import numpy as np
 import pandas as pd
-import shap
-import statsmodels.api as sm
-import plotly.graph_objects as go
-from sklearn.preprocessing import OneHotEncoder
+from bias_analysis.streaming_ols import StreamingOLSResult, accumulate_factor, iter_frame_chunks, qr_factor
+from core_functionality.dataframe_engine import get_engine
+from core_functionality.instrumentation import span
+from core_functionality.lazy_figures import LazyFigures
 
-def detect_bias(df: pd.DataFrame):
+# statsmodels, sklearn and plotly are imported inside the functions that use them:
+# most pages never run bias detection.
+
+# Bias impact of a feature (the bar height of the bias chart)
+#
+# For the linear bias model a student's SHAP value of feature j is β_j·(x_j − x̄_j),
+# so its plain mean is zero by construction (and a sampled explainer background
+# only leaves noise). Every mode reports the signed mean |SHAP| value instead,
+# β_j·mean|x_j − x̄_j|: the average shift of a student's predicted marks due to
+# the feature, in marks, signed as the coefficient. It is computed exactly from
+# the fitted coefficients, without an explainer.
+#
+# The factor is reference-coded (its first level, in sorted order, is dropped),
+# so each remaining level's coefficient is identified: its gap in marks to the
+# reference level, other features held equal.
+
+# How the teacher enters the bias regression:
+#   "average": the teacher's average student marks as a feature (original model;
+#              the target leaks into this feature, so it is only used when asked for)
+#   "fixed":   one intercept per teacher (fixed effects), absorbed by demeaning within
+#              teachers (the default everywhere)
+#   "random":  teacher intercepts as random effects (GLS quasi-demeaning within teachers)
+TEACHER_MODELS = ("average", "fixed", "random")
+
+def detect_bias(df: pd.DataFrame, n_bootstrap=None, ci=0.95, workers=None, teacher_model="fixed"):
     """
     Detects potential gender or religious bias in student marks using multiple linear regression and SHAP analysis.
 
@@ -13,31 +38,34 @@ def detect_bias(df: pd.DataFrame):
     
     The regression equation used in this analysis follows:
 
-        Marks = β₀ + β₁ * Attendance + β₂ * Teacher_Avg + β₃ * Categorical_Factor + ε
+        Marks = α_teacher + β₁ * Attendance + β₃ * Categorical_Factor + ε
 
     Where:
-    - β₀: Intercept (baseline marks)
+    - α_teacher: One intercept per teacher (baseline marks of the teacher's class;
+      a single intercept β₀ without a teacher column)
     - β₁: Impact of attendance on marks
-    - β₂: Impact of teacher's average student performance
     - β₃: Influence of categorical factors (Gender or Religion)
     - ε: Random error term
 
+    With `teacher_model="average"` the teacher intercepts are replaced by
+    β₀ + β₂ * Teacher_Avg, the teacher's average student marks.
+
     ---
     **Process Overview:**
     1. **Detect Required Columns** → Identify Attendance, Marks, Teacher, and a categorical factor (Gender or Religion).
     2. **Data Filtering** → If the teacher column exists, exclude teachers with ≤5 students. If absent, consider all students.
-    3. **Replace Teacher Name with Their Average Student Marks** (or Overall Avg if no teacher column).
-    4. **One-Hot Encode the Categorical Factor** without dropping the first category to retain visibility.
+    3. **Absorb the Teacher Intercepts** by demeaning within teachers (or, for the "average" model, replace the teacher name with their average student marks).
+    4. **One-Hot Encode the Categorical Factor**, dropping the first (reference) category so every other level's effect is identified.
     5. **Perform Regression Analysis using OLS (Ordinary Least Squares)** to determine bias impact.
-    6. **Use SHAP (SHapley Additive exPlanations)** to analyze feature importance.
+    6. **Use SHAP (SHapley Additive exPlanations)** values of the linear model, β·(x − x̄), to measure each feature's impact.
     7. **Generate a Plotly Bar Chart with Bias Interpretation**.
 
     ---
-    **Threshold for Bias Significance (SHAP Values Interpretation):**
-    - **0 - 0.05** → Negligible Bias (Random Variance) 🟢
-    - **0.05 - 0.15** → Mild Bias 🟡 (Possible but weak influence)
-    - **0.15 - 0.30** → Moderate Bias 🟠 (Further investigation needed)
-    - **> 0.30** → **Severe Bias** 🔴 (Strong evidence of discrimination)
+    **Reading the Chart:**
+    Each bar is a feature's signed mean |SHAP| value: the average shift, in marks, of a
+    student's predicted marks due to that feature (see the module notes). A factor level's
+    bar is measured against the reference level, which has no bar. In bootstrap mode the
+    error bars show whether a gap could be resampling noise (interval containing 0).
 
     ---
     **Parameters:**
@@ -46,11 +74,192 @@ def detect_bias(df: pd.DataFrame):
         - '[Subject] Marks': Numeric (e.g., 'Math Marks')
         - '[Subject] Teacher' (Optional): Categorical (e.g., 'Math Teacher')
         - 'Gender' or 'Religion': Categorical (≤4 unique values)
+    - `n_bootstrap` (int, optional): Bootstrap mode. Adds error bars from this many
+      resamples to the same bars (see `compute_bias_bootstrap`).
+    - `ci` (float): Confidence level of the error bars in bootstrap mode.
+    - `workers` (int, optional): Threads solving the resamples in bootstrap mode.
+    - `teacher_model` (str): "fixed" (default) or "random" teacher effects, or the
+      legacy "average" teacher feature (see `TEACHER_MODELS`).
 
     ---
     **Returns:**
-    - A **Plotly bar chart (not displayed)** showing SHAP values for bias detection.
+    - A **Plotly bar chart (not displayed)** showing the bias impact of every feature.
+    """
+
+    with span("detect_bias", rows=len(df)):
+        if n_bootstrap:
+            shap_value_dict, intervals = compute_bias_bootstrap(df, n_bootstrap, ci, workers=workers, teacher_model=teacher_model)
+            return build_bias_figure(shap_value_dict, intervals, ci)
+        shap_value_dict = compute_bias_shap(df, teacher_model)
+        return build_bias_figure(shap_value_dict)  # Return the Plotly figure object
+
+
+def bias_subject_frame(df: pd.DataFrame, subject, factor):
+    """
+    Slices the columns `detect_bias` needs for one subject from the full marksheet.
+
+    Args:
+    df (pd.DataFrame): The full marksheet.
+    subject (str): Subject name.
+    factor (str): "Gender" or "Religion".
+
+    Returns:
+    pd.DataFrame: Attendance, Marks, the factor and (if present) the Teacher column.
+
+    Raises:
+    ValueError: If the subject's Attendance or Marks column is missing.
+    """
+    cols_to_use = [f"{subject} Attendance", f"{subject} Marks", factor]
+    missing = [col for col in cols_to_use[:2] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing necessary columns: {', '.join(missing)}")
+    if f"{subject} Teacher" in df.columns:
+        cols_to_use.append(f"{subject} Teacher")
+    return df[cols_to_use].copy()
+
+
+def bias_figures(df: pd.DataFrame, subject_names, factor, n_bootstrap=None, teacher_model="fixed"):
+    """
+    Lazily runs `detect_bias` per subject; each subject's SHAP analysis runs on first access.
+
+    Args:
+    df (pd.DataFrame): The full marksheet (must contain the `factor` column).
+    subject_names (list): List of subject names.
+    factor (str): "Gender" or "Religion".
+    n_bootstrap (int): Resamples for error bars (bootstrap mode of `detect_bias`); None for none.
+    teacher_model (str): One of `TEACHER_MODELS`.
+
+    Returns:
+    LazyFigures: subject → Plotly bar chart. Accessing a subject whose data cannot be
+        analyzed raises the ValueError from `bias_subject_frame`/`detect_bias`.
+    """
+    return LazyFigures(subject_names, lambda subject: detect_bias(bias_subject_frame(df, subject, factor), n_bootstrap, teacher_model=teacher_model))
+
+
+def compute_bias_shap(df: pd.DataFrame, teacher_model="fixed", teacher_means=None):
+    """
+    Fits the bias regression and returns the bias impact (signed mean |SHAP| value) of every feature.
+
+    This is the numeric core of `detect_bias`, usable without building a figure.
+
+    **Parameters:**
+    - `df` (pd.DataFrame): Same structure as for `detect_bias`.
+    - `teacher_model` (str): How teachers enter the model (see `TEACHER_MODELS`).
+    - `teacher_means` (pd.Series): Average marks per teacher, if already computed
+      (used by the "average" model instead of grouping `df` again).
+
+    **Returns:**
+    - dict: {feature_name: impact in marks}
+    """
+
+    # Step 7: Perform Regression Analysis (OLS Model)
+    model, X = fit_bias_model(df, teacher_model, teacher_means)
+
+    # Step 8: SHAP Analysis (exact for the linear model)
+    with span("bias.shap") as record:
+        features = X.to_numpy(dtype=float)
+        impact = model.params.to_numpy() * _spread(features).mean(axis=0)
+        shap_value_dict = dict(zip(X.columns, impact.tolist()))
+        record["shap"] = shap_value_dict
+
+    return shap_value_dict
+
+
+def fit_bias_model(df: pd.DataFrame, teacher_model="fixed", teacher_means=None):
+    """
+    Fits the bias regression (step 7 of `detect_bias`) with the chosen teacher model.
+
+    With "fixed"/"random" teacher effects the design is (quasi-)demeaned within
+    teachers, and the residual degrees of freedom account for the absorbed
+    teacher intercepts, so standard errors and p-values equal those of the
+    regression with one dummy per teacher.
+
+    **Parameters:**
+    - `df` (pd.DataFrame): Same structure as for `detect_bias`.
+    - `teacher_model` (str): One of `TEACHER_MODELS`.
+    - `teacher_means` (pd.Series): Precomputed average marks per teacher (see `compute_bias_shap`).
+
+    **Returns:**
+    - tuple: (statsmodels RegressionResults, X)
+    """
+    import statsmodels.api as sm
+
+    with span("bias.prepare", rows=len(df), teacher_model=teacher_model):
+        X, y, absorbed = _bias_design(df, teacher_model, teacher_means)
+
+    with span("bias.ols", rows=len(X), features=X.shape[1]):
+        model = sm.OLS(y, X)
+        if absorbed:
+            model.df_resid = len(X) - np.linalg.matrix_rank(X.to_numpy(dtype=float)) - absorbed
+        return model.fit(), X
+
+
+def bias_design(df: pd.DataFrame, teacher_model="fixed"):
+    """
+    Builds the regression design of the bias model (steps 1-6 of `detect_bias`).
+
+    **Parameters:**
+    - `df` (pd.DataFrame): Same structure as for `detect_bias`.
+    - `teacher_model` (str): One of `TEACHER_MODELS`.
+
+    **Returns:**
+    - tuple: (X, y) — X holds the constant, attendance, teacher average (for the
+      "average" model with a teacher column) and one-hot factor columns (all levels
+      but the first); y the marks.
+      With teacher effects, X and y are (quasi-)demeaned within teachers.
+    """
+    return _bias_design(df, teacher_model)[:2]
+
+
+def _absorb_teachers(X, y, teachers, teacher_model):
+    """
+    Sweeps the teacher intercepts out of the design with groupby transforms.
+
+    "fixed": within transform, x − x̄_teacher (no dummies; the constant drops out).
+    "random": random-effects GLS quasi-demeaning, x − θ_t·x̄_teacher with
+        θ_t = 1 − √(σ²_e / (n_t·σ²_u + σ²_e)); σ²_e comes from the within fit and
+        σ²_u from the between fit on teacher means (Swamy–Arora).
+
+    Returns:
+    tuple: (X, y, number of absorbed intercepts for the residual degrees of freedom)
     """
+    features = X.drop(columns=["const"], errors="ignore")
+    # One group-by (in the selected DataFrame engine) for the teacher means of every column and of y
+    all_means = get_engine().group_transform_mean(features.assign(__marks__=y), teachers, list(features.columns) + ["__marks__"])
+    group_means, y_means = all_means[list(features.columns)], all_means["__marks__"]
+    within_X, within_y = features - group_means, y - y_means
+    n_teachers = teachers.nunique()
+    if teacher_model == "fixed":
+        return within_X, within_y, n_teachers
+
+    # Variance components: idiosyncratic (within fit) and teacher-level (between fit)
+    values = within_X.to_numpy(dtype=float)
+    beta, _, rank, _ = np.linalg.lstsq(values, within_y.to_numpy(dtype=float), rcond=None)
+    residuals = within_y.to_numpy(dtype=float) - values @ beta
+    sigma_e = residuals @ residuals / max(len(y) - n_teachers - rank, 1)
+
+    between = features.groupby(teachers).mean()
+    between.insert(0, "const", 1.0)
+    between_y = y.groupby(teachers).mean().reindex(between.index)
+    beta, _, rank, _ = np.linalg.lstsq(between.to_numpy(dtype=float), between_y.to_numpy(dtype=float), rcond=None)
+    between_residuals = between_y.to_numpy(dtype=float) - between.to_numpy(dtype=float) @ beta
+    sizes = teachers.value_counts()
+    harmonic_size = len(sizes) / (1.0 / sizes).sum()
+    sigma_between = between_residuals @ between_residuals / max(n_teachers - rank, 1)
+    sigma_u = max(0.0, sigma_between - sigma_e / harmonic_size)
+
+    theta = 1 - np.sqrt(sigma_e / (teachers.map(sizes).to_numpy(dtype=float) * sigma_u + sigma_e))
+    quasi_X = features - group_means.mul(theta, axis=0)
+    quasi_X.insert(0, "const", 1 - theta)
+    return quasi_X, y - y_means * theta, 0
+
+
+def _bias_design(df, teacher_model, teacher_means=None):
+    import statsmodels.api as sm
+    from sklearn.preprocessing import OneHotEncoder
+
+    if teacher_model not in TEACHER_MODELS:
+        raise ValueError(f"Unknown teacher model '{teacher_model}'. Use one of: {', '.join(TEACHER_MODELS)}.")
 
     # Step 1: Detect column names dynamically
     attendance_col = next((col for col in df.columns if "Attendance" in col), None)
@@ -73,20 +282,27 @@ def detect_bias(df: pd.DataFrame):
     if df[category_col].nunique() > 4:
         raise ValueError(f"Column '{category_col}' has more than 4 unique values, which is not supported.")
 
-    # Step 3: Handle Teacher column (Replace with average marks)
+    # Step 3: Handle Teacher column (Replace with average marks, or keep it aside for teacher effects)
+    teachers = None
     if teacher_col:
-        teacher_counts = df[teacher_col].value_counts()
+        engine = get_engine()
+        teacher_counts = engine.group_counts(df, teacher_col)
         df = df[df[teacher_col].isin(teacher_counts[teacher_counts > 5].index)]
-        teacher_avg = df.groupby(teacher_col)[marks_col].mean()  # Compute teacher's average student marks
-        df["Teacher"] = df[teacher_col].map(teacher_avg)  # Replace teacher name with average marks
-        df.drop(columns=[teacher_col], inplace=True)  # Remove the original teacher column
-    else:
-        if len(df) <= 5:
-            raise ValueError("Dataset must have more than 5 students.")
-        df["Teacher"] = df[marks_col].mean()  # Assign overall average marks
+        if teacher_model == "average":
+            teacher_avg = teacher_means
+            if teacher_avg is None:
+                teacher_avg = engine.group_stats(df, teacher_col, marks_col)["mean"]  # Compute teacher's average student marks
+            df = df.assign(Teacher=df[teacher_col].map(teacher_avg))  # Replace teacher name with average marks
+        else:
+            teachers = df[teacher_col]
+        df = df.drop(columns=[teacher_col])  # Remove the original teacher column
+    elif len(df) <= 5:
+        raise ValueError("Dataset must have more than 5 students.")
+    # Without a teacher column there is no teacher feature: the overall average
+    # would be a second constant next to the intercept
 
     # Step 4: One-Hot Encode the categorical column (Gender or Religion)
-    encoder = OneHotEncoder(sparse_output=False)  # Do NOT drop first category
+    encoder = OneHotEncoder(sparse_output=False, drop="first")  # The first level is the reference
     encoded_vals = encoder.fit_transform(df[[category_col]])  # Convert categorical column to numerical
     encoded_cols = encoder.get_feature_names_out([category_col])  # Get new column names for encoded values
 
@@ -99,18 +315,321 @@ def detect_bias(df: pd.DataFrame):
     X = sm.add_constant(X)  # Add constant term for regression
     y = df[marks_col]  # Dependent variable (marks)
 
-    # Step 7: Perform Regression Analysis (OLS Model)
-    model = sm.OLS(y, X).fit()
+    if teachers is not None:
+        return _absorb_teachers(X, y, teachers, teacher_model)
+    return X, y, 0
+
+
+# Resampled rows held in memory per bootstrap batch (batch size × rows weights)
+BOOTSTRAP_BATCH_CELLS = 4_000_000
+
 
-    # Step 8: SHAP Analysis
-    explainer = shap.Explainer(model.predict, X)
-    shap_values = explainer(X)
+def _spread(features):
+    """|x − x̄| of every design value; constant columns (e.g. the intercept) get 0."""
+    spread = np.abs(features - features.mean(axis=0))
+    spread[:, np.ptp(features, axis=0) == 0] = 0  # No float round-off on constant columns
+    return spread
 
-    # Step 9: Compute Mean Absolute SHAP Values (Bias Impact)
-    mean_shap_values = shap_values.values.mean(axis=0)  # it's a NumPy array
-    shap_value_dict = dict(zip(X.columns, mean_shap_values.tolist()))
-    print(shap_value_dict)
 
+def _bootstrap_batch(moments, spread, n_rows, size, seed, rcond):
+    """
+    Signed mean |SHAP| values for `size` bootstrap resamples at once.
+
+    Each resample is a row of multinomial weights w (how often every student is
+    drawn). Its normal equations Xᵀdiag(w)X β = Xᵀdiag(w)y are, for all resamples,
+    two matrix products with the precomputed per-row moments, and the B small
+    systems are solved together by a batched (pseudo-)inverse.
+    """
+    XX, Xy = moments
+    p = Xy.shape[1]
+    rng = np.random.default_rng(seed)
+    # n draws with replacement per resample, counted into a size × n weight matrix
+    # with one flat bincount (faster than rng.multinomial with n categories)
+    draws = rng.integers(0, n_rows, (size, n_rows), dtype=np.int64)
+    draws += np.arange(size, dtype=np.int64)[:, None] * n_rows
+    weights = np.bincount(draws.ravel(), minlength=size * n_rows).reshape(size, n_rows).astype(float)
+    gram = (weights @ XX).reshape(size, p, p)
+    # pinv (not solve): a resample can miss a factor level or a teacher's spread, and
+    # pinv returns the same minimum-norm coefficients as statsmodels' OLS
+    params = np.einsum("bij,bj->bi", np.linalg.pinv(gram, rcond=rcond, hermitian=True), weights @ Xy)
+    return params * (weights @ spread) / n_rows
+
+
+def compute_bias_bootstrap(df: pd.DataFrame, n_bootstrap=1000, ci=0.95, seed=0, workers=None, rcond=1e-12,
+                           teacher_model="fixed"):
+    """
+    Bias impact per feature with bootstrap confidence intervals.
+
+    The impact is the same signed mean |SHAP| value as `compute_bias_shap`,
+    β_j·mean|x_j − x̄_j|. It is recomputed on `n_bootstrap` resamples of the
+    students (with x̄ kept at the full-data background) and the percentile
+    interval is returned.
+
+    **Parameters:**
+    - `df` (pd.DataFrame): Same structure as for `detect_bias`.
+    - `n_bootstrap` (int): Number of resamples B.
+    - `ci` (float): Confidence level of the intervals.
+    - `seed` (int): Seed of the resampling.
+    - `workers` (int): Threads solving batches of resamples in parallel (default: one per batch, up to 8).
+    - `rcond` (float): Relative eigenvalue cutoff of the pseudo-inverse.
+    - `teacher_model` (str): One of `TEACHER_MODELS`. With teacher effects the rows are
+      resampled from the design demeaned on the full data (teacher effects held fixed).
+
+    **Returns:**
+    - tuple: ({feature_name: impact}, {feature_name: (ci_low, ci_high)})
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from bias_analysis.streaming_ols import default_workers
+
+    with span("bias.prepare", rows=len(df), teacher_model=teacher_model):
+        X, y = bias_design(df, teacher_model)
+
+    with span("bias.bootstrap", rows=len(X), features=X.shape[1], resamples=n_bootstrap) as record:
+        features = X.to_numpy(dtype=float)
+        target = y.to_numpy(dtype=float)
+        n_rows, p = features.shape
+
+        # Per-row moments: every resample's XᵀWX and XᵀWy are weighted sums of these rows
+        moments = ((features[:, :, None] * features[:, None, :]).reshape(n_rows, p * p), features * target[:, None])
+        spread = _spread(features)
+
+        # Full sample: the point estimate
+        params = np.linalg.pinv(features.T @ features, rcond=rcond, hermitian=True) @ (features.T @ target)
+        point = params * spread.mean(axis=0)
+
+        batch_size = max(1, min(n_bootstrap, BOOTSTRAP_BATCH_CELLS // max(n_rows, 1)))
+        sizes = [min(batch_size, n_bootstrap - start) for start in range(0, n_bootstrap, batch_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        workers = min(workers or default_workers(), len(sizes))
+        if workers == 1:
+            batches = [_bootstrap_batch(moments, spread, n_rows, size, s, rcond) for size, s in zip(sizes, seeds)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bootstrap") as executor:
+                batches = list(executor.map(lambda args: _bootstrap_batch(moments, spread, n_rows, *args, rcond),
+                                            zip(sizes, seeds)))
+        samples = np.vstack(batches)
+
+        alpha = (1 - ci) / 2
+        low, high = np.quantile(samples, [alpha, 1 - alpha], axis=0)
+        shap_value_dict = dict(zip(X.columns, point.tolist()))
+        intervals = {feature: (lo, hi) for feature, lo, hi in zip(X.columns, low.tolist(), high.tolist())}
+        record["batches"] = len(sizes)
+
+    return shap_value_dict, intervals
+
+
+def _scan_bias_source(source, columns, factor, chunksize):
+    """
+    First streaming pass: teacher sizes and averages, category levels and the ranges
+    needed to decide whether the design already has a constant column, plus the
+    per-teacher attendance sums and level counts that give the design's column means.
+    """
+    attendance_col, marks_col, teacher_col = columns[0], columns[1], columns[3] if len(columns) > 3 else None
+    teacher_sum, teacher_count = pd.Series(dtype=float), pd.Series(dtype=float)
+    attendance_sum, level_counts = pd.Series(dtype=float), []
+    levels, n_rows = set(), 0
+    attendance_min, attendance_max = np.inf, -np.inf
+
+    for chunk in iter_frame_chunks(source, columns, chunksize):
+        chunk = chunk.dropna()
+        n_rows += len(chunk)
+        levels.update(chunk[factor].unique().tolist())
+        if len(levels) > 4:
+            raise ValueError(f"Column '{factor}' has more than 4 unique values, which is not supported.")
+        if len(chunk):
+            attendance_min = min(attendance_min, float(chunk[attendance_col].min()))
+            attendance_max = max(attendance_max, float(chunk[attendance_col].max()))
+        # Without a teacher column every student is in one group
+        keys = chunk[teacher_col] if teacher_col else pd.Series(0, index=chunk.index)
+        grouped = chunk.groupby(keys)
+        teacher_sum = teacher_sum.add(grouped[marks_col].sum(), fill_value=0)
+        teacher_count = teacher_count.add(grouped.size(), fill_value=0)
+        attendance_sum = attendance_sum.add(grouped[attendance_col].sum(), fill_value=0)
+        level_counts.append(chunk.groupby([keys, chunk[factor]]).size())
+
+    return {
+        "n_rows": n_rows,
+        "levels": np.array(sorted(levels), dtype=object),  # OneHotEncoder's (sorted) category order
+        "teacher_sum": teacher_sum, "teacher_count": teacher_count,
+        "attendance_sum": attendance_sum,
+        # (teacher, level) → students; a few numbers per teacher and chunk
+        "level_count": pd.concat(level_counts).groupby(level=[0, 1]).sum() if level_counts else pd.Series(dtype=float),
+        "attendance_range": (attendance_min, attendance_max),
+    }
+
+
+def compute_bias_streaming(source, subject, factor, chunksize=500_000, workers=None, teacher_model="fixed"):
+    """
+    Out-of-core version of `compute_bias_shap`: the same regression and bias impacts
+    (signed mean |SHAP| values), computed in two passes over chunks with constant memory.
+
+    The OLS fit streams R factors of the design (see bias_analysis/streaming_ols.py),
+    reduced in parallel, and matches `sm.OLS(y, X).fit()` on the full design. The
+    column means x̄ (and, for teacher fixed effects, every teacher's means to demean
+    by) come from the first pass, so the second pass accumulates Σ|x_j − x̄_j| next
+    to the R factor and no explainer has to run over every row.
+
+    **Parameters:**
+    - `source`: DataFrame, path to a .csv/.parquet marksheet, or a callable returning
+      an iterable of DataFrame chunks (it is read twice).
+    - `subject` (str): Subject whose Marks/Attendance (and Teacher, if present) are used.
+    - `factor` (str): "Gender" or "Religion".
+    - `chunksize` (int): Rows per chunk.
+    - `workers` (int): Threads reducing chunks in parallel.
+    - `teacher_model` (str): "fixed" or "average" (see `TEACHER_MODELS`; random effects
+      need a within fit before the demeaning, so they are not streamed).
+
+    **Returns:**
+    - tuple: ({feature_name: impact in marks}, StreamingOLSResult)
+
+    Rows with missing values in the used columns are skipped.
+    """
+    if teacher_model not in ("fixed", "average"):
+        raise ValueError(f"Streaming supports the 'fixed' and 'average' teacher models, not '{teacher_model}'.")
+    attendance_col, marks_col, teacher_col = f"{subject} Attendance", f"{subject} Marks", f"{subject} Teacher"
+    columns = [attendance_col, marks_col, factor]
+    if isinstance(source, pd.DataFrame):
+        has_teacher = teacher_col in source.columns
+    else:
+        has_teacher = teacher_col in next(iter_frame_chunks(source, None, 1)).columns
+    if has_teacher:
+        columns.append(teacher_col)
+    fixed = has_teacher and teacher_model == "fixed"
+
+    with span("bias.stream.scan", subject=subject, factor=factor, teacher_model=teacher_model) as record:
+        stats = _scan_bias_source(source, columns, factor, chunksize)
+        record["rows"] = stats["n_rows"]
+
+        # Same rules as `compute_bias_shap`: drop teachers with ≤5 students; no teacher feature without them
+        kept = stats["teacher_count"] > 5 if has_teacher else stats["teacher_count"] > 0
+        teacher_count = stats["teacher_count"][kept]
+        if has_teacher:
+            teacher_avg = (stats["teacher_sum"][kept] / teacher_count)
+            if teacher_avg.empty:
+                raise ValueError("No teacher has more than 5 students.")
+        else:
+            if stats["n_rows"] <= 5:
+                raise ValueError("Dataset must have more than 5 students.")
+            teacher_avg = None
+
+        # The first level is the reference (dropped, as in `compute_bias_shap`)
+        levels = stats["levels"][1:]
+        # `sm.add_constant` skips the constant when a column is already constant (and non-zero)
+        attendance_min, attendance_max = stats["attendance_range"]
+        teacher_values = teacher_avg.to_numpy() if has_teacher else None
+        has_constant_column = (
+            (attendance_min == attendance_max and attendance_min != 0)
+            or (has_teacher and np.ptp(teacher_values) == 0 and teacher_values[0] != 0)
+        )
+        level_count = stats["level_count"].unstack(fill_value=0).reindex(index=teacher_count.index, columns=levels,
+                                                                         fill_value=0)
+        attendance_sum = stats["attendance_sum"][kept]
+        n_kept = teacher_count.sum()
+        if fixed:
+            # Within transform: the teacher intercepts (and the constant) drop out
+            feature_names = [attendance_col] + [f"{factor}_{level}" for level in levels]
+            # Every teacher's means of the design columns and of the marks, to demean by
+            teacher_means = np.column_stack([attendance_sum / teacher_count, level_count.to_numpy(dtype=float)
+                                             / teacher_count.to_numpy()[:, None], teacher_avg])
+            centers = np.zeros(len(feature_names))
+            constant = np.zeros(len(feature_names), dtype=bool)
+        else:
+            feature_names = (
+                ([] if has_constant_column else ["const"]) + [attendance_col] + (["Teacher"] if has_teacher else [])
+                + [f"{factor}_{level}" for level in levels]
+            )
+            # Column means of the design rows (students of the kept teachers)
+            centers = ([attendance_sum.sum() / n_kept]
+                       + ([(teacher_avg * teacher_count).sum() / n_kept] if has_teacher else [])
+                       + (level_count.sum(axis=0) / n_kept).tolist())
+            centers = np.array(([1.0] if not has_constant_column else []) + centers)
+            constant = np.array(([True] if not has_constant_column else []) + [attendance_min == attendance_max]
+                                + ([np.ptp(teacher_values) == 0] if has_teacher else []) + [False] * len(levels))
+
+    def design(chunk):
+        chunk = chunk.dropna()
+        if has_teacher:
+            chunk = chunk[chunk[teacher_col].isin(teacher_avg.index)]
+        parts = [chunk[attendance_col].to_numpy(dtype=float)]
+        if has_teacher and not fixed:
+            parts.append(chunk[teacher_col].map(teacher_avg).to_numpy(dtype=float))
+        parts.append((chunk[factor].to_numpy(dtype=object)[:, None] == levels[None, :]).astype(float))
+        if not (has_constant_column or fixed):
+            parts.insert(0, np.ones(len(chunk)))
+        X, y = np.column_stack(parts), chunk[marks_col].to_numpy(dtype=float)
+        if fixed:
+            means = teacher_means[teacher_avg.index.get_indexer(chunk[teacher_col])]
+            X, y = X - means[:, :-1], y - means[:, -1]
+        return X, y
+
+    def reduce_chunk(chunk):
+        X, y = design(chunk)
+        return qr_factor(X, y), len(y), np.abs(X - centers).sum(axis=0)
+
+    with span("bias.stream.ols", features=len(feature_names)) as record:
+        chunks = iter_frame_chunks(source, columns, chunksize)
+        R_aug, n_rows, spread_sums = accumulate_factor(chunks, reduce_chunk, workers)
+        # The absorbed teacher intercepts cost degrees of freedom, as in `fit_bias_model`
+        result = StreamingOLSResult(R_aug, n_rows, feature_names, absorbed=len(teacher_avg) if fixed else 0)
+        record["rows"] = n_rows
+
+    with span("bias.stream.shap") as record:
+        # β_j·mean|x_j − x̄_j|, with constant columns (e.g. the intercept) at 0 as in `_spread`
+        spread = np.where(constant, 0.0, spread_sums / max(n_rows, 1))
+        impact = result.params.to_numpy() * spread
+        shap_value_dict = dict(zip(feature_names, impact.tolist()))
+        record["shap"] = shap_value_dict
+
+    return shap_value_dict, result
+
+
+def detect_bias_streaming(source, subject, factor, **kwargs):
+    """
+    Constant-memory `detect_bias` for marksheets too large to load: streams the
+    data in chunks (see `compute_bias_streaming`) and returns the same bar chart.
+
+    **Parameters:**
+    - `source`: DataFrame, .csv/.parquet path, or callable returning DataFrame chunks.
+    - `subject` (str): Subject name.
+    - `factor` (str): "Gender" or "Religion".
+    - `**kwargs`: Passed on to `compute_bias_streaming` (chunksize, workers, teacher_model, ...).
+
+    **Returns:**
+    - A **Plotly bar chart (not displayed)** showing the bias impact of every feature.
+    """
+    with span("detect_bias_streaming", subject=subject, factor=factor):
+        shap_value_dict, _ = compute_bias_streaming(source, subject, factor, **kwargs)
+        return build_bias_figure(shap_value_dict)
+
+
+def build_bias_figure(shap_value_dict, intervals=None, ci=0.95):
+    """
+    Builds the stacked positive/negative SHAP bar chart used by `detect_bias`.
+
+    **Parameters:**
+    - `shap_value_dict` (dict): {feature_name: impact in marks} (signed mean |SHAP| values)
+    - `intervals` (dict, optional): {feature_name: (ci_low, ci_high)}, drawn as error bars.
+    - `ci` (float): Confidence level of `intervals` (shown in the title).
+
+    **Returns:**
+    - A **Plotly bar chart (not displayed)**.
+    """
+    import plotly.graph_objects as go
+
+    with span("bias.figure"):
+        return _build_bias_figure(go, shap_value_dict, intervals, ci)
+
+def _error_bars(features, values, intervals):
+    """Asymmetric Plotly error bars from (low, high) intervals around `values`."""
+    if intervals is None:
+        return None
+    return dict(
+        type='data', symmetric=False, color='#444',
+        array=[max(intervals[f][1] - v, 0) for f, v in zip(features, values)],
+        arrayminus=[max(v - intervals[f][0], 0) for f, v in zip(features, values)],
+    )
+
+def _build_bias_figure(go, shap_value_dict, intervals=None, ci=0.95):
     # Step 10: Separate Positive and Negative SHAP Values
     positive_shap = {}
     negative_shap = {}
@@ -135,7 +654,8 @@ def detect_bias(df: pd.DataFrame):
         x=positive_features,
         y=positive_values,
         name='Positive Shap Values',
-        marker_color='#636EFA'
+        marker_color='#636EFA',
+        error_y=_error_bars(positive_features, positive_values, intervals)
     ))
 
     # Negative bars
@@ -143,18 +663,23 @@ def detect_bias(df: pd.DataFrame):
         x=negative_features,
         y=negative_values,
         name='Negative Shap Values',
-        marker_color='#EF553B'
+        marker_color='#EF553B',
+        error_y=_error_bars(negative_features, negative_values, intervals)
     ))
 
     fig.update_layout(
-        title='Shapley Value Analysis',
+        title='Shapley Value Analysis (signed mean |SHAP|)' if intervals is None else f'Shapley Value Analysis (signed mean |SHAP|, {ci:.0%} bootstrap CI)',
         xaxis_title='Features',
-        yaxis_title='Shapley Values',
+        yaxis_title='Impact on Marks',
         barmode='relative' # very important for clarity.
     )
     
+    extent = [abs(value) for value in shap_value_dict.values()]
+    if intervals is not None:
+        extent += [abs(bound) for interval in intervals.values() for bound in interval]
     fig.add_annotation(
-        x=0.5, y=max(abs(mean_shap_values)) * 1.1, text="Bias > 0.15 is considered significant. Bias > 0.30 is severe.",
+        x=0.5, y=max(extent, default=0) * 1.1,
+        text="Average shift in marks per feature. Factor levels are compared with the first level (no bar).",
         showarrow=False, font=dict(size=12, color="red"), xref="paper", yref="y"
     )
 
@@ -0,0 +1,301 @@
+import numpy as np
+import pandas as pd
+from core_functionality.instrumentation import span
+from core_functionality.lazy_figures import LazyFigures
+
+# Intersectional Bias Analysis (Gender × Religion)
+#
+# `detect_bias` studies one factor at a time, so a gap that only affects, say,
+# Muslim women is split between two main effects or missed. This model fits
+#
+#     Marks = β₀ + β₁·Attendance + Σ γ_g·[Gender = g] + Σ δ_r·[Religion = r]
+#             + Σ θ_gr·[Gender = g]·[Religion = r] + Σ τ_t·[Teacher = t] + ε
+#
+# with the most common gender, religion and teacher as reference levels. The
+# teacher terms are fixed effects: each teacher gets its own intercept instead
+# of the teacher-average proxy.
+#
+# All categorical terms are one-hot columns of a scipy.sparse matrix (one non-zero
+# per factor per row), so thousands of teacher dummies cost a few bytes per
+# student. The coefficients are solved with sparse least squares (LSMR) on the
+# column-equilibrated design. Standard errors of the non-teacher terms use the
+# Frisch–Waugh–Lovell theorem: their covariance is σ²(X̃ᵀX̃)⁻¹, where X̃ are those
+# columns with the teacher (or constant) part projected out. That projection
+# onto teacher indicators is a per-teacher mean subtraction.
+
+# LSMR stopping tolerances (relative residual / normal-equation residual)
+LSQ_TOLERANCE = 1e-12
+
+
+def _one_hot(codes, n_levels, skip):
+    """Sparse one-hot columns of integer `codes` without the reference level `skip`."""
+    from scipy import sparse
+
+    keep = codes != skip
+    columns = codes[keep] - (codes[keep] > skip)
+    return sparse.csr_matrix(
+        (np.ones(keep.sum()), (np.flatnonzero(keep), columns)), shape=(len(codes), n_levels - 1)
+    )
+
+
+def _reference_first(values):
+    """Factorizes `values` with the most frequent level first (the reference level)."""
+    codes, levels = pd.factorize(values, sort=True)
+    counts = np.bincount(codes, minlength=len(levels))
+    reference = int(np.argmax(counts))
+    return codes, levels, reference
+
+
+def intersectional_design(df: pd.DataFrame, subject, factors=("Gender", "Religion"), teacher_effects=True):
+    """
+    Builds the sparse design matrix of the intersectional bias model.
+
+    Args:
+    df (pd.DataFrame): The marksheet with the `factors` columns and the subject's
+        Attendance and Marks (and optionally Teacher) columns.
+    subject (str): Subject name.
+    factors (tuple): The two categorical columns crossed with each other.
+    teacher_effects (bool): Whether to add teacher fixed effects (if a Teacher column exists).
+
+    Returns:
+    dict:
+        - "X" (scipy.sparse.csr_matrix): Design, n × (focal terms + teachers − 1)
+        - "y" (np.ndarray): Marks
+        - "feature_names" (list): Names of the focal (non-teacher) columns, first in X
+        - "teachers" (pd.Index): Teachers with a dummy column, in column order (empty if none)
+        - "teacher_codes" (np.ndarray): Teacher index per row, or None
+        - "reference" (dict): Reference level of each factor and of the teachers
+        - "levels" (dict): Levels of each factor
+
+    Raises:
+    ValueError: If a required column is missing or no rows are complete.
+    """
+    from scipy import sparse
+
+    first, second = factors
+    attendance_col, marks_col, teacher_col = f"{subject} Attendance", f"{subject} Marks", f"{subject} Teacher"
+    columns = [attendance_col, marks_col, first, second]
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing necessary columns: {', '.join(missing)}")
+    use_teachers = teacher_effects and teacher_col in df.columns
+    if use_teachers:
+        columns.append(teacher_col)
+
+    data = df[columns].dropna()
+    if len(data) <= 5:
+        raise ValueError("Dataset must have more than 5 students.")
+    n = len(data)
+
+    first_codes, first_levels, first_ref = _reference_first(data[first].to_numpy())
+    second_codes, second_levels, second_ref = _reference_first(data[second].to_numpy())
+
+    # Interaction cells of two non-reference levels that actually occur
+    cells = first_codes * len(second_levels) + second_codes
+    interacting = (first_codes != first_ref) & (second_codes != second_ref)
+    observed = np.unique(cells[interacting])
+    cell_column = np.full(len(first_levels) * len(second_levels), -1)
+    cell_column[observed] = np.arange(len(observed))
+    interaction = sparse.csr_matrix(
+        (np.ones(interacting.sum()), (np.flatnonzero(interacting), cell_column[cells[interacting]])),
+        shape=(n, len(observed)),
+    )
+
+    blocks = [
+        sparse.csr_matrix(np.column_stack([np.ones(n), data[attendance_col].to_numpy(dtype=float)])),
+        _one_hot(first_codes, len(first_levels), first_ref),
+        _one_hot(second_codes, len(second_levels), second_ref),
+        interaction,
+    ]
+    feature_names = (
+        ["const", attendance_col]
+        + [f"{first}_{level}" for i, level in enumerate(first_levels) if i != first_ref]
+        + [f"{second}_{level}" for i, level in enumerate(second_levels) if i != second_ref]
+        + [f"{first}_{first_levels[c // len(second_levels)]} × {second}_{second_levels[c % len(second_levels)]}" for c in observed]
+    )
+
+    reference = {first: first_levels[first_ref], second: second_levels[second_ref]}
+    teachers, teacher_codes = pd.Index([]), None
+    if use_teachers:
+        teacher_codes, teacher_levels, teacher_ref = _reference_first(data[teacher_col].to_numpy())
+        blocks.append(_one_hot(teacher_codes, len(teacher_levels), teacher_ref))
+        teachers = pd.Index(np.delete(teacher_levels, teacher_ref), name=teacher_col)
+        reference["Teacher"] = teacher_levels[teacher_ref]
+
+    return {
+        "X": sparse.hstack(blocks, format="csr"),
+        "y": data[marks_col].to_numpy(dtype=float),
+        "feature_names": feature_names,
+        "teachers": teachers,
+        "teacher_codes": teacher_codes,
+        "reference": reference,
+        "levels": {first: list(first_levels), second: list(second_levels)},
+    }
+
+
+def _project_out_groups(X, codes):
+    """Residuals of the columns of dense `X` regressed on group indicators (or a constant if `codes` is None)."""
+    if codes is None:
+        return X - X.mean(axis=0)
+    counts = np.bincount(codes).astype(float)
+    means = np.column_stack([np.bincount(codes, weights=X[:, j]) for j in range(X.shape[1])]) / counts[:, None]
+    return X - means[codes]
+
+
+def fit_intersectional_bias(df: pd.DataFrame, subject, factors=("Gender", "Religion"), teacher_effects=True):
+    """
+    Fits the intersectional bias model with sparse least squares.
+
+    Args:
+    df (pd.DataFrame): The marksheet (see `intersectional_design`).
+    subject (str): Subject name.
+    factors (tuple): The two categorical columns crossed with each other.
+    teacher_effects (bool): Whether to add teacher fixed effects.
+
+    Returns:
+    dict:
+        - "coefficients" (pd.DataFrame): coef, std err, t and P>|t| of the non-teacher terms
+        - "teacher_effects" (pd.Series): Marks shift of every teacher vs the reference teacher
+        - "cell_effects" (pd.DataFrame): Modelled marks gap of every factor combination vs
+          the reference combination (first factor × second factor; NaN if never observed)
+        - "reference" (dict): Reference levels
+        - "nobs", "df_resid", "iterations" (int)
+    """
+    from scipy import sparse, stats
+    from scipy.sparse.linalg import lsmr
+
+    with span("bias.intersectional.design", subject=subject, teachers=teacher_effects) as record:
+        design = intersectional_design(df, subject, factors, teacher_effects)
+        X, y = design["X"], design["y"]
+        record["rows"], record["columns"] = X.shape
+
+    with span("bias.intersectional.lsmr", columns=X.shape[1]) as record:
+        # Equilibrate the columns (attendance ≈ 90 vs 0/1 dummies) so LSMR converges quickly
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=0)).ravel())
+        norms[norms == 0] = 1.0
+        scaled = X @ sparse.diags(1.0 / norms)
+        solution = lsmr(scaled, y, atol=LSQ_TOLERANCE, btol=LSQ_TOLERANCE, maxiter=max(1000, 10 * X.shape[1]))
+        params = solution[0] / norms
+        record["iterations"] = int(solution[2])
+
+    with span("bias.intersectional.inference"):
+        names = design["feature_names"]
+        p_focal = len(names)
+        residuals = y - X @ params
+        ssr = float(residuals @ residuals)
+
+        # Frisch–Waugh–Lovell: project the constant/teacher part out of the focal columns
+        focal = X[:, 1:p_focal].toarray()
+        focal = _project_out_groups(focal, design["teacher_codes"])
+        gram = focal.T @ focal
+        rank = np.linalg.matrix_rank(gram) + (len(design["teachers"]) + 1 if design["teacher_codes"] is not None else 1)
+        df_resid = len(y) - rank
+        scale = ssr / df_resid if df_resid > 0 else np.nan
+        covariance = np.linalg.pinv(gram, hermitian=True) * scale
+
+        bse = np.concatenate([[np.nan], np.sqrt(np.clip(np.diag(covariance), 0, None))])
+        coef = params[:p_focal]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tvalues = coef / bse
+        coefficients = pd.DataFrame(
+            {"coef": coef, "std err": bse, "t": tvalues, "P>|t|": 2 * stats.t.sf(np.abs(tvalues), df_resid)},
+            index=names,
+        )
+        # The intercept's error depends on the teacher effects; it is not reported
+        coefficients.loc["const", ["std err", "t", "P>|t|"]] = np.nan
+
+        teacher_effects_series = pd.Series(params[p_focal:], index=design["teachers"], name="effect")
+
+    return {
+        "coefficients": coefficients,
+        "teacher_effects": teacher_effects_series,
+        "cell_effects": _cell_effects(coefficients["coef"], design, factors),
+        "reference": design["reference"],
+        "nobs": len(y),
+        "df_resid": int(df_resid),
+        "iterations": int(solution[2]),
+    }
+
+
+def _cell_effects(coef, design, factors):
+    """Sums the main and interaction effects into a first × second factor table of gaps vs the reference cell."""
+    first, second = factors
+    table = pd.DataFrame(np.nan, index=design["levels"][first], columns=design["levels"][second])
+    table.index.name, table.columns.name = first, second
+    observed = {name for name in coef.index if " × " in name}
+    for a in table.index:
+        for b in table.columns:
+            is_reference_a, is_reference_b = a == design["reference"][first], b == design["reference"][second]
+            interaction = f"{first}_{a} × {second}_{b}"
+            if not (is_reference_a or is_reference_b) and interaction not in observed:
+                continue  # Never observed together
+            table.loc[a, b] = (
+                (0.0 if is_reference_a else coef.get(f"{first}_{a}", np.nan))
+                + (0.0 if is_reference_b else coef.get(f"{second}_{b}", np.nan))
+                + coef.get(interaction, 0.0)
+            )
+    return table
+
+
+def build_intersectional_figure(result, subject):
+    """
+    Heatmap of the modelled marks gap of every Gender × Religion combination.
+
+    Args:
+    result (dict): Output of `fit_intersectional_bias`.
+    subject (str): Subject name, used in the title.
+
+    Returns:
+    plotly.graph_objects.Figure: The heatmap (not displayed).
+    """
+    import plotly.graph_objects as go
+
+    table = result["cell_effects"]
+    reference = result["reference"]
+    first, second = table.index.name, table.columns.name
+    limit = float(np.nanmax(np.abs(table.to_numpy()))) if table.notna().any().any() else 1.0
+    fig = go.Figure(go.Heatmap(
+        z=table.to_numpy(), x=[str(c) for c in table.columns], y=[str(i) for i in table.index],
+        colorscale="RdBu", zmid=0, zmin=-limit, zmax=limit,
+        text=table.round(2).astype(str).replace("nan", "n/a").to_numpy(), texttemplate="%{text}",
+        hovertemplate=f"{first}: %{{y}}<br>{second}: %{{x}}<br>Gap: %{{z:.2f}} marks<extra></extra>",
+        colorbar=dict(title="Marks gap"),
+    ))
+    teachers = "with teacher fixed effects" if "Teacher" in reference else "without teacher effects"
+    fig.update_layout(
+        title=f"Intersectional Bias in {subject}: marks gap vs {reference[first]} × {reference[second]} ({teachers})",
+        xaxis_title=second, yaxis_title=first,
+    )
+    return fig
+
+
+def detect_intersectional_bias(df: pd.DataFrame, subject, teacher_effects=True):
+    """
+    Fits the Gender × Religion model for one subject and returns its heatmap.
+
+    Args:
+    df (pd.DataFrame): The full marksheet.
+    subject (str): Subject name.
+    teacher_effects (bool): Whether to add teacher fixed effects.
+
+    Returns:
+    plotly.graph_objects.Figure: See `build_intersectional_figure`.
+    """
+    with span("detect_intersectional_bias", subject=subject):
+        return build_intersectional_figure(fit_intersectional_bias(df, subject, teacher_effects=teacher_effects), subject)
+
+
+def intersectional_results(df: pd.DataFrame, subject_names, teacher_effects=True):
+    """
+    Lazily fits the intersectional model per subject, on first access.
+
+    Returns:
+    LazyFigures: subject → (heatmap, coefficient table). Accessing a subject whose
+        data cannot be analyzed raises the ValueError from `intersectional_design`.
+    """
+    def build(subject):
+        with span("detect_intersectional_bias", subject=subject):
+            result = fit_intersectional_bias(df, subject, teacher_effects=teacher_effects)
+            return build_intersectional_figure(result, subject), result["coefficients"]
+
+    return LazyFigures(subject_names, build)
@@ -0,0 +1,212 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Streaming Least Squares (TSQR)
+#
+# Fits Y = Xβ + ε without ever holding X in memory. Every chunk of rows is
+# reduced to the R factor of the QR decomposition of its augmented block [X | y]
+# ((p+1) × (p+1) numbers, however many rows the chunk has). Two R factors merge
+# by stacking them and taking the R of that stack again, so memory stays
+# constant and chunks can be reduced in parallel (NumPy's QR releases the GIL).
+#
+# The final factor holds everything OLS needs:
+#
+#     R_aug = | R   z |      X = QR,  z = Qᵀy,  RSS = ρ²
+#             | 0   ρ |
+#
+# Working from R instead of forming XᵀX keeps the conditioning of X (not its
+# square). Coefficients and covariance come from the SVD of R, reproducing
+# statsmodels' default `OLS(...).fit()` ("pinv"), including designs that are
+# rank deficient (e.g. a full one-hot encoding plus a constant): there the
+# minimum-norm solution is returned and df_resid = n − rank.
+
+# Chunks reduced concurrently (and held in memory at once) per worker
+_IN_FLIGHT_PER_WORKER = 2
+
+
+def default_workers():
+    """Worker threads for the chunk reductions (capped, NumPy's QR is itself multithreaded)."""
+    return max(1, min(8, (os.cpu_count() or 1)))
+
+
+def qr_factor(X, y):
+    """
+    R factor of the augmented block [X | y].
+
+    Args:
+    X (np.ndarray): n × p design block.
+    y (np.ndarray): n responses.
+
+    Returns:
+    np.ndarray: (p+1) × (p+1) upper-triangular factor (fewer rows if n < p+1).
+    """
+    block = np.column_stack([np.asarray(X, dtype=float), np.asarray(y, dtype=float)])
+    return np.linalg.qr(block, mode="r")
+
+
+def merge_factors(R_a, R_b):
+    """Merges two R factors into the R factor of the union of their rows."""
+    if R_a is None:
+        return R_b
+    if R_b is None:
+        return R_a
+    return np.linalg.qr(np.vstack([R_a, R_b]), mode="r")
+
+
+class StreamingOLSResult:
+    """
+    OLS estimates from an accumulated R factor, matching statsmodels' OLSResults.
+
+    Attributes:
+    params, bse, tvalues, pvalues (pd.Series): Indexed by feature name.
+    nobs (int): Number of rows.
+    rank (int): Numerical rank of X.
+    df_resid (int): nobs − rank − absorbed.
+    ssr (float): Residual sum of squares.
+    scale (float): ssr / df_resid (σ² estimate).
+    normalized_cov_params (np.ndarray): (XᵀX)⁺, so cov_params = scale × this.
+    """
+    def __init__(self, R_aug, nobs, feature_names, rcond=1e-15, absorbed=0):
+        from scipy import stats
+
+        p = len(feature_names)
+        R_aug = np.vstack([R_aug, np.zeros((max(0, p + 1 - R_aug.shape[0]), p + 1))])
+        R, z, rho = R_aug[:p, :p], R_aug[:p, p], R_aug[p, p]
+
+        # Pseudo-inverse of X through the SVD of R (X and R share singular values)
+        u, s, vt = np.linalg.svd(R)
+        rank_tol = s.max() * p * np.finfo(float).eps if s.size and s.max() > 0 else 0.0
+        cutoff = max(rcond * (s.max() if s.size else 0.0), rank_tol)
+        inv_s = np.where(s > cutoff, 1.0 / np.where(s > 0, s, 1.0), 0.0)
+
+        self.feature_names = list(feature_names)
+        self.nobs = int(nobs)
+        self.rank = int((s > rank_tol).sum())
+        # Intercepts swept out of the design before streaming (e.g. teacher fixed effects)
+        self.df_resid = self.nobs - self.rank - absorbed
+
+        # β = R⁺ z; the part of z outside R's range is residual too
+        params = vt.T @ (inv_s * (u.T @ z))
+        dropped = (u.T @ z)[inv_s == 0]
+        self.ssr = float(rho ** 2 + np.sum(dropped ** 2))
+        self.scale = self.ssr / self.df_resid if self.df_resid > 0 else np.nan
+        self.normalized_cov_params = (vt.T * inv_s ** 2) @ vt
+
+        bse = np.sqrt(np.clip(np.diag(self.normalized_cov_params) * self.scale, 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tvalues = params / bse
+        self.params = pd.Series(params, index=self.feature_names)
+        self.bse = pd.Series(bse, index=self.feature_names)
+        self.tvalues = pd.Series(tvalues, index=self.feature_names)
+        self.pvalues = pd.Series(2 * stats.t.sf(np.abs(tvalues), self.df_resid), index=self.feature_names)
+
+    def cov_params(self):
+        return pd.DataFrame(self.normalized_cov_params * self.scale, index=self.feature_names, columns=self.feature_names)
+
+    def summary_frame(self):
+        """Coefficient table: coef, std err, t, P>|t|."""
+        return pd.DataFrame({"coef": self.params, "std err": self.bse, "t": self.tvalues, "P>|t|": self.pvalues})
+
+
+def _add(a, b):
+    return a + b
+
+
+def accumulate_factor(chunks, reduce_chunk, workers=None, combine=_add):
+    """
+    Reduces a stream of chunks to one R factor, several chunks at a time.
+
+    Args:
+    chunks (iterable): Chunks in any form `reduce_chunk` accepts; consumed lazily,
+        so at most `workers × 2` chunks are in memory at once.
+    reduce_chunk (callable): Maps a chunk to (R factor, n_rows, extra). `extra` is any
+        per-chunk summary (e.g. column sums), merged with `combine`; may be None.
+    workers (int): Worker threads (default `default_workers()`); 1 runs inline.
+    combine (callable): Merges two extras (default: addition).
+
+    Returns:
+    tuple: (R factor, total rows, combined extras)
+    """
+    workers = workers or default_workers()
+    R_total, n_total, extra_total = None, 0, None
+
+    def absorb(result):
+        nonlocal R_total, n_total, extra_total
+        R_chunk, n_chunk, extra = result
+        if n_chunk == 0:
+            return
+        R_total = merge_factors(R_total, R_chunk)
+        n_total += n_chunk
+        if extra is not None:
+            extra_total = extra if extra_total is None else combine(extra_total, extra)
+
+    if workers == 1:
+        for chunk in chunks:
+            absorb(reduce_chunk(chunk))
+        return R_total, n_total, extra_total
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tsqr") as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(reduce_chunk, chunk))
+            if len(pending) >= workers * _IN_FLIGHT_PER_WORKER:
+                absorb(pending.popleft().result())
+        while pending:
+            absorb(pending.popleft().result())
+    return R_total, n_total, extra_total
+
+
+def fit_ols_chunks(chunks, feature_names, workers=None):
+    """
+    Fits OLS over a stream of (X, y) chunks in constant memory.
+
+    Args:
+    chunks (iterable): (X, y) NumPy blocks with the same columns.
+    feature_names (list): Names of the columns of X.
+    workers (int): Worker threads reducing chunks in parallel.
+
+    Returns:
+    StreamingOLSResult: Same coefficients, standard errors and p-values as
+        `sm.OLS(y, X).fit()` on the concatenated data.
+    """
+    def reduce_chunk(chunk):
+        X, y = chunk
+        return qr_factor(X, y), len(y), None
+
+    R_aug, nobs, _ = accumulate_factor(chunks, reduce_chunk, workers)
+    if R_aug is None:
+        raise ValueError("No rows to fit.")
+    return StreamingOLSResult(R_aug, nobs, feature_names)
+
+
+def iter_frame_chunks(source, columns, chunksize=500_000):
+    """
+    Yields DataFrame chunks with `columns` from an in-memory or on-disk dataset.
+
+    Args:
+    source: A DataFrame (sliced without copying), a path to a .csv/.parquet file,
+        or a callable returning an iterable of DataFrames (so it can be re-read).
+    columns (list): Columns to read (None for all).
+    chunksize (int): Rows per chunk.
+
+    Yields:
+    pd.DataFrame: Chunks of at most `chunksize` rows.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            chunk = source.iloc[start:start + chunksize]
+            yield chunk if columns is None else chunk[columns]
+    elif callable(source):
+        for chunk in source():
+            yield chunk if columns is None else chunk[columns]
+    elif str(source).lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
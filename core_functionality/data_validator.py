@@ -1,5 +1,55 @@
+import io
+import os
+import sys
+import tempfile
+import warnings
+
 import pandas as pd
 import numpy as np
+from core_functionality.dataframe_engine import get_engine
+from core_functionality.instrumentation import span
+
+# Optional columns that split a multi-school marksheet into partitions
+# (see analysis/partitioned.py). Roll numbers only need to be unique within one.
+PARTITION_COLUMNS = ("School", "Section", "Term")
+
+# Memory-Budget Ingestion Planning
+#
+# Before an upload is decoded, its in-memory size is estimated from the file
+# size, the header and a parsed block of the first rows, and one of four paths
+# is chosen against the session's memory budget (BTM_MEMORY_BUDGET_MB):
+#   - in_memory:   one pandas read (parsing peaks at READ_OVERHEAD × the frame),
+#   - compact:     read in chunks into float32 Marks/Attendance columns, so only
+#                  one chunk is ever being parsed,
+#   - chunked:     the frame does not fit at all; the upload is validated and
+#                  analyzed chunk by chunk (e.g. `detect_bias_streaming`),
+#   - out_of_core: as chunked, but the upload itself does not fit next to a chunk;
+#                  it is spilled to a Parquet file on disk and streamed from there.
+# Anything else is refused with the estimate (MemoryBudgetExceededError)
+# instead of running the server out of memory. Excel files cannot be read in
+# chunks, so they are either loaded whole or refused.
+
+MEMORY_BUDGET_ENV_VAR = "BTM_MEMORY_BUDGET_MB"
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+INGEST_IN_MEMORY = "in_memory"
+INGEST_COMPACT = "compact"
+INGEST_CHUNKED = "chunked"
+INGEST_OUT_OF_CORE = "out_of_core"
+INGEST_REFUSED = "refused"
+
+SAMPLE_BYTES = 1 << 20  # raw bytes read to sample the first rows
+SAMPLE_ROWS = 1_000  # rows parsed to measure the decoded row size
+CHUNK_ROWS = 100_000  # rows per chunk on the chunked paths (fewer on small budgets)
+MIN_CHUNK_ROWS = 1_000
+# Peak memory ÷ estimated decoded size, measured on a 1M-row synthetic marksheet (rounded up)
+READ_OVERHEAD = 3.0  # one pandas read of the whole CSV (measured 2.7)
+COMPACT_OVERHEAD = 2.0  # the compact frame once resident (measured 1.9: chunks leave the allocator fragmented)
+CHUNK_OVERHEAD = 7.0  # parsing, validating and (out-of-core) writing one chunk (measured 5-6.5)
+KEY_BYTES_PER_ROW = 24  # Roll No hashes kept across chunks, concatenated and sorted once
+SPILL_BYTES = 32 * 2**20  # Parquet writer buffers on the out-of-core path
+EXCEL_EXPANSION = 10.0  # decoded frame ÷ .xlsx file size (zipped XML); no row sample is taken
+EXCEL_READ_OVERHEAD = 6.0  # Excel readers build Python objects for every cell first
 
 class InvalidExtensionError(Exception):
     """Raised when the file extension is not supported."""
@@ -25,13 +75,179 @@ class UnknownColumnError(Exception):
         self.message = f"Column '{column_name}' is not allowed."
         super().__init__(self.message)
 
-def validate_and_convert_file(file):
+class MemoryBudgetExceededError(Exception):
+    """Raised when an upload would not fit in the session's memory budget if loaded whole."""
+    def __init__(self, plan):
+        self.plan = plan
+        if plan.strategy in (INGEST_CHUNKED, INGEST_OUT_OF_CORE):
+            advice = "It can still be analyzed in chunks, without loading it."
+        elif plan.format == "excel":
+            advice = "Save it as CSV (which can be read in chunks) or split it, e.g. by School or Term."
+        else:
+            advice = "Split it, e.g. by School or Term, or ask the admin to raise " + MEMORY_BUDGET_ENV_VAR + "."
+        self.message = (f"This file would need about {_megabytes(plan.peak_bytes)} of memory to load "
+                        f"(~{plan.rows:,} rows), more than the {_megabytes(plan.budget_bytes)} "
+                        f"this session may use. {advice}")
+        super().__init__(self.message)
+
+def _megabytes(n_bytes):
+    return f"{n_bytes / 2**20:,.0f} MB"
+
+def memory_budget():
+    """The per-session memory budget in bytes (BTM_MEMORY_BUDGET_MB, default 1024 MB)."""
+    value = os.environ.get(MEMORY_BUDGET_ENV_VAR, "").strip()
+    if value:
+        try:
+            if float(value) > 0:
+                return int(float(value) * 2**20)
+        except ValueError:
+            pass
+        warnings.warn(f"Ignoring {MEMORY_BUDGET_ENV_VAR}={value!r}: expected a number of megabytes.")
+    return DEFAULT_MEMORY_BUDGET_MB * 2**20
+
+class IngestionPlan:
+    """
+    How an upload will be read, with the estimates behind the choice.
+
+    Attributes:
+    strategy (str): INGEST_IN_MEMORY, INGEST_COMPACT, INGEST_CHUNKED, INGEST_OUT_OF_CORE or INGEST_REFUSED.
+    format (str): "csv" or "excel".
+    file_bytes (int): Size of the upload.
+    rows (int): Estimated data rows.
+    columns (list): Header of the file (empty for Excel).
+    frame_bytes, compact_bytes (int): Estimated size of the decoded frame, as read and compacted.
+    chunk_rows (int): Rows per chunk on the chunked paths.
+    peak_bytes (int): Estimated peak memory of loading the file whole (of the chosen
+        path when the file can be loaded).
+    budget_bytes (int): The memory budget.
+    """
+    def __init__(self, strategy, format, file_bytes, rows, columns, frame_bytes, compact_bytes,
+                 chunk_rows, peak_bytes, budget_bytes):
+        self.strategy = strategy
+        self.format = format
+        self.file_bytes = file_bytes
+        self.rows = rows
+        self.columns = columns
+        self.frame_bytes = frame_bytes
+        self.compact_bytes = compact_bytes
+        self.chunk_rows = chunk_rows
+        self.peak_bytes = peak_bytes
+        self.budget_bytes = budget_bytes
+
+    @property
+    def loads_frame(self):
+        """True if the file is loaded as a DataFrame (in_memory or compact)."""
+        return self.strategy in (INGEST_IN_MEMORY, INGEST_COMPACT)
+
+def plan_ingestion(file, budget=None):
+    """
+    Estimates the memory needed to decode an upload and picks how to read it.
+
+    Args:
+    file (file object): The uploaded file (read position is restored).
+    budget (int): Memory budget in bytes; defaults to `memory_budget()`.
+
+    Returns:
+    IngestionPlan: The chosen path and its estimates.
+    """
+    budget = memory_budget() if budget is None else budget
+    file_bytes = _file_size(file)
+
+    if not file.name.endswith('.csv'):
+        frame_bytes = int(file_bytes * EXCEL_EXPANSION)
+        peak = int(frame_bytes * EXCEL_READ_OVERHEAD)
+        strategy = INGEST_IN_MEMORY if peak <= budget else INGEST_REFUSED
+        return IngestionPlan(strategy, "excel", file_bytes, 0, [], frame_bytes, frame_bytes, 0, peak, budget)
+
+    rows, columns, row_bytes, compact_row_bytes = _sample_csv(file, file_bytes)
+    frame_bytes, compact_bytes = int(rows * row_bytes), int(rows * compact_row_bytes)
+    # Chunks small enough that one takes at most a quarter of the budget
+    chunk_rows = int(np.clip(budget / 4 / (CHUNK_OVERHEAD * max(row_bytes, 1)), MIN_CHUNK_ROWS, CHUNK_ROWS))
+    chunk_bytes = chunk_rows * row_bytes
+
+    # The upload's bytes stay in memory while it is decoded or streamed from;
+    # only the out-of-core path lets them go (after spilling them to disk)
+    in_memory_peak = file_bytes + int(frame_bytes * READ_OVERHEAD)
+    compact_peak = file_bytes + int(compact_bytes * COMPACT_OVERHEAD + chunk_bytes * READ_OVERHEAD)
+    stream_peak = int(chunk_bytes * CHUNK_OVERHEAD) + KEY_BYTES_PER_ROW * rows
+    if in_memory_peak <= budget:
+        strategy, peak = INGEST_IN_MEMORY, in_memory_peak
+    elif compact_peak <= budget:
+        strategy, peak = INGEST_COMPACT, compact_peak
+    elif file_bytes + stream_peak <= budget:
+        strategy, peak = INGEST_CHUNKED, in_memory_peak
+    elif stream_peak + SPILL_BYTES <= budget and _has_pyarrow():
+        strategy, peak = INGEST_OUT_OF_CORE, in_memory_peak
+    else:
+        strategy, peak = INGEST_REFUSED, in_memory_peak
+    return IngestionPlan(strategy, "csv", file_bytes, rows, columns, frame_bytes, compact_bytes,
+                         chunk_rows, peak, budget)
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    return int(size)
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401  (Parquet spill files)
+    except ImportError:
+        return False
+    return True
+
+def _sample_csv(file, file_bytes):
+    """
+    Row count and decoded row size of a CSV, from its first rows.
+
+    Returns:
+    tuple: (estimated rows, header columns, bytes per decoded row, bytes per compact row).
+        Strings are counted once per distinct value (pandas' parser shares repeated ones).
+    """
+    position = file.tell()
+    file.seek(0)
+    raw = file.read(SAMPLE_BYTES)
+    file.seek(position)
+    if isinstance(raw, str):
+        raw = raw.encode()
+
+    lines = raw.split(b"\n")
+    if len(raw) < file_bytes:
+        lines = lines[:-1]  # the last line may be cut off
+    lines = [line for line in lines if line.strip()]
+    header, body = lines[0], lines[1:SAMPLE_ROWS + 1]
+    sample = pd.read_csv(io.BytesIO(b"\n".join([header, *body])))
+    if not body:
+        return 0, list(sample.columns), 0, 0
+
+    if len(raw) >= file_bytes and len(lines) <= SAMPLE_ROWS + 1:
+        rows = len(body)
+    else:
+        rows = int(np.ceil((file_bytes - len(header) - 1) / (sum(len(line) + 1 for line in body) / len(body))))
+
+    row_bytes = compact_row_bytes = 0.0
+    for col in sample.columns:
+        values = sample[col]
+        if values.dtype == object:
+            distinct = values.dropna().unique()
+            per_row = 8 + sum(sys.getsizeof(value) for value in distinct) / len(values)
+            row_bytes += per_row
+            compact_row_bytes += per_row
+        else:
+            row_bytes += values.dtype.itemsize
+            compact_row_bytes += 4 if col.endswith((" Marks", " Attendance")) else values.dtype.itemsize
+    return rows, list(sample.columns), row_bytes, compact_row_bytes
+
+def validate_and_convert_file(file, plan=None):
     """
     Validates the uploaded file and converts it into a Pandas DataFrame.
 
     Steps:
     1. Check if the file has a valid extension (.csv, .xls, .xlsx, .xlsm, .xlsb).
-    2. Try to load it into a DataFrame, handling potential corruption errors.
+    2. Try to load it into a DataFrame (whole or compacted, within the session's memory
+       budget; see `plan_ingestion`), handling potential corruption errors.
     3. Ensure the file has at least Roll No, Attendance, and Marks.
     4. Dynamically check for subject-based columns and validate their structure.
     5. Ensure there are no unexpected columns.
@@ -39,9 +255,47 @@ def validate_and_convert_file(file):
 
     Args:
     file (file object): The uploaded file.
+    plan (IngestionPlan): How to read it (see `load_file`).
 
     Returns:
     tuple: (Pandas DataFrame, NumPy array of detected subjects).
+
+    Raises:
+    MemoryBudgetExceededError: If the file does not fit in the session's memory budget.
+    """
+    with span("validate_and_convert_file", file=getattr(file, "name", None)) as record:
+        df, subject_array = _validate_and_convert_file(file, plan)
+        record["rows"], record["columns"] = df.shape
+    return df, subject_array
+
+def _validate_and_convert_file(file, plan=None):
+    df = load_file(file, plan)
+
+    with span("validate.structure"):
+        subject_array = check_structure(df)
+
+    # Step 7: Validate Validate the DataFrame
+    with span("validate.values"):
+        df = validate_data(df)
+
+    return df, subject_array
+
+def load_file(file, plan=None):
+    """
+    Reads an uploaded marksheet without validating its contents (steps 1-2 of
+    `validate_and_convert_file`), e.g. to show a rejected file for editing.
+
+    Args:
+    file (file object): The uploaded file.
+    plan (IngestionPlan): How to read it; planned with `plan_ingestion` if None.
+
+    Returns:
+    Pandas DataFrame: The file as read.
+
+    Raises:
+    InvalidExtensionError: If the file is not a CSV or Excel file.
+    CorruptedFileError: If the file cannot be read.
+    MemoryBudgetExceededError: If the file does not fit in the session's memory budget.
     """
     # Step 1: Check file extension
     valid_extensions = ('.csv', '.xls', '.xlsx', '.xlsm', '.xlsb')
@@ -49,28 +303,135 @@ def validate_and_convert_file(file):
     if not file.name.endswith(valid_extensions):
         raise InvalidExtensionError()
 
+    try:
+        if plan is None:
+            with span("validate.plan") as record:
+                plan = plan_ingestion(file)
+                record["strategy"], record["estimate_mb"] = plan.strategy, plan.peak_bytes / 2**20
+    except Exception:
+        raise CorruptedFileError()
+    if not plan.loads_frame:
+        raise MemoryBudgetExceededError(plan)
+
     try:
         # Step 2: Load the file into a DataFrame
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
+        with span("validate.read", strategy=plan.strategy):
+            file.seek(0)
+            if plan.strategy == INGEST_COMPACT:
+                return _read_compact(file, plan.chunk_rows)
+            if file.name.endswith('.csv'):
+                return get_engine().read_csv(file)
+            return pd.read_excel(file)
 
     except Exception:
         raise CorruptedFileError()
 
+def _read_compact(file, chunk_rows):
+    """Reads a CSV in chunks, storing Marks/Attendance as float32 and sharing repeated strings."""
+    chunks = []
+    for chunk in _read_csv_chunks(file, chunk_rows):
+        for col in chunk.columns:
+            if col.endswith((" Marks", " Attendance")) and pd.api.types.is_numeric_dtype(chunk[col]):
+                chunk[col] = chunk[col].astype(np.float32)
+        chunks.append(chunk)
+    df = pd.concat(chunks, ignore_index=True)
+    del chunks
+    # One string object per distinct value across all chunks
+    for col in df.columns:
+        if df[col].dtype == object:
+            codes, uniques = pd.factorize(df[col])
+            values = uniques.to_numpy(dtype=object)[codes]
+            values[codes < 0] = np.nan
+            df[col] = values
+    return df
+
+def _read_csv_chunks(file, chunk_rows, dtype=None):
+    file.seek(0)
+    yield from pd.read_csv(file, chunksize=chunk_rows, dtype=dtype)
+
+def _stream_chunks(file, plan):
+    """Chunks with the same types throughout: Marks/Attendance as floats (where numeric), the rest as text."""
+    text_columns = {col: str for col in plan.columns if not col.endswith((" Marks", " Attendance"))}
+    for chunk in _read_csv_chunks(file, plan.chunk_rows, text_columns):
+        coerce_numeric(chunk)
+        for col in _subject_columns(chunk):
+            if pd.api.types.is_numeric_dtype(chunk[col]):
+                chunk[col] = chunk[col].astype(float)
+        yield chunk
+
+def open_stream(file, plan, directory=None):
+    """
+    Validates a CSV too large to load, one chunk at a time, and returns a re-readable source of it.
+
+    Runs `check_structure` on the first chunk and the `validate_data` checks on every
+    chunk; roll numbers are compared across chunks through 8-byte hashes. Out-of-core
+    plans also write the chunks to a Parquet file in the same pass.
+
+    Args:
+    file (file object): The uploaded CSV file.
+    plan (IngestionPlan): Its plan, with strategy INGEST_CHUNKED or INGEST_OUT_OF_CORE.
+    directory (str): Where the out-of-core Parquet copy goes (default: a new temporary directory).
+
+    Returns:
+    tuple: (source, subject array). The source is what `iter_frame_chunks` and
+        `detect_bias_streaming` accept: a callable yielding the chunks of the upload
+        (chunked) or the path of the Parquet copy (out-of-core).
+
+    Raises:
+    InvalidDataStructureError, UnknownColumnError, ValueError: As `validate_and_convert_file`.
+    """
+    writer, path, subject_array, keys = None, None, None, []
+    with span("validate.stream", strategy=plan.strategy) as record:
+        try:
+            for chunk in _stream_chunks(file, plan):
+                if subject_array is None:
+                    subject_array = check_structure(chunk)
+                errors = {col: message for col, message in column_errors(chunk).items() if col != "Roll No"}
+                if errors:
+                    raise ValueError(next(iter(errors.values())))
+                key_columns = ["Roll No", *[col for col in PARTITION_COLUMNS if col in chunk.columns]]
+                keys.append(pd.util.hash_pandas_object(chunk[key_columns], index=False).to_numpy())
+
+                if plan.strategy == INGEST_OUT_OF_CORE:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+
+                    if writer is None:
+                        path = os.path.join(directory or tempfile.mkdtemp(prefix="btm_upload_"), "marksheet.parquet")
+                        schema = pa.schema([pa.field(col, pa.float64() if col in _subject_columns(chunk) else pa.string())
+                                            for col in chunk.columns])
+                        writer = pq.ParquetWriter(path, schema)
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if subject_array is None:
+            raise InvalidDataStructureError("The file has no rows.")
+        keys = np.concatenate(keys)
+        record["rows"] = len(keys)
+        if len(np.unique(keys)) < len(keys):
+            raise ValueError("Duplicate values found in 'Roll No'. Each student must have a unique Roll Number.")
+
+    if plan.strategy == INGEST_OUT_OF_CORE:
+        return path, subject_array
+    return (lambda: _stream_chunks(file, plan)), subject_array
+
+def check_structure(df):
+    """Runs the column checks of `validate_and_convert_file` and returns the detected subjects."""
+
     # Step 3: Define required & optional columns
     mandatory_columns = {"Roll No"}
-    optional_columns = {"Name", "Gender", "Religion"}
+    optional_columns = {"Name", "Gender", "Religion", *PARTITION_COLUMNS}
     allowed_columns = set(mandatory_columns | optional_columns)  # Allowed basic columns
 
-    detected_subjects = set()  # Store detected subjects dynamically
+    detected_subjects = {}  # Store detected subjects dynamically (in column order)
 
     for col in df.columns:
         # If a column is for marks, extract subject name
         if col.endswith(" Marks"):
             subject_name = col.replace(" Marks", "")
-            detected_subjects.add(subject_name)
+            detected_subjects[subject_name] = None
             
             # Ensure the corresponding "Attendance" column exists
             if f"{subject_name} Attendance" not in df.columns:
@@ -115,19 +476,14 @@ def validate_and_convert_file(file):
         raise InvalidDataStructureError("At least one subject (with Marks and Attendance) is required.")
 
     # Step 6: Convert detected subjects to a NumPy array
-    subject_array = np.array(list(detected_subjects))
-
-    # Step 7: Validate Validate the DataFrame
-    df = validate_data(df)
-
-    return df, subject_array
+    return np.array(list(detected_subjects))
 
 def validate_data(df):
     """
     Validates the data inside the DataFrame.
 
     Checks performed:
-    1. Ensures all 'Roll No' values are unique.
+    1. Ensures all 'Roll No' values are unique (within each School/Section/Term, if present).
     2. Ensures all 'Marks' and 'Attendance' columns:
         - Are strictly numeric.
         - Have values between 0 and 100.
@@ -142,27 +498,99 @@ def validate_data(df):
     Raises:
     ValueError: If any validation check fails.
     """
-    
-    # Step 1: Ensure "Roll No" is unique
-    if df["Roll No"].duplicated().any():
-        raise ValueError("Duplicate values found in 'Roll No'. Each student must have a unique Roll Number.")
+    return validate_columns(df)
+
+def validate_columns(df, columns=None):
+    """
+    Runs the `validate_data` checks that involve `columns` only, and rounds only those.
+
+    Used after an edit: the untouched columns were validated before and are not scanned again.
+
+    Args:
+    df (Pandas DataFrame): The dataset to validate.
+    columns (list): Columns that changed (default: all).
+
+    Returns:
+    Pandas DataFrame: The DataFrame with the given Marks/Attendance columns rounded (in place).
+
+    Raises:
+    ValueError: The first failed check, as `validate_data`.
+    """
+    errors = column_errors(df, columns)
+    if errors:
+        raise ValueError(next(iter(errors.values())))
+
+    return round_columns(df, columns)  # Return updated DataFrame
+
+def round_columns(df, columns=None):
+    """Rounds the Marks/Attendance columns among `columns` (default: all) to 2 decimal places, in place."""
+    # Step 5: Round values to 2 decimal places (in-place update)
+    for col in _subject_columns(df, columns):
+        df[col] = df[col].round(2)
+    return df
+
+def column_errors(df, columns=None):
+    """
+    Every failed `validate_data` check that involves `columns`, instead of only the first.
+
+    Args:
+    df (Pandas DataFrame): The dataset to check.
+    columns (list): Columns to check (default: all). Roll numbers are checked when
+        'Roll No' or a School/Section/Term column is among them.
+
+    Returns:
+    dict: {column: error message}, in the order `validate_data` checks them; empty if valid.
+    """
+    errors = {}
+    partition_columns = [col for col in PARTITION_COLUMNS if col in df.columns]
+
+    # Step 1: Ensure "Roll No" is unique (per partition: roll numbers restart in every school/section/term)
+    if columns is None or not {"Roll No", *partition_columns}.isdisjoint(columns):
+        if df.duplicated(subset=["Roll No", *partition_columns]).any():
+            errors["Roll No"] = "Duplicate values found in 'Roll No'. Each student must have a unique Roll Number."
 
     # Step 2: Identify all "Marks" and "Attendance" columns dynamically
-    subject_columns = [col for col in df.columns if col.endswith((" Marks", " Attendance"))]
+    subject_columns = _subject_columns(df, columns)
 
+    # Step 3: Ensure columns are numeric
     for col in subject_columns:
-        # Step 3: Ensure column is numeric
         if not pd.api.types.is_numeric_dtype(df[col]):
-            raise ValueError(f"Column '{col}' must be numeric.")
+            errors[col] = f"Column '{col}' must be numeric."
 
-        # Step 4: Ensure values are within [0, 100]
-        if (df[col] < 0).any() or (df[col] > 100).any():
-            raise ValueError(f"Column '{col}' contains values outside the valid range (0-100).")
+    # Step 4: Ensure values are within [0, 100] (one min/max scan of all columns)
+    numeric_columns = [col for col in subject_columns if col not in errors]
+    ranges = get_engine().column_ranges(df, numeric_columns) if numeric_columns else None
+    for col in numeric_columns:
+        if ranges.at[col, "min"] < 0 or ranges.at[col, "max"] > 100:
+            errors[col] = f"Column '{col}' contains values outside the valid range (0-100)."
 
-        # Step 5: Round values to 2 decimal places (in-place update)
-        df[col] = df[col].round(2)
+    return errors
+
+def coerce_numeric(df, columns=None):
+    """
+    Converts Marks/Attendance columns holding numbers as text (e.g. after an edit) to numbers.
+
+    Columns that still hold non-numeric text are left as they are, so that
+    validation reports them.
 
-    return df  # Return updated DataFrame
+    Args:
+    df (Pandas DataFrame): The dataset (updated in place).
+    columns (list): Columns to convert (default: all).
+
+    Returns:
+    Pandas DataFrame: The same DataFrame.
+    """
+    for col in _subject_columns(df, columns):
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            try:
+                df[col] = pd.to_numeric(df[col].replace("", np.nan))
+            except (ValueError, TypeError):
+                pass
+    return df
+
+def _subject_columns(df, columns=None):
+    columns = df.columns if columns is None else [col for col in df.columns if col in set(columns)]
+    return [col for col in columns if col.endswith((" Marks", " Attendance"))]
 
 if __name__ == "__main__":
     with open("test1.csv", "r") as file:
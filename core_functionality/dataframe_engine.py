@@ -0,0 +1,206 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Pluggable DataFrame Engine
+#
+# The analyses keep pandas DataFrames as their exchange format (the views,
+# plotly and statsmodels all take pandas), but their heavy scans and group-bys
+# go through an engine:
+#   - "pandas" (default): plain pandas, single-threaded,
+#   - "polars": the same operations as multithreaded Polars lazy queries over
+#     the Arrow buffers of the needed columns only (`pip install polars`).
+#
+# Select it with the BTM_DATAFRAME_ENGINE environment variable (read on every
+# call, so it can be changed without restarting) or pass `engine=` explicitly.
+# Both engines return pandas objects with the same index order, and
+# benchmarks/dataframe_engines.py checks that they agree.
+
+ENGINE_ENV_VAR = "BTM_DATAFRAME_ENGINE"
+ENGINES = ("pandas", "polars")
+DEFAULT_ENGINE = "pandas"
+
+# Rows the Polars CSV reader looks at to infer column types
+CSV_SCHEMA_ROWS = 10_000
+
+_engines = {}
+
+
+class PandasEngine:
+    """The reference engine: plain pandas operations."""
+    name = "pandas"
+
+    def read_csv(self, file):
+        return pd.read_csv(file)
+
+    def column_ranges(self, df, columns):
+        """Minimum and maximum of each column (NaN skipped), as a frame indexed by column."""
+        return pd.DataFrame({"min": df[columns].min(), "max": df[columns].max()}, index=columns)
+
+    def group_counts(self, df, key):
+        """Rows per group of `key`, indexed by group (sorted)."""
+        return df.groupby(key).size().sort_index()
+
+    def group_stats(self, df, key, value):
+        """
+        Per-group statistics of `value`, indexed by group (sorted).
+
+        Returns:
+        pd.DataFrame: count, mean, var (ddof=1), q1 and q3 (linear interpolation,
+            as `scipy.stats.iqr`) per group.
+        """
+        grouped = df.groupby(key)[value]
+        stats = grouped.agg(["count", "mean", "var"])
+        quartiles = grouped.quantile([0.25, 0.75]).unstack()
+        stats["q1"], stats["q3"] = quartiles[0.25], quartiles[0.75]
+        return stats.sort_index()
+
+    def group_transform_mean(self, df, key, columns):
+        """
+        Group mean of each column broadcast back to the rows of `df` (same index).
+
+        Args:
+        df (pd.DataFrame): The rows.
+        key (str or pd.Series): Group column name, or group labels in row order.
+        columns (str or list): Column name (returns a Series) or names (returns a DataFrame).
+
+        Rows with a missing group key get NaN; missing values are skipped in the means.
+        """
+        return df.groupby(key)[columns].transform("mean")
+
+    def corr(self, df, columns):
+        """Pairwise-complete Pearson correlation matrix of `columns`."""
+        return df[columns].corr()
+
+
+class PolarsEngine(PandasEngine):
+    """
+    Multithreaded engine on Polars lazy queries.
+
+    Only the columns an operation needs are converted (numeric columns are
+    shared zero-copy through Arrow), and results come back as pandas objects.
+    """
+    name = "polars"
+
+    def __init__(self):
+        import polars
+
+        self.pl = polars
+
+    def _lazy(self, df, columns, key=None):
+        frame = self.pl.from_pandas(df[columns]).lazy()
+        # pandas leaves rows with a missing group key out of group-bys; so must Polars
+        return frame if key is None else frame.filter(self.pl.col(key).is_not_null())
+
+    def read_csv(self, file):
+        # Multithreaded parser; converted once to the pandas frame the app works with.
+        # Types are inferred from the first rows (a full-file inference pass is
+        # single-threaded); a later value that does not fit them triggers one re-read.
+        try:
+            frame = self.pl.read_csv(file, infer_schema_length=CSV_SCHEMA_ROWS)
+        except self.pl.exceptions.ComputeError:
+            if hasattr(file, "seek"):
+                file.seek(0)
+            frame = self.pl.read_csv(file, infer_schema_length=None)
+        result = frame.to_pandas()
+        # pandas reads an empty field as NaN (None in Polars text columns), and an all-empty column as float
+        for name in frame.columns:
+            nulls = frame[name].null_count()
+            if nulls == len(frame) and len(frame):
+                result[name] = np.nan
+            elif nulls and result[name].dtype == object:
+                result[name] = result[name].where(result[name].notna(), np.nan)
+        return result
+
+    def column_ranges(self, df, columns):
+        pl = self.pl
+        row = self._lazy(df, columns).select(
+            [pl.col(col).min().alias(f"min:{col}") for col in columns]
+            + [pl.col(col).max().alias(f"max:{col}") for col in columns]
+        ).collect().row(0, named=True)
+        return pd.DataFrame(
+            {"min": [row[f"min:{col}"] for col in columns], "max": [row[f"max:{col}"] for col in columns]},
+            index=columns, dtype=float,
+        )
+
+    def group_counts(self, df, key):
+        pl = self.pl
+        counts = self._lazy(df, [key], key).group_by(key).agg(pl.len().alias("count")).collect().to_pandas()
+        return counts.set_index(key)["count"].rename(None).sort_index()
+
+    def group_stats(self, df, key, value):
+        pl = self.pl
+        column = pl.col(value)
+        stats = self._lazy(df, [key, value], key).group_by(key).agg(
+            column.count().alias("count"),
+            column.mean().alias("mean"),
+            column.var(ddof=1).alias("var"),
+            column.quantile(0.25, interpolation="linear").alias("q1"),
+            column.quantile(0.75, interpolation="linear").alias("q3"),
+        ).collect().to_pandas()
+        return stats.set_index(key).astype({"mean": float, "var": float, "q1": float, "q3": float}).sort_index()
+
+    def group_transform_mean(self, df, key, columns):
+        pl = self.pl
+        names = [columns] if isinstance(columns, str) else list(columns)
+        # The key (a column, or e.g. teachers kept aside from the design) travels as integer
+        # codes; a missing key is -1 and, as in pandas, its rows get no group mean
+        codes, _ = pd.factorize(np.asarray(df[key] if isinstance(key, str) else key, dtype=object))
+        frame = df[names].assign(__group__=codes)
+        group = pl.col("__group__")
+        means = pl.from_pandas(frame).lazy().select(
+            [pl.when(group >= 0).then(pl.col(col).mean().over(group)).alias(col) for col in names]
+        ).collect().to_pandas()
+        means.index = df.index
+        return means[columns] if isinstance(columns, str) else means
+
+    def corr(self, df, columns):
+        pl = self.pl
+        pairs = [(a, b) for i, a in enumerate(columns) for b in columns[i + 1:]]
+        row = self._lazy(df, columns).select(
+            [pl.corr(a, b).alias(f"{a}\x00{b}") for a, b in pairs]
+        ).collect().row(0, named=True) if pairs else {}
+        matrix = pd.DataFrame(np.eye(len(columns)), index=columns, columns=columns)
+        for a, b in pairs:
+            matrix.loc[a, b] = matrix.loc[b, a] = row[f"{a}\x00{b}"]
+        return matrix
+
+
+_ENGINE_CLASSES = {"pandas": PandasEngine, "polars": PolarsEngine}
+
+
+def selected_engine_name():
+    """The engine named by BTM_DATAFRAME_ENGINE (default "pandas")."""
+    return os.environ.get(ENGINE_ENV_VAR, DEFAULT_ENGINE).strip().lower() or DEFAULT_ENGINE
+
+
+def get_engine(name=None):
+    """
+    Returns the DataFrame engine to use.
+
+    Args:
+    name (str): "pandas" or "polars" (or an engine, returned as is); defaults to
+        the BTM_DATAFRAME_ENGINE setting.
+
+    Returns:
+    PandasEngine: The engine (shared instance). If Polars is requested but not
+        installed, a warning is issued and the pandas engine is returned, so a
+        configuration setting can never break the app.
+
+    Raises:
+    ValueError: If the engine name is unknown.
+    """
+    if isinstance(name, PandasEngine):
+        return name
+    name = (name or selected_engine_name()).lower()
+    if name not in _ENGINE_CLASSES:
+        raise ValueError(f"Unknown DataFrame engine '{name}'. Use one of: {', '.join(ENGINES)}.")
+    if name not in _engines:
+        try:
+            _engines[name] = _ENGINE_CLASSES[name]()
+        except ImportError:
+            warnings.warn(f"DataFrame engine '{name}' is not installed; using pandas.", RuntimeWarning, stacklevel=2)
+            return get_engine(DEFAULT_ENGINE)
+    return _engines[name]
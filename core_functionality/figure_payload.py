@@ -0,0 +1,282 @@
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+# Compact Plotly Figure Payloads
+#
+# The analyses build their figures from per-student arrays, and for large
+# marksheets the figure JSON sent to the browser dominates page latency.
+# `compact_figure` returns a lighter copy of a figure that looks the same:
+#   - box traces with more than `max_points` samples are replaced by their exact
+#     summary statistics (quartiles, fences, mean) per category, instead of
+#     shipping every sample plus a repeated category label per student; the
+#     samples outside the whisker fences are kept in a companion marker trace
+#     (same axes, category and legend group), so outliers still show,
+#   - scatter traces with more than `max_points` points are decimated: markers are
+#     randomly subsampled (keeping the extreme points, so the axes do not change),
+#     lines are resampled evenly (exact for the straight OLS trendlines),
+#   - hover data the hovertemplate never references (customdata, hovertext) is dropped,
+#   - float64/int64 arrays are downcast to float32/int32; plotly sends numpy arrays
+#     as base64 typed arrays, so this halves their size. Hover and text templates
+#     get a number format so float32 rounding (72.35 → 72.3499984) never shows.
+#
+# Usage (per-figure payload report on a synthetic marksheet):
+#     python -m core_functionality.figure_payload --rows 100000 --subjects 4
+
+# Traces with more points than this are decimated
+DEFAULT_MAX_POINTS = 5_000
+
+# Arrays shorter than this are left at full precision (no measurable gain)
+MIN_DOWNCAST_SIZE = 64
+
+# Significant digits shown for downcast values; float32 keeps about 7
+HOVER_FORMAT = ".6~g"
+
+_POINT_ATTRIBUTES = ("x", "y", "customdata", "text", "hovertext", "ids", "selectedpoints")
+
+
+def payload_bytes(fig):
+    """Size in bytes of the JSON that `st.plotly_chart` sends for `fig`."""
+    import plotly.io as pio
+
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+
+def _format_placeholders(template, axis):
+    """Adds HOVER_FORMAT to unformatted "%{axis}" placeholders of a hover/text template."""
+    if not isinstance(template, str):
+        return template
+    return re.sub(r"%\{" + axis + r"\}", "%{" + axis + ":" + HOVER_FORMAT + "}", template)
+
+
+def _downcast(trace):
+    """Downcasts large numeric x/y/z arrays of a trace; returns how many were downcast."""
+    downcast = 0
+    for axis in ("x", "y", "z"):
+        values = getattr(trace, axis, None)
+        if not isinstance(values, np.ndarray) or values.size < MIN_DOWNCAST_SIZE:
+            continue
+        if values.dtype.kind == "f" and values.dtype.itemsize > 4:
+            trace[axis] = values.astype(np.float32)
+            for template in ("hovertemplate", "texttemplate"):
+                if template in trace:
+                    trace[template] = _format_placeholders(trace[template], axis)
+            downcast += 1
+        elif values.dtype.kind in "iu" and values.dtype.itemsize > 4:
+            info = np.iinfo(np.int32)
+            if values.min() >= info.min and values.max() <= info.max:
+                trace[axis] = values.astype(np.int32)
+                downcast += 1
+    return downcast
+
+
+def _drop_unused_hover(trace):
+    """Removes per-point hover arrays that the trace's hovertemplate never displays."""
+    template = trace["hovertemplate"] if "hovertemplate" in trace else None
+    if not isinstance(template, str):
+        return
+    for attribute in ("customdata", "hovertext"):
+        if attribute in trace and trace[attribute] is not None and f"%{{{attribute}" not in template:
+            trace[attribute] = None
+
+
+def _box_statistics(values, categories):
+    """
+    Per-category box statistics as plotly draws them (1.5 × IQR whisker fences).
+
+    Returns:
+    pd.DataFrame: One row per category (in order of appearance) with
+        q1, median, q3, mean, lowerfence and upperfence columns.
+    """
+    data = pd.DataFrame({"category": categories, "value": values}).dropna(subset=["value"])
+    grouped = data.groupby("category", sort=False)["value"]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    stats["mean"] = grouped.mean()
+
+    # Whiskers end at the most extreme samples inside the 1.5 × IQR fences
+    iqr = stats["q3"] - stats["q1"]
+    low = data["category"].map(stats["q1"] - 1.5 * iqr)
+    high = data["category"].map(stats["q3"] + 1.5 * iqr)
+    inside = data["value"].between(low, high)
+    stats["lowerfence"] = data["value"][inside].groupby(data["category"][inside], sort=False).min()
+    stats["upperfence"] = data["value"][inside].groupby(data["category"][inside], sort=False).max()
+    return stats
+
+
+def _box_outliers(trace, value_axis, category_axis, values, categories, stats):
+    """Marker trace of the samples outside the whisker fences, drawn where the box trace would draw them."""
+    import plotly.graph_objects as go
+
+    low = pd.Series(categories).map(stats["lowerfence"]).to_numpy(dtype=float)
+    high = pd.Series(categories).map(stats["upperfence"]).to_numpy(dtype=float)
+    outside = (values < low) | (values > high)
+    if not outside.any():
+        return None
+
+    marker = trace.marker
+    return go.Scatter(
+        {value_axis: values[outside], category_axis: categories[outside]},
+        mode="markers",
+        name=trace.name,
+        legendgroup=trace.legendgroup or trace.name,
+        showlegend=False,
+        marker=dict(color=marker.outliercolor or marker.color, symbol=marker.symbol, opacity=marker.opacity),
+        hovertemplate=trace.hovertemplate,
+        xaxis=trace.xaxis,
+        yaxis=trace.yaxis,
+        offsetgroup=trace.offsetgroup,
+        alignmentgroup=trace.alignmentgroup,
+        visible=trace.visible,
+    )
+
+
+def _summarize_box(trace, max_points):
+    """
+    Replaces the samples of a large box trace by precomputed statistics.
+
+    Returns:
+    tuple: (points before, points after, marker trace of the outliers or None), or None if left unchanged.
+    """
+    if "q1" in trace and trace["q1"] is not None:
+        return None
+    value_axis, category_axis = ("x", "y") if trace.orientation == "h" else ("y", "x")
+    values = getattr(trace, value_axis)
+    if values is None or len(values) <= max_points:
+        return None
+
+    categories = getattr(trace, category_axis)
+    if categories is None or len(categories) != len(values):
+        # A single box: label it the way plotly would (x0/y0 or the trace name)
+        single = getattr(trace, f"{category_axis}0", None)
+        categories = np.full(len(values), single if single is not None else (trace.name or 0), dtype=object)
+
+    values, categories = np.asarray(values, dtype=float), np.asarray(categories, dtype=object)
+    stats = _box_statistics(values, categories)
+    outliers = _box_outliers(trace, value_axis, category_axis, values, categories, stats)
+    if outliers is not None and trace.legendgroup is None:
+        # Toggling the box in the legend also hides its outliers
+        trace.legendgroup = outliers.legendgroup
+    trace[value_axis] = None
+    trace[category_axis] = stats.index.tolist()
+    for column in ("q1", "median", "q3", "mean", "lowerfence", "upperfence"):
+        trace[column] = stats[column].astype(float).round(4).tolist()
+    trace.boxpoints = False
+    n_outliers = len(outliers[value_axis]) if outliers is not None else 0
+    return len(values), len(stats) + n_outliers, outliers
+
+
+def _decimate_scatter(trace, max_points, rng):
+    """Decimates a large scatter trace in place; returns (before, after) point counts."""
+    x, y = trace.x, trace.y
+    if x is None or y is None or len(x) <= max_points:
+        return None
+    n = len(x)
+
+    mode = trace.mode or "markers"
+    if "markers" not in mode:
+        # Lines: evenly spaced points keep the shape (and a straight trendline exactly)
+        keep = np.unique(np.linspace(0, n - 1, max_points).round().astype(np.int64))
+    else:
+        # Markers: random subsample, always keeping the points that set the axis ranges
+        x_values, y_values = np.asarray(x), np.asarray(y)
+        extremes = set()
+        for values in (x_values, y_values):
+            if values.dtype.kind in "fiu" and len(values):
+                extremes.update((int(np.nanargmin(values)), int(np.nanargmax(values))))
+        sample = rng.choice(n, size=max_points - len(extremes), replace=False)
+        keep = np.unique(np.concatenate([sample, np.fromiter(extremes, dtype=np.int64, count=len(extremes))]))
+
+    for attribute in _POINT_ATTRIBUTES:
+        values = trace[attribute] if attribute in trace else None
+        if values is not None and not isinstance(values, str) and len(values) == n:
+            trace[attribute] = np.asarray(values)[keep]
+    marker = trace.marker
+    for attribute in ("color", "size", "symbol", "opacity"):
+        values = marker[attribute] if marker is not None and attribute in marker else None
+        if values is not None and not isinstance(values, str) and np.ndim(values) == 1 and len(values) == n:
+            marker[attribute] = np.asarray(values)[keep]
+    return n, len(keep)
+
+
+def compact_figure(fig, max_points=DEFAULT_MAX_POINTS, measure=False, seed=0):
+    """
+    Returns a lighter copy of a Plotly figure for display.
+
+    Args:
+    fig (plotly.graph_objects.Figure): The figure to compact (left unchanged).
+    max_points (int): Points per trace above which box traces are summarized and
+        scatter traces decimated.
+    measure (bool): Whether to serialize both figures to report payload sizes.
+    seed (int): Seed of the scatter subsampling, so reruns show the same points.
+
+    Returns:
+    tuple: (compacted figure, report dict)
+        - report["decimated_traces"], report["points_before"], report["points_after"]
+        - report["downcast_arrays"]
+        - report["payload_kb_before"], report["payload_kb"], report["payload_saved_kb"] (if `measure`)
+    """
+    import plotly.graph_objects as go
+
+    rng = np.random.default_rng(seed)
+    compact = go.Figure(fig)
+    report = {"decimated_traces": 0, "points_before": 0, "points_after": 0, "downcast_arrays": 0}
+
+    outlier_traces = []
+    for trace in compact.data:
+        counts = None
+        if trace.type == "box":
+            counts = _summarize_box(trace, max_points)
+            if counts is not None and counts[2] is not None:
+                outlier_traces.append(counts[2])
+        elif trace.type in ("scatter", "scattergl"):
+            counts = _decimate_scatter(trace, max_points, rng)
+        if counts is not None:
+            report["decimated_traces"] += 1
+            report["points_before"] += counts[0]
+            report["points_after"] += counts[1]
+        _drop_unused_hover(trace)
+        report["downcast_arrays"] += _downcast(trace)
+    for trace in outlier_traces:
+        report["downcast_arrays"] += _downcast(trace)
+    compact.add_traces(outlier_traces)
+
+    if measure:
+        before, after = payload_bytes(fig), payload_bytes(compact)
+        report.update(payload_kb_before=round(before / 1024, 1), payload_kb=round(after / 1024, 1),
+                      payload_saved_kb=round((before - after) / 1024, 1))
+    return compact, report
+
+
+def main(argv=None):
+    import analysis.subject_analysis as sa
+    import analysis.teacher_analysis as ta
+    import core_functionality.synthetic_marksheet as synthetic
+
+    parser = argparse.ArgumentParser(description="Report the payload saved by compact_figure on a synthetic marksheet.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--subjects", type=int, default=4)
+    parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS)
+    args = parser.parse_args(argv)
+
+    df, _ = synthetic.generate_marksheet(args.rows, args.subjects, seed=0)
+    subject_names = synthetic.subject_names_for(args.subjects)
+    correlation_fig, boxplot_fig, scatter_figs = sa.analyze_subject_performance(df, subject_names)
+    teacher_df = df[[f"{subject_names[0]} Teacher", f"{subject_names[0]} Attendance", f"{subject_names[0]} Marks"]]
+    teacher_df.columns = ["Teacher", "Attendance", "Marks"]
+    attendance_fig, marks_fig = ta.plot_teacher_distributions(teacher_df)
+
+    figures = [correlation_fig, boxplot_fig, *scatter_figs, attendance_fig, marks_fig]
+    print(f"{'figure':<48}{'before KB':>12}{'after KB':>12}{'saved':>8}")
+    for fig in figures:
+        if fig is None:
+            continue
+        _, report = compact_figure(fig, args.max_points, measure=True)
+        saved = report["payload_saved_kb"] / report["payload_kb_before"] if report["payload_kb_before"] else 0
+        print(f"{fig.layout.title.text[:46]:<48}{report['payload_kb_before']:>12,.1f}{report['payload_kb']:>12,.1f}{saved:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
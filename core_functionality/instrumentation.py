@@ -0,0 +1,255 @@
+import contextvars
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+# Hot-Path Instrumentation
+#
+# `span(name)` wraps one stage of validation or of an analysis and measures:
+#   - wall_ms / cpu_ms:      elapsed wall-clock and process CPU time,
+#   - rss_peak_growth_mb:    how much the process peak RSS grew during the span
+#                            (`resource` on POSIX; psutil's peak working set on
+#                            Windows, else the traced Python allocations),
+#   - tracemalloc_peak_mb:   peak Python allocations above the span's starting
+#                            point (only when tracemalloc is enabled).
+#
+# Every finished span is logged as one JSON line on the "beyondthemarks.perf"
+# logger, and appended to the active collection (see `collect_spans`) so a view
+# can show a per-request performance panel.
+#
+# Environment switches:
+#     BTM_PERF_LOG=stderr|<path>   write the JSON span log to stderr or a file
+#     BTM_TRACEMALLOC=1            enable tracemalloc deltas (adds overhead)
+
+logger = logging.getLogger("beyondthemarks.perf")
+
+_collection = contextvars.ContextVar("perf_span_collection", default=None)
+_stack = contextvars.ContextVar("perf_span_stack", default=())
+_sequence = itertools.count()  # Entry order, used to rebuild the call tree
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats log records as single-line JSON objects."""
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        span_record = getattr(record, "span", None)
+        if span_record is not None:
+            payload["event"] = "span"
+            payload.update(span_record)
+        else:
+            payload["message"] = record.getMessage()
+        return json.dumps(payload, default=str)
+
+
+def configure_json_logging(stream=None, path=None, level=logging.INFO):
+    """
+    Sends span records to `stream` (default stderr) or to `path` as JSON lines.
+
+    Args:
+    stream (file object): Stream to write to. Ignored if `path` is given.
+    path (str): File to append JSON lines to.
+    level (int): Logging level of the perf logger.
+
+    Returns:
+    logging.Handler: The handler that was installed.
+    """
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+
+def enable_tracemalloc():
+    """Starts tracemalloc so spans also report Python allocation peaks."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        # Without either, only Python allocations are visible (0 unless tracemalloc is on)
+        return tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+@contextmanager
+def span(name, **fields):
+    """
+    Measures a named stage. Extra keyword arguments (and anything the caller adds
+    to the yielded dict) are stored with the record; keep them JSON-serializable.
+
+    Args:
+    name (str): Dotted stage name, e.g. "validate.read" or "bias.shap".
+
+    Yields:
+    dict: The span record, filled with the measurements when the block exits.
+    """
+    parent_stack = _stack.get()
+    record = {"name": name, "seq": next(_sequence), "depth": len(parent_stack), "parent": parent_stack[-1]["name"] if parent_stack else None}
+    record.update(fields)
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        start_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+    record["_child_peak"] = 0
+
+    token = _stack.set(parent_stack + (record,))
+    rss_before = _peak_rss_mb()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["wall_ms"] = round((time.perf_counter() - wall_start) * 1000, 3)
+        record["cpu_ms"] = round((time.process_time() - cpu_start) * 1000, 3)
+        record["rss_peak_growth_mb"] = round(_peak_rss_mb() - rss_before, 3)
+        _stack.reset(token)
+
+        child_peak = record.pop("_child_peak")
+        if tracing and tracemalloc.is_tracing():
+            # Nested spans reset the tracemalloc peak, so fold their peaks back in
+            peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+            record["tracemalloc_peak_mb"] = round((peak - start_current) / (1024 * 1024), 3)
+            if parent_stack:
+                parent_stack[-1]["_child_peak"] = max(parent_stack[-1]["_child_peak"], peak)
+
+        collection = _collection.get()
+        if collection is not None:
+            collection.append(record)
+        logger.info(name, extra={"span": record})
+
+
+def start_collection():
+    """
+    Starts collecting finished spans for the current request (e.g. one Streamlit rerun).
+
+    Returns:
+    list: The list that finished span records are appended to.
+    """
+    collection = []
+    _collection.set(collection)
+    return collection
+
+
+@contextmanager
+def collect_spans():
+    """Context-manager form of `start_collection` that restores the previous collection on exit."""
+    collection = []
+    token = _collection.set(collection)
+    try:
+        yield collection
+    finally:
+        _collection.reset(token)
+
+
+def spans_to_rows(records):
+    """
+    Orders span records as a call tree (parents before children) for display.
+
+    Args:
+    records (list): Span records in completion order.
+
+    Returns:
+    list: Display rows with the stage name indented by depth.
+    """
+    columns = ("wall_ms", "cpu_ms", "rss_peak_growth_mb", "tracemalloc_peak_mb")
+    # Figure payload sizes are only present on measured render spans
+    columns += tuple(c for c in ("payload_kb", "payload_saved_kb") if any(c in r for r in records))
+    return [
+        {"stage": "  " * r["depth"] + r["name"], **{c: r.get(c) for c in columns}}
+        for r in sorted(records, key=lambda r: r["seq"])
+    ]
+
+
+def payload_reporting_enabled():
+    """Whether figure payload sizes should be measured (perf log configured or panel shown)."""
+    import streamlit as st
+
+    return bool(logger.handlers) or bool(st.session_state.get("show_performance_panel"))
+
+
+def timed_plotly_chart(fig, compact=True, measure_payload=None, **kwargs):
+    """
+    Calls `st.plotly_chart` inside a "render.plotly_chart" span, so figure
+    serialization shows up in the performance panel.
+
+    Args:
+    fig (plotly.graph_objects.Figure): The figure to display.
+    compact (bool): Send a compacted copy (see core_functionality/figure_payload.py).
+    measure_payload (bool): Record the payload size before/after compaction in the
+        span. None measures only when `payload_reporting_enabled()`.
+    **kwargs: Passed on to `st.plotly_chart`.
+    """
+    import streamlit as st
+
+    title = fig.layout.title.text if fig.layout.title else None
+    with span("render.plotly_chart", title=title) as record:
+        if compact:
+            from core_functionality.figure_payload import compact_figure
+
+            if measure_payload is None:
+                measure_payload = payload_reporting_enabled()
+            fig, report = compact_figure(fig, measure=measure_payload)
+            record.update(report)
+        st.plotly_chart(fig, **kwargs)
+
+
+def performance_panel_toggle(label="⏱️ Show performance panel"):
+    """Sidebar switch for the optional performance panel; remembered per session."""
+    import streamlit as st
+
+    return st.sidebar.toggle(label, key="show_performance_panel")
+
+
+def render_performance_panel(records, title="⏱️ Performance"):
+    """
+    Shows the collected spans of this rerun in a collapsed Streamlit expander.
+
+    Args:
+    records (list): Span records from `start_collection`.
+    title (str): Expander label.
+    """
+    import streamlit as st
+
+    with st.expander(title, expanded=False):
+        if not records:
+            st.write("No instrumented stages ran in this rerun.")
+            return
+        top_level = [r for r in records if r["depth"] == 0]
+        st.caption(f"{len(records)} spans · {sum(r['wall_ms'] for r in top_level):,.1f} ms in top-level stages")
+        st.dataframe(spans_to_rows(records), use_container_width=True)
+
+
+# Opt-in configuration through the environment
+if os.environ.get("BTM_PERF_LOG") and not logger.handlers:
+    target = os.environ["BTM_PERF_LOG"]
+    configure_json_logging(path=None if target.lower() == "stderr" else target)
+
+if os.environ.get("BTM_TRACEMALLOC", "").strip().lower() in ("1", "true", "yes", "on"):
+    enable_tracemalloc()
@@ -0,0 +1,93 @@
+# Lazy Per-Subject Figures
+#
+# Building a figure per subject up front makes a 40-subject marksheet wait for
+# 40 scatter plots (or 80 teacher box plots) before anything is shown, although
+# the views display one subject at a time. `LazyFigures` keeps the subjects and a
+# builder instead, and builds each subject's figure(s) the first time it is
+# requested. It can still be iterated or indexed like the list it replaces (which
+# builds everything, as before).
+#
+# `subject_selector` is the matching Streamlit widget: it picks one subject to
+# show, with the first subject selected so its figure is displayed right away.
+
+
+class LazyFigures:
+    """
+    Per-key figures that are built on first access and then kept.
+
+    Args:
+    keys (iterable): Subjects (or other labels) in display order.
+    build (callable): Maps a key to its figure (or tuple of figures).
+    """
+    def __init__(self, keys, build):
+        self.keys = list(keys)
+        self._build = build
+        self._figures = {}
+
+    def get(self, key):
+        """Returns the figure(s) for `key`, building them on first access."""
+        if key not in self._figures:
+            if key not in self.keys:
+                raise KeyError(key)
+            self._figures[key] = self._build(key)
+        return self._figures[key]
+
+    def thunk(self, key):
+        """Returns a zero-argument callable that builds (or returns) the figure(s) for `key`."""
+        return lambda: self.get(key)
+
+    def adopt(self, other, exclude=()):
+        """
+        Takes over the figures `other` has already built, except those of `exclude`.
+
+        Used when the data changed: a fresh LazyFigures over the new data keeps the
+        figures of the keys whose data did not change and rebuilds the others.
+        """
+        for key, figure in other._figures.items():
+            if key in self.keys and key not in exclude:
+                self._figures.setdefault(key, figure)
+
+    def is_built(self, key):
+        return key in self._figures
+
+    def items(self):
+        for key in self.keys:
+            yield key, self.get(key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        for key in self.keys:
+            yield self.get(key)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get(key) for key in self.keys[index]]
+        return self.get(self.keys[index])
+
+    def __repr__(self):
+        return f"LazyFigures({len(self._figures)}/{len(self.keys)} built)"
+
+
+def subject_selector(subjects, key, label="Subject", max_tabs=8):
+    """
+    Streamlit selector for the subject whose figures are shown.
+
+    Few subjects are shown as a horizontal row of options (like tabs); longer
+    lists use a searchable drop-down. The first subject is selected initially.
+
+    Args:
+    subjects (list): Subject names to choose from.
+    key (str): Widget key, so the choice survives reruns.
+    label (str): Widget label.
+    max_tabs (int): Largest number of subjects shown as a row of options.
+
+    Returns:
+    str: The selected subject.
+    """
+    import streamlit as st
+
+    if len(subjects) <= max_tabs:
+        return st.radio(label, subjects, horizontal=True, key=key)
+    return st.selectbox(f"{label} ({len(subjects)})", subjects, key=key)
@@ -0,0 +1,129 @@
+import pandas as pd
+import core_functionality.data_validator as dv
+from core_functionality.instrumentation import span
+
+# In-App Marksheet Editing
+#
+# `EditableMarksheet` holds an uploaded marksheet (valid or rejected) while it
+# is edited in a grid. Edits arrive as the cell-level changes of Streamlit's
+# `st.data_editor` ({"edited_rows", "added_rows", "deleted_rows"}) and are
+# applied to the touched columns only; only those columns are then re-checked
+# with the `validate_data` rules and re-rounded. The changed columns are
+# returned, so cached analyses depending on them can be refreshed.
+
+# Columns no analysis reads: editing them leaves every result valid
+ANALYSIS_IGNORED_COLUMNS = ("Name", "Roll No")
+
+
+class EditableMarksheet:
+    """
+    A marksheet being edited, with its per-column validation errors.
+
+    Args:
+    df (pd.DataFrame): The marksheet as loaded (structure already checked).
+    subject_names (np.ndarray): Subjects detected by `check_structure`.
+
+    Attributes:
+    errors (dict): {column: message} of the failed checks; empty when valid.
+    version (int): Bumped on every applied edit (e.g. to key the editor widget).
+    """
+    def __init__(self, df, subject_names):
+        self.df = df
+        self.subject_names = subject_names
+        self.version = 0
+        dv.coerce_numeric(df)
+        self.errors = dv.column_errors(df)
+        dv.round_columns(df, [col for col in df.columns if col not in self.errors])
+
+    @classmethod
+    def from_file(cls, file):
+        """
+        Loads an uploaded file; its values may be invalid, its columns may not.
+
+        Raises:
+        InvalidExtensionError, CorruptedFileError, InvalidDataStructureError,
+        UnknownColumnError: As `validate_and_convert_file`.
+        """
+        df = dv.load_file(file)
+        subject_names = dv.check_structure(df)
+        return cls(df, subject_names)
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def apply_edits(self, edits):
+        """
+        Applies the changes of an `st.data_editor` and revalidates the touched columns.
+
+        Args:
+        edits (dict): {"edited_rows": {position: {column: value}}, "added_rows": [{column: value}],
+            "deleted_rows": [position]}; positions refer to the rows of `self.df`.
+
+        Returns:
+        list: The changed columns, or None when rows were added or deleted (every column changed).
+        """
+        edited_rows = edits.get("edited_rows", {})
+        added_rows = edits.get("added_rows", [])
+        deleted_rows = edits.get("deleted_rows", [])
+
+        with span("editor.apply", cells=sum(len(row) for row in edited_rows.values()),
+                  added=len(added_rows), deleted=len(deleted_rows)):
+            # Cell edits, one column at a time (the column keeps a single dtype)
+            by_column = {}
+            for position, row in edited_rows.items():
+                for column, value in row.items():
+                    by_column.setdefault(column, {})[int(position)] = value
+            for column, cells in by_column.items():
+                values = self.df[column].to_numpy(dtype=object, copy=True)
+                values[list(cells)] = list(cells.values())
+                self.df[column] = pd.Series(values, index=self.df.index, name=column).infer_objects()
+
+            if deleted_rows or added_rows:
+                df = self.df.drop(index=self.df.index[list(deleted_rows)])
+                if added_rows:
+                    df = pd.concat([df, pd.DataFrame(added_rows, columns=df.columns)], ignore_index=True)
+                self.df = df.reset_index(drop=True)
+                changed = None
+            else:
+                changed = list(by_column)
+
+        self.revalidate(changed)
+        self.version += 1
+        return changed
+
+    def revalidate(self, columns=None):
+        """Re-checks and re-rounds `columns` (default: all); errors of other columns are kept."""
+        with span("editor.revalidate", columns=len(self.df.columns) if columns is None else len(columns)):
+            dv.coerce_numeric(self.df, columns)
+            if columns is None:
+                self.errors = {}
+            else:
+                roll_columns = {"Roll No", *dv.PARTITION_COLUMNS}
+                stale = set(columns) | ({"Roll No"} if not roll_columns.isdisjoint(columns) else set())
+                self.errors = {col: message for col, message in self.errors.items() if col not in stale}
+            new_errors = dv.column_errors(self.df, columns)
+            checked = self.df.columns if columns is None else columns
+            dv.round_columns(self.df, [col for col in checked if col not in new_errors])
+            self.errors = {**self.errors, **new_errors}
+
+    def affected_subjects(self, changed):
+        """
+        Subjects whose analyses read one of the `changed` columns.
+
+        Returns:
+        set: Subject names, or None if every subject is affected (rows added or
+            deleted, or a shared column such as Gender, Religion or Term changed).
+        """
+        if changed is None:
+            return None
+        subjects = set()
+        for column in changed:
+            if column in ANALYSIS_IGNORED_COLUMNS:
+                continue
+            subject = next((name for name in self.subject_names
+                            if column in (f"{name} Attendance", f"{name} Marks", f"{name} Teacher")), None)
+            if subject is None:
+                return None
+            subjects.add(subject)
+        return subjects
@@ -0,0 +1,58 @@
+import importlib
+import os
+import threading
+
+# Heavy libraries used by the analyses, in the order they are usually needed.
+# Pages import them lazily; pre-warming loads them in a background thread after
+# the first page has been painted so the first analysis click does not pay for it.
+HEAVY_MODULES = (
+    "plotly.express",
+    "scipy.stats",
+    "statsmodels.api",
+    "sklearn.preprocessing",
+    "wordcloud",
+)
+
+# Set BTM_PREWARM=0 to disable background pre-warming (e.g. on memory-tight hosts).
+PREWARM_ENV_VAR = "BTM_PREWARM"
+
+_prewarm_thread = None
+_prewarm_lock = threading.Lock()
+
+
+def prewarm_enabled():
+    """Returns False when pre-warming has been disabled through the environment."""
+    return os.environ.get(PREWARM_ENV_VAR, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # A missing optional library must never break the app; the analysis
+            # that needs it will surface the error when it actually runs.
+            pass
+
+
+def start_prewarm(modules=HEAVY_MODULES):
+    """
+    Imports the heavy analysis libraries in a daemon thread, once per process.
+
+    Args:
+    modules (iterable): Module names to import.
+
+    Returns:
+    threading.Thread or None: The pre-warm thread, or None if disabled.
+    """
+    global _prewarm_thread
+
+    if not prewarm_enabled():
+        return None
+
+    with _prewarm_lock:
+        if _prewarm_thread is None:
+            _prewarm_thread = threading.Thread(target=_import_all, args=(tuple(modules),), name="prewarm-imports", daemon=True)
+            _prewarm_thread.start()
+
+    return _prewarm_thread
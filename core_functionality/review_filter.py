@@ -0,0 +1,128 @@
+import re
+from collections import Counter
+
+# Compiled Review Filter
+#
+# Reviews containing laughter ("lol", "haha", ...) or vandalism words are not
+# saved, and stop words are left out of the word counts. Instead of lowercasing
+# every word several times and scanning FILTER_WORDS one by one, the engine
+# compiles all rules into one regular expression up front:
+#   - the filter words are merged into a prefix trie and emitted as a factored
+#     alternation (e.g. "l(?:aughing|o(?:lis|ud))"), so at each text position
+#     the regex engine walks one trie branch instead of trying every word, the
+#     same idea as an Aho-Corasick automaton,
+#   - the "lol" variations (l+o+l+, "loool", ...) are part of the same pattern.
+#
+# Because the patterns only contain letters, a match never spans two words, so
+# one search over the whole lowercased review replaces the per-word checks.
+
+TOKEN_PATTERN = re.compile(r"\b\w+\b")
+
+# "lol" stretched or repeated ("lool", "llol", "lolll"); the trailing
+# punctuation of the original rule never changes whether a word matches
+LAUGHTER_PATTERN = r"l+o+l"
+
+
+def _trie_pattern(words):
+    """
+    Builds a prefix-factored regex alternation matching any of `words`.
+
+    Args:
+    words (iterable): Literal words.
+
+    Returns:
+    str: Regex source, e.g. "ha(?:ha|he)" for {"haha", "hahe"}.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a word
+
+    def emit(node):
+        if set(node) == {""}:
+            return ""
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        optional = "" in node  # A word ends here, so the continuation is optional
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if optional else group
+
+    return emit(trie)
+
+
+class ReviewFilter:
+    """
+    Precompiled laughter/vandalism filter and word counter for reviews.
+
+    Args:
+    filter_words (iterable): Words that reject a review when found anywhere inside a word.
+    stopwords (iterable): Words left out of the word counts.
+    extra_patterns (iterable): Additional regex sources that reject a review (default: "lol" variations).
+    """
+    def __init__(self, filter_words, stopwords, extra_patterns=(LAUGHTER_PATTERN,)):
+        self.filter_words = frozenset(word.lower() for word in filter_words)
+        self.stopwords = frozenset(word.lower() for word in stopwords)
+
+        sources = list(extra_patterns)
+        if self.filter_words:
+            sources.append(_trie_pattern(self.filter_words))
+        self.pattern = re.compile("|".join(sources)) if sources else None
+
+    def is_filtered(self, word):
+        """Whether `word` contains a laughter/vandalism pattern."""
+        return self.pattern is not None and self.pattern.search(word.lower()) is not None
+
+    def should_count_word(self, word):
+        """Whether `word` belongs in the word counts (not a stop word and not filtered)."""
+        word = word.lower()
+        return word not in self.stopwords and not self.is_filtered(word)
+
+    def contains_filtered_words(self, review):
+        """Whether any word of `review` contains a laughter/vandalism pattern."""
+        # The patterns only contain letters, so a match can never span whitespace:
+        # one search over the whole text equals checking every word
+        return self.is_filtered(review)
+
+    def count_review(self, review):
+        """
+        Filters, tokenizes and counts a review.
+
+        The text is lowercased once and searched once with the compiled pattern
+        (rejecting as soon as a filtered word is found), then tokenized and
+        counted in C by `findall` and `Counter`. Stop words are removed from the
+        distinct words afterwards instead of being checked token by token.
+
+        Args:
+        review (str): The submitted text.
+
+        Returns:
+        Counter: Word → occurrences (stop words left out), or None if the review
+            contains a filtered word and must not be saved.
+        """
+        review = review.lower()
+        if self.pattern is not None and self.pattern.search(review):
+            return None
+        counts = Counter(TOKEN_PATTERN.findall(review))
+        for word in self.stopwords.intersection(counts):
+            del counts[word]
+        return counts
+
+    def filter_counts(self, word_counts):
+        """
+        Keeps the countable words of an existing word → frequency map, merging case variants.
+
+        Args:
+        word_counts (Counter/dict): Word → frequency.
+
+        Returns:
+        Counter: Lowercased word → frequency.
+        """
+        filtered = Counter()
+        for word, freq in word_counts.items():
+            word = word.lower()
+            if word not in self.stopwords and not self.is_filtered(word):
+                filtered[word] += freq
+        return filtered
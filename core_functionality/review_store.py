@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from contextlib import closing, contextmanager
+
+# Concurrency-Safe Review Storage
+#
+# Reviews and word counts live in one SQLite database in WAL mode, so readers
+# never block the writer and every submission is a single short transaction:
+#   - the review is appended and the table trimmed to the recent window,
+#   - word counts are incremented atomically with an UPSERT (no read-modify-write),
+#   - a version counter is bumped so caches (e.g. the word cloud) know to refresh.
+# Many simultaneous writers (threads or processes) are serialized by SQLite's
+# write lock; `busy_timeout` makes them wait instead of failing.
+#
+# On first use the legacy JSON files are imported once.
+
+DB_PATH = "reviews/reviews.db"
+LEGACY_REVIEW_PATH = "reviews/recent_reviews.json"
+LEGACY_WORD_COUNT_PATH = "reviews/word_count.json"
+REVIEW_LIMIT = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS word_counts (
+    word TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class ReviewStore:
+    """
+    SQLite-backed store for recent reviews and word counts.
+
+    Args:
+    path (str): Database file.
+    review_limit (int): Number of most recent reviews kept.
+    timeout (float): Seconds a writer waits for the write lock before giving up.
+    legacy_review_path (str): JSON list of reviews imported on first use (if present).
+    legacy_word_count_path (str): JSON word → count map imported on first use (if present).
+    """
+    def __init__(self, path=DB_PATH, review_limit=REVIEW_LIMIT, timeout=30.0,
+                 legacy_review_path=LEGACY_REVIEW_PATH, legacy_word_count_path=LEGACY_WORD_COUNT_PATH):
+        self.path = path
+        self.review_limit = review_limit
+        self.timeout = timeout
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._create_schema()
+        self._import_legacy(legacy_review_path, legacy_word_count_path)
+
+    # ---- connection handling ----
+
+    def _connect(self):
+        # A fresh connection per operation keeps the store safe to share across
+        # Streamlit's script threads; connections are cheap for a local file.
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the block in a write transaction taken up front (BEGIN IMMEDIATE)."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _create_schema(self):
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _import_legacy(self, review_path, word_count_path):
+        """Imports the old JSON files once; the `legacy_imported` flag makes it idempotent."""
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return
+
+            if review_path and os.path.exists(review_path):
+                with open(review_path, "r", encoding="utf-8") as file:
+                    reviews = json.load(file)
+                now = time.time()
+                conn.executemany("INSERT INTO reviews (text, created_at) VALUES (?, ?)",
+                                 [(text, now) for text in reviews[-self.review_limit:]])
+
+            if word_count_path and os.path.exists(word_count_path):
+                with open(word_count_path, "r", encoding="utf-8") as file:
+                    self._increment(conn, Counter(json.load(file)))
+
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', 1)")
+            self._bump_version(conn)
+
+    # ---- writes ----
+
+    @staticmethod
+    def _increment(conn, counts):
+        conn.executemany(
+            "INSERT INTO word_counts (word, count) VALUES (?, ?) "
+            "ON CONFLICT(word) DO UPDATE SET count = count + excluded.count",
+            [(word, int(count)) for word, count in counts.items() if count],
+        )
+
+    @staticmethod
+    def _bump_version(conn):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def add_review(self, text, word_counts=None):
+        """
+        Appends a review and increments its word counts in one atomic transaction.
+
+        Args:
+        text (str): The review text.
+        word_counts (Counter/dict): Word → occurrences to add (already filtered).
+
+        Returns:
+        int: The new data version.
+        """
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO reviews (text, created_at) VALUES (?, ?)", (text, time.time()))
+            # Keep only the most recent window of reviews
+            conn.execute(
+                "DELETE FROM reviews WHERE id <= (SELECT MAX(id) FROM reviews) - ?",
+                (self.review_limit,),
+            )
+            if word_counts:
+                self._increment(conn, word_counts)
+            self._bump_version(conn)
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    # ---- reads ----
+
+    def recent_reviews(self):
+        """Returns the most recent reviews, oldest first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT text FROM reviews ORDER BY id DESC LIMIT ?", (self.review_limit,)
+            ).fetchall()
+        return [text for (text,) in reversed(rows)]
+
+    def word_counts(self):
+        """Returns all word counts as a Counter."""
+        with closing(self._connect()) as conn:
+            return Counter(dict(conn.execute("SELECT word, count FROM word_counts").fetchall()))
+
+    def version(self):
+        """Monotonic counter bumped on every write; use it to key caches derived from the data."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
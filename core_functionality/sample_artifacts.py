@@ -0,0 +1,164 @@
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+import core_functionality.data_validator as dv
+import analysis.teacher_analysis as ta
+import analysis.subject_analysis as sa
+import bias_analysis.bias_detection as bd
+
+# Precomputed Results for the Synthetic Analysis Page
+#
+# The sample marksheet is identical for every visitor, so every analysis on it
+# is run once and stored as a single JSON artifact (tables as "split" JSON,
+# figures as Plotly JSON). The page only loads and displays the artifact.
+#
+# Build it ahead of time (e.g. in a deploy step) with:
+#     python -m core_functionality.sample_artifacts
+# Otherwise it is built on first use and reused afterwards. The artifact is
+# rebuilt automatically whenever the sample file or ARTIFACT_VERSION changes.
+
+SAMPLE_PATH = "samplefiles/test4.csv"
+ARTIFACT_PATH = "samplefiles/artifacts/sample_analysis.json"
+
+# Bump when the shape of the artifact or of the figures changes.
+ARTIFACT_VERSION = 4
+
+BIAS_FACTORS = ("Gender", "Religion")
+
+
+def file_sha256(path):
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _figure_json(fig):
+    return None if fig is None else json.loads(fig.to_json())
+
+
+def _table_json(df):
+    return None if df is None else json.loads(df.to_json(orient="split"))
+
+
+def _teacher_artifacts(df, subject_names):
+    """Teacher scores matrix plus the two distribution plots for each subject with a teacher."""
+    teacher_scores = ta.analyze_all_teachers(df, subject_names)
+    teacher_figures = ta.teacher_distribution_figures(df, subject_names)
+
+    subjects = []
+    for subject, (attendance_fig, marks_fig) in teacher_figures.items():
+        subjects.append({
+            "subject": subject,
+            "has_scores": any(teacher_scores[subject].values()),
+            "attendance_fig": _figure_json(attendance_fig),
+            "marks_fig": _figure_json(marks_fig),
+        })
+
+    score_matrix = ta.teacher_score_matrix(teacher_scores)
+    if score_matrix is not None:
+        score_matrix = score_matrix.reset_index()
+
+    return {"subjects": subjects, "score_matrix": _table_json(score_matrix)}
+
+
+def _bias_artifacts(df, subject_names, factor):
+    """Bias figure (or the reason it could not be computed) for every subject."""
+    if factor not in df.columns:
+        return {"available": False, "subjects": []}
+
+    subjects = []
+    bias_figures = bd.bias_figures(df, subject_names, factor)
+    for subject in subject_names:
+        try:
+            subjects.append({"subject": subject, "figure": _figure_json(bias_figures.get(subject))})
+        except ValueError as e:
+            subjects.append({"subject": subject, "error": str(e)})
+
+    return {"available": True, "subjects": subjects}
+
+
+def _subject_artifacts(df, subject_names):
+    correlation_fig, boxplot_fig, scatter_list = sa.analyze_subject_performance(df, subject_names)
+    return {
+        "correlation": _figure_json(correlation_fig),
+        "boxplot": _figure_json(boxplot_fig),
+        "scatter": [_figure_json(fig) for fig in scatter_list],
+    }
+
+
+def build_sample_artifacts(sample_path=SAMPLE_PATH, artifact_path=ARTIFACT_PATH):
+    """
+    Runs every analysis on the sample marksheet and writes the results to `artifact_path`.
+
+    Args:
+    sample_path (str): Path of the bundled sample CSV.
+    artifact_path (str): Where to write the JSON artifact.
+
+    Returns:
+    dict: The artifact that was written.
+    """
+    with open(sample_path, "rb") as file:
+        marksheet = io.BytesIO(file.read())
+    marksheet.name = os.path.basename(sample_path)
+    df, subject_names = dv.validate_and_convert_file(marksheet)
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "source_sha256": file_sha256(sample_path),
+        "data": _table_json(df),
+        "subject_names": subject_names.tolist(),
+        "teachers": _teacher_artifacts(df, subject_names),
+        "bias": {factor: _bias_artifacts(df, subject_names, factor) for factor in BIAS_FACTORS},
+        "subjects": _subject_artifacts(df, subject_names),
+    }
+
+    # Write atomically so concurrent sessions never read a half-written file
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(artifact, file)
+    os.replace(tmp_path, artifact_path)
+
+    return artifact
+
+
+def load_sample_artifacts(sample_path=SAMPLE_PATH, artifact_path=ARTIFACT_PATH):
+    """
+    Loads the precomputed artifact, rebuilding it if it is missing or stale.
+
+    Args:
+    sample_path (str): Path of the bundled sample CSV.
+    artifact_path (str): Location of the JSON artifact.
+
+    Returns:
+    dict: The artifact (figures as Plotly JSON dicts, tables as "split" JSON dicts).
+    """
+    if os.path.exists(artifact_path):
+        try:
+            with open(artifact_path, encoding="utf-8") as file:
+                artifact = json.load(file)
+            if artifact.get("version") == ARTIFACT_VERSION and artifact.get("source_sha256") == file_sha256(sample_path):
+                return artifact
+        except (OSError, ValueError):
+            pass  # Unreadable artifact: rebuild it below
+
+    return build_sample_artifacts(sample_path, artifact_path)
+
+
+def table_from_artifact(table):
+    """Turns a "split" JSON table from the artifact back into a DataFrame."""
+    if table is None:
+        return None
+    return pd.DataFrame(table["data"], index=table["index"], columns=table["columns"])
+
+
+if __name__ == "__main__":
+    artifact = build_sample_artifacts()
+    print(f"Wrote {ARTIFACT_PATH} (version {artifact['version']}, source {artifact['source_sha256'][:12]})")
@@ -0,0 +1,209 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Synthetic Marksheet Generator
+#
+# Produces marksheets in exactly the schema accepted by `validate_and_convert_file`
+# (Roll No, Name, Gender, Religion, "[Subject] Marks/Attendance/Teacher"), with
+# known, injected effects so analyses can be load-tested and checked for recovery:
+#
+#     Marks = 20 + slope × Attendance + ability + teacher_effect + Σ bias_effect + noise
+#
+# Everything is generated with vectorized NumPy draws, one array per column.
+#
+# Usage:
+#     python -m core_functionality.synthetic_marksheet --students 1000000 --subjects 8 --teachers 5 --out big.csv
+
+DEFAULT_SUBJECTS = ("Maths", "Science", "English", "SS", "EVS", "Hindi", "Computer", "Sanskrit")
+
+# Gender and Religion keep ≤4 categories, which is what `detect_bias` supports.
+DEFAULT_GENDER_DISTRIBUTION = {"Male": 0.49, "Female": 0.49, "Trans": 0.02}
+DEFAULT_RELIGION_DISTRIBUTION = {"Hindu": 0.6, "Muslim": 0.2, "Christian": 0.1, "Sikh": 0.1}
+
+EXCEL_MAX_ROWS = 1_048_575  # One row of the sheet is taken by the header
+
+
+def subject_names_for(n_subjects):
+    """Returns `n_subjects` subject names, using the defaults first and then 'Subject N'."""
+    names = list(DEFAULT_SUBJECTS[:n_subjects])
+    names += [f"Subject {i + 1}" for i in range(len(names), n_subjects)]
+    return names
+
+
+def _draw_categories(rng, distribution, size):
+    """Draws `size` labels from a {label: weight} distribution (weights need not sum to 1)."""
+    labels = np.array(list(distribution.keys()), dtype=object)
+    weights = np.array(list(distribution.values()), dtype=float)
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("Distribution weights must be non-negative and not all zero.")
+    return labels[rng.choice(len(labels), size=size, p=weights / weights.sum())]
+
+
+def _category_effect(labels, effects):
+    """Maps each label to its injected marks shift (0 for labels without an effect)."""
+    shift = np.zeros(len(labels))
+    for label, effect in effects.items():
+        shift[labels == label] = effect
+    return shift
+
+
+def generate_marksheet(n_students, n_subjects=4, teachers_per_subject=3,
+                       gender_distribution=None, religion_distribution=None,
+                       teacher_effect_sd=5.0, bias_effects=None,
+                       attendance_slope=0.6, ability_sd=8.0, noise_sd=6.0,
+                       include_names=True, seed=None):
+    """
+    Generates a synthetic marksheet with injected teacher and bias effects.
+
+    Args:
+    n_students (int): Number of rows (students).
+    n_subjects (int): Number of subjects; names come from `subject_names_for`.
+    teachers_per_subject (int): Teachers per subject (0 omits the Teacher columns).
+    gender_distribution (dict): {label: weight} for the Gender column. None uses
+        DEFAULT_GENDER_DISTRIBUTION; an empty dict omits the column.
+    religion_distribution (dict): {label: weight} for the Religion column. None uses
+        DEFAULT_RELIGION_DISTRIBUTION; an empty dict omits the column.
+    teacher_effect_sd (float): Std. dev. of the per-teacher marks shift.
+    bias_effects (dict): Injected marks shifts, e.g. {"Gender": {"Female": -3.0}, "Religion": {"Muslim": -5.0}}.
+    attendance_slope (float): Marks gained per attendance point.
+    ability_sd (float): Std. dev. of the per-student ability shared across subjects.
+    noise_sd (float): Std. dev. of the per-mark noise.
+    include_names (bool): Whether to add the optional Name column.
+    seed (int): Random seed for reproducible output.
+
+    Returns:
+    tuple: (Pandas DataFrame, dict of the injected effects)
+        - effects["teachers"]: {subject: {teacher_name: marks_shift}}
+        - effects["bias"]: the `bias_effects` that were applied
+    """
+    if n_students < 1 or n_subjects < 1:
+        raise ValueError("n_students and n_subjects must be at least 1.")
+
+    rng = np.random.default_rng(seed)
+    bias_effects = bias_effects or {}
+    if gender_distribution is None:
+        gender_distribution = DEFAULT_GENDER_DISTRIBUTION
+    if religion_distribution is None:
+        religion_distribution = DEFAULT_RELIGION_DISTRIBUTION
+
+    columns = {"Roll No": np.arange(1, n_students + 1, dtype=np.int64)}
+    if include_names:
+        columns["Name"] = "Student " + pd.Series(columns["Roll No"]).astype(str)
+
+    # Demographics and the total injected bias shift per student
+    bias_shift = np.zeros(n_students)
+    for factor, distribution in (("Gender", gender_distribution), ("Religion", religion_distribution)):
+        if not distribution:
+            continue
+        labels = _draw_categories(rng, distribution, n_students)
+        columns[factor] = labels
+        bias_shift += _category_effect(labels, bias_effects.get(factor, {}))
+
+    ability = rng.normal(0.0, ability_sd, n_students)
+    effects = {"teachers": {}, "bias": bias_effects}
+
+    for subject in subject_names_for(n_subjects):
+        attendance = np.clip(rng.normal(80.0, 12.0, n_students), 0, 100)
+        marks = 20.0 + attendance_slope * attendance + ability + bias_shift + rng.normal(0.0, noise_sd, n_students)
+
+        teacher_labels = None
+        if teachers_per_subject > 0:
+            teacher_names = np.array([f"{subject} Teacher {t + 1}" for t in range(teachers_per_subject)], dtype=object)
+            teacher_effect = rng.normal(0.0, teacher_effect_sd, teachers_per_subject)
+            teacher_idx = rng.integers(0, teachers_per_subject, n_students)
+            marks += teacher_effect[teacher_idx]
+            teacher_labels = teacher_names[teacher_idx]
+            effects["teachers"][subject] = dict(zip(teacher_names.tolist(), teacher_effect.round(4).tolist()))
+
+        columns[f"{subject} Marks"] = np.clip(marks, 0, 100).round(2)
+        columns[f"{subject} Attendance"] = attendance.round(2)
+        if teacher_labels is not None:
+            columns[f"{subject} Teacher"] = teacher_labels
+
+    return pd.DataFrame(columns), effects
+
+
+def write_marksheet(df, path, chunksize=250_000):
+    """
+    Writes a marksheet to CSV, Excel or Parquet, chosen by the file extension.
+
+    Args:
+    df (pd.DataFrame): The marksheet to write.
+    path (str): Destination ending in .csv, .xlsx or .parquet.
+    chunksize (int): Rows per write batch for CSV output when pyarrow is not installed.
+
+    Raises:
+    ValueError: If the extension is unsupported or the sheet is too large for Excel.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".csv":
+        try:
+            # pyarrow's multithreaded CSV writer is several times faster than pandas
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            df.to_csv(path, index=False, chunksize=chunksize)
+        else:
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    elif extension in (".xlsx", ".xlsm"):
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} data rows; write CSV or Parquet instead.")
+        df.to_excel(path, index=False)
+    elif extension == ".parquet":
+        try:
+            import pyarrow  # noqa: F401  (optional dependency, only needed for Parquet)
+        except ImportError:
+            raise ValueError("Writing Parquet requires the optional 'pyarrow' package (pip install pyarrow).")
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError("Output must end with .csv, .xlsx or .parquet.")
+
+
+def _parse_distribution(text):
+    """Parses 'Male=0.5,Female=0.5' into {'Male': 0.5, 'Female': 0.5}."""
+    distribution = {}
+    for item in text.split(","):
+        label, weight = item.split("=")
+        distribution[label.strip()] = float(weight)
+    return distribution
+
+
+def _parse_bias(items):
+    """Parses ['Gender:Female=-3', 'Religion:Muslim=-5'] into a bias_effects dict."""
+    bias_effects = {}
+    for item in items or []:
+        factor, assignment = item.split(":", 1)
+        label, effect = assignment.split("=")
+        bias_effects.setdefault(factor.strip(), {})[label.strip()] = float(effect)
+    return bias_effects
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic marksheet with injected teacher and bias effects.")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=4)
+    parser.add_argument("--teachers", type=int, default=3, help="Teachers per subject (0 for no Teacher columns).")
+    parser.add_argument("--gender", type=_parse_distribution, help="e.g. Male=0.49,Female=0.49,Trans=0.02")
+    parser.add_argument("--religion", type=_parse_distribution, help="e.g. Hindu=0.6,Muslim=0.2,Christian=0.1,Sikh=0.1")
+    parser.add_argument("--teacher-effect-sd", type=float, default=5.0)
+    parser.add_argument("--bias", action="append", help="Injected shift, e.g. Gender:Female=-3 (repeatable).")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", required=True, help="Output path (.csv, .xlsx or .parquet).")
+    args = parser.parse_args(argv)
+
+    df, effects = generate_marksheet(
+        args.students, args.subjects, args.teachers,
+        gender_distribution=args.gender, religion_distribution=args.religion,
+        teacher_effect_sd=args.teacher_effect_sd, bias_effects=_parse_bias(args.bias), seed=args.seed,
+    )
+    write_marksheet(df, args.out)
+    print(f"Wrote {len(df):,} rows × {df.shape[1]} columns to {args.out}")
+    print(f"Injected bias effects: {effects['bias'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
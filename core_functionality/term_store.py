@@ -0,0 +1,256 @@
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+# Longitudinal Term Store
+#
+# Every stored term keeps two things:
+#   - its summary statistics (per subject, and per subject and teacher) in one
+#     SQLite database, indexed by term, subject and teacher, so trend queries
+#     and charts read a few summary rows instead of re-analyzing marksheets;
+#   - optionally its validated marksheet as Parquet, partitioned by term
+#     (marksheets/term=<term>/marksheet.parquet), for later re-analysis.
+#     Needs pyarrow; without it only the summaries are kept.
+#
+# Terms are ordered by when they were first stored. Storing a term again
+# replaces its rows in one transaction; `fingerprint` (a hash of the marksheet)
+# lets callers skip re-analyzing an unchanged upload. Connections follow
+# ReviewStore: WAL mode and one fresh connection per operation.
+
+STORE_DIR = "term_store"
+DB_NAME = "terms.db"
+
+# Summary columns (besides term/subject/teacher) of the two statistics tables
+SUBJECT_STAT_COLUMNS = ["students", "mean_marks", "std_marks", "mean_attendance", "slope", "intercept"]
+TEACHER_STAT_COLUMNS = ["students", "mean_marks", "iqr_marks", "mean_attendance", "marks_score", "attendance_score"]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL UNIQUE,
+    students INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    marksheet_path TEXT,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subject_stats (
+    term TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    {", ".join(f"{col} {'INTEGER NOT NULL' if col == 'students' else 'REAL'}" for col in SUBJECT_STAT_COLUMNS)},
+    PRIMARY KEY (term, subject)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS subject_stats_by_subject ON subject_stats (subject, term);
+CREATE TABLE IF NOT EXISTS teacher_stats (
+    term TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    teacher TEXT NOT NULL,
+    {", ".join(f"{col} {'INTEGER NOT NULL' if col == 'students' else 'REAL'}" for col in TEACHER_STAT_COLUMNS)},
+    PRIMARY KEY (term, subject, teacher)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS teacher_stats_by_teacher ON teacher_stats (teacher, subject, term);
+CREATE INDEX IF NOT EXISTS teacher_stats_by_subject ON teacher_stats (subject, term);
+"""
+
+
+def marksheet_fingerprint(df):
+    """Content hash of a marksheet (values and column names, not row labels)."""
+    values = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    columns = pd.util.hash_array(df.columns.to_numpy(dtype=str))
+    return f"{int(values.sum()) & 0xFFFFFFFFFFFFFFFF:016x}{int(columns.sum()) & 0xFFFFFFFF:08x}"
+
+
+class TermStore:
+    """
+    Local store of term datasets and their summary statistics.
+
+    Args:
+    directory (str): Folder holding the database and the Parquet marksheets.
+    keep_marksheets (bool): Also keep each term's marksheet as Parquet (if pyarrow is installed).
+    timeout (float): Seconds a writer waits for the write lock before giving up.
+    """
+    def __init__(self, directory=STORE_DIR, keep_marksheets=True, timeout=30.0):
+        self.directory = directory
+        self.path = os.path.join(directory, DB_NAME)
+        self.keep_marksheets = keep_marksheets
+        self.timeout = timeout
+
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    # ---- connection handling ----
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the block in a write transaction taken up front (BEGIN IMMEDIATE)."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    # ---- writes ----
+
+    def save_term(self, term, marksheet, subject_stats, teacher_stats, fingerprint=None):
+        """
+        Stores (or replaces) a term's summaries and, optionally, its marksheet.
+
+        Args:
+        term (str): Term label, e.g. "2024-T1".
+        marksheet (pd.DataFrame): The validated marksheet of the term.
+        subject_stats (pd.DataFrame): One row per subject: `subject` plus SUBJECT_STAT_COLUMNS.
+        teacher_stats (pd.DataFrame): One row per (subject, teacher): `subject`, `teacher`
+            plus TEACHER_STAT_COLUMNS.
+        fingerprint (str): `marksheet_fingerprint(marksheet)`, if already computed.
+        """
+        term = str(term).strip()
+        if not term:
+            raise ValueError("The term needs a name.")
+        fingerprint = fingerprint or marksheet_fingerprint(marksheet)
+        marksheet_path = self._write_marksheet(term, marksheet)
+
+        with self._transaction() as conn:
+            row = conn.execute("SELECT seq FROM terms WHERE term = ?", (term,)).fetchone()
+            seq = row[0] if row else conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM terms").fetchone()[0]
+            conn.execute("DELETE FROM subject_stats WHERE term = ?", (term,))
+            conn.execute("DELETE FROM teacher_stats WHERE term = ?", (term,))
+            conn.execute(
+                "INSERT OR REPLACE INTO terms (term, seq, students, fingerprint, marksheet_path, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (term, seq, len(marksheet), fingerprint, marksheet_path, time.time()),
+            )
+            self._insert(conn, "subject_stats", term, subject_stats, ["subject"] + SUBJECT_STAT_COLUMNS)
+            self._insert(conn, "teacher_stats", term, teacher_stats, ["subject", "teacher"] + TEACHER_STAT_COLUMNS)
+
+    @staticmethod
+    def _insert(conn, table, term, stats, columns):
+        rows = stats[columns].astype(object).where(stats[columns].notna(), None)
+        conn.executemany(
+            f"INSERT INTO {table} (term, {', '.join(columns)}) VALUES (?{', ?' * len(columns)})",
+            [(term, *row) for row in rows.itertuples(index=False, name=None)],
+        )
+
+    def _write_marksheet(self, term, marksheet):
+        if not self.keep_marksheets:
+            return None
+        try:
+            import pyarrow  # noqa: F401  (pandas' Parquet engine)
+        except ImportError:
+            return None
+        # Hive-style partition folder; the label is made safe for a file name
+        folder = os.path.join(self.directory, "marksheets", f"term={re.sub(r'[^A-Za-z0-9_.-]+', '_', term)}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "marksheet.parquet")
+        marksheet.to_parquet(path, index=False)
+        return path
+
+    def delete_term(self, term):
+        """Removes a term, its summaries and its stored marksheet."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT marksheet_path FROM terms WHERE term = ?", (term,)).fetchone()
+            for table in ("terms", "subject_stats", "teacher_stats"):
+                conn.execute(f"DELETE FROM {table} WHERE term = ?", (term,))
+        if row and row[0] and os.path.exists(row[0]):
+            os.remove(row[0])
+
+    # ---- reads ----
+
+    def terms(self):
+        """Stored terms in order: term, seq, students, fingerprint, marksheet_path, stored_at."""
+        return self._query("SELECT * FROM terms ORDER BY seq")
+
+    def fingerprint(self, term):
+        """Fingerprint of the stored marksheet of `term` (None if the term is not stored)."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT fingerprint FROM terms WHERE term = ?", (term,)).fetchone()
+        return row[0] if row else None
+
+    def load_marksheet(self, term):
+        """The stored marksheet of `term` (None if only its summaries were kept)."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT marksheet_path FROM terms WHERE term = ?", (term,)).fetchone()
+        if not row or not row[0] or not os.path.exists(row[0]):
+            return None
+        return pd.read_parquet(row[0])
+
+    def subjects(self):
+        with closing(self._connect()) as conn:
+            return [subject for (subject,) in conn.execute("SELECT DISTINCT subject FROM subject_stats ORDER BY subject")]
+
+    def teachers(self, subject=None):
+        """Teachers with stored statistics (for `subject` only, if given)."""
+        sql, params = "SELECT DISTINCT teacher FROM teacher_stats", ()
+        if subject is not None:
+            sql, params = sql + " WHERE subject = ?", (subject,)
+        with closing(self._connect()) as conn:
+            return [teacher for (teacher,) in conn.execute(sql + " ORDER BY teacher", params)]
+
+    def subject_trend(self, subjects=None):
+        """
+        Subject statistics across terms, oldest term first.
+
+        Args:
+        subjects (list): Subjects to read (default: all).
+
+        Returns:
+        pd.DataFrame: term, seq, subject and SUBJECT_STAT_COLUMNS.
+        """
+        where, params = _in_clause("s.subject", subjects)
+        return _as_float(self._query(
+            f"SELECT s.term, t.seq, s.subject, {', '.join('s.' + col for col in SUBJECT_STAT_COLUMNS)} "
+            f"FROM subject_stats s JOIN terms t ON t.term = s.term {where} ORDER BY t.seq, s.subject",
+            params,
+        ), SUBJECT_STAT_COLUMNS)
+
+    def teacher_trend(self, teachers=None, subject=None):
+        """
+        Teacher statistics across terms, oldest term first.
+
+        Args:
+        teachers (list): Teachers to read (default: all).
+        subject (str): Only this subject (default: all).
+
+        Returns:
+        pd.DataFrame: term, seq, subject, teacher and TEACHER_STAT_COLUMNS.
+        """
+        where, params = _in_clause("s.teacher", teachers)
+        if subject is not None:
+            where = f"{where} AND s.subject = ?" if where else "WHERE s.subject = ?"
+            params = (*params, subject)
+        return _as_float(self._query(
+            f"SELECT s.term, t.seq, s.subject, s.teacher, {', '.join('s.' + col for col in TEACHER_STAT_COLUMNS)} "
+            f"FROM teacher_stats s JOIN terms t ON t.term = s.term {where} ORDER BY t.seq, s.subject, s.teacher",
+            params,
+        ), TEACHER_STAT_COLUMNS)
+
+
+def _in_clause(column, values):
+    if values is None:
+        return "", ()
+    values = list(values)
+    return f"WHERE {column} IN ({', '.join('?' * len(values))})", tuple(values)
+
+
+def _as_float(frame, columns):
+    # A statistic that is NULL in every returned row would otherwise come back as objects
+    statistics = [col for col in columns if col != "students"]
+    frame[statistics] = frame[statistics].astype(float)
+    return frame
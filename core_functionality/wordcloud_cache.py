@@ -0,0 +1,188 @@
+import io
+import os
+import threading
+
+import numpy as np
+
+# Cached Word Cloud Rendering
+#
+# Rendering the word cloud (filtering every counted word, laying out the cloud
+# at scale=3 and rasterizing it) is the slowest part of the Reviews page, yet
+# its output only changes when a review is submitted. The rendered PNG is
+# therefore cached, keyed by `ReviewStore.version()`:
+#   - page views serve the cached PNG while the version is unchanged,
+#   - a submission schedules a rebuild on a background thread; until it lands,
+#     page views keep serving the previous image,
+#   - every PNG is also written to `cache_dir` as "v<version>.png", so a restarted
+#     server (or another worker process) picks it up without re-rendering.
+#
+# wordcloud is imported only when an image is actually rendered.
+
+CACHE_DIR = "reviews/wordcloud_cache"
+
+
+def _blue_color_func(word, font_size, position, orientation, random_state=None, **kwargs):
+    # Custom color function for a cohesive look (shades of blue)
+    return f"hsl(210, 70%, {np.random.randint(40, 80)}%)"
+
+
+def render_wordcloud_png(word_counts, stopwords, width=800, height=400, scale=3):
+    """
+    Renders a word cloud of the counted words straight to PNG (no matplotlib).
+
+    Args:
+    word_counts (Counter/dict): Word → frequency, already filtered (see `ReviewFilter.filter_counts`).
+    stopwords (set): Words WordCloud must never show.
+    width, height (int): Canvas size before scaling.
+    scale (int): Resolution multiplier.
+
+    Returns:
+    bytes: The PNG image, or None if there are no words.
+    """
+    if not word_counts:
+        return None
+
+    from wordcloud import WordCloud
+
+    # Generate word cloud with improved aesthetics
+    wordcloud = WordCloud(
+        width=width,
+        height=height,
+        background_color="white",  # Lighter background for clarity
+        max_words=50,  # Limit to avoid clutter
+        min_font_size=12,  # Ensure readability
+        scale=scale,  # Higher resolution
+        stopwords=stopwords,  # Double-check stop words
+        color_func=_blue_color_func  # Apply custom colors
+    ).generate_from_frequencies(word_counts)
+
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class WordCloudCache:
+    """
+    Version-keyed cache of the rendered word cloud, shared by all sessions of a process.
+
+    Args:
+    render (callable): Maps a word-count Counter to PNG bytes (or None if there is nothing to show).
+    cache_dir (str): Directory for the persisted "v<version>.png" files; None keeps the cache in memory only.
+    """
+    def __init__(self, render, cache_dir=CACHE_DIR):
+        self.render = render
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._version = None   # Version of the cached image
+        self._png = None
+        self._building = {}    # version → threading.Event set when that build finishes
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ---- disk persistence ----
+
+    def _path(self, version):
+        return os.path.join(self.cache_dir, f"v{version}.png")
+
+    def _load_from_disk(self, version):
+        if not self.cache_dir or not os.path.exists(self._path(version)):
+            return None
+        with open(self._path(version), "rb") as file:
+            return file.read()
+
+    def _save_to_disk(self, version, png):
+        if not self.cache_dir or png is None:
+            return
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = f"{self._path(version)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(png)
+        os.replace(tmp_path, self._path(version))
+
+        # Older versions are never served again; newer ones (written by a faster
+        # build or another process) must stay
+        for name in os.listdir(self.cache_dir):
+            if not (name.startswith("v") and name.endswith(".png")):
+                continue
+            try:
+                file_version = int(name[1:-len(".png")])
+            except ValueError:
+                continue
+            if file_version < version:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    # ---- building ----
+
+    def _store(self, version, png):
+        with self._lock:
+            # A slow build must not overwrite an image of a newer version
+            if self._version is None or version >= self._version:
+                self._version, self._png = version, png
+
+    def _build(self, version, load_word_counts, done):
+        try:
+            png = self._load_from_disk(version)
+            if png is None:
+                png = self.render(load_word_counts())
+                self._save_to_disk(version, png)
+            self._store(version, png)
+        finally:
+            with self._lock:
+                self._building.pop(version, None)
+            done.set()
+
+    def refresh_async(self, version, load_word_counts):
+        """
+        Starts rebuilding the image for `version` on a background thread
+        (no-op if it is cached or already being built).
+
+        Args:
+        version (int): The data version the image must reflect.
+        load_word_counts (callable): Returns the word counts of that version.
+
+        Returns:
+        threading.Event: Set when the build for `version` has finished.
+        """
+        with self._lock:
+            if self._version == version:
+                done = threading.Event()
+                done.set()
+                return done
+            if version in self._building:
+                return self._building[version]
+            done = self._building[version] = threading.Event()
+
+        threading.Thread(target=self._build, args=(version, load_word_counts, done),
+                         name=f"wordcloud-v{version}", daemon=True).start()
+        return done
+
+    def get(self, version, load_word_counts, wait=0.0):
+        """
+        Returns the PNG for `version`, rendering only when nothing usable is cached.
+
+        If an older image is cached, the rebuild runs in the background and the older
+        image is returned unless the rebuild finishes within `wait` seconds. With
+        nothing cached at all (first view after start-up), the caller waits for the build.
+
+        Args:
+        version (int): Current data version (`ReviewStore.version()`).
+        load_word_counts (callable): Returns the current word counts; only called on a rebuild.
+        wait (float): Seconds to wait for a pending rebuild before serving the older image.
+
+        Returns:
+        tuple: (PNG bytes or None, version of that image, whether a newer image is being built)
+        """
+        with self._lock:
+            if self._version == version:
+                return self._png, self._version, False
+            have_older = self._version is not None
+
+        done = self.refresh_async(version, load_word_counts)
+        done.wait(wait if have_older else None)
+
+        with self._lock:
+            return self._png, self._version, self._version != version
@@ -1,4 +1,5 @@
 import streamlit as st
+import core_functionality.prewarm as prewarm
 
 # Streamlit Multi-Page Application Setup
 
@@ -8,12 +9,14 @@ import streamlit as st
 # 2. Data Dissector: Core analysis functionalities.
 # 3. The Brains Behind: Credits for contributors.
 # 4. Tech Wizardry: Technologies used in the project.
+# 5. Trends: Stored terms compared over time.
 
 # Define views with corresponding file paths and icons
 
 home = st.Page("views/Home.py", icon='🏠')  # Main landing page
 data_analysis = st.Page("views/Data_Analysis.py", icon='🔬')  # Analysis & insights
 sythentic = st.Page("views/View_Synthetic_Analysis.py", icon='🔁')  # Synthetic
+trends = st.Page("views/Trends.py", icon='📈')  # Term-over-term trends
 the_brains_behind = st.Page("views/The_Brains_Behind.py", icon='🧠')  # Credits & acknowledgments
 tech_wizardry = st.Page("views/Tech_Wizardry.py", icon='🛠️')  # Technologies used & dependencies
 reviews = st.Page("views/Reviews.py", icon='📨')  # Reviews
@@ -25,11 +28,11 @@ reviews = st.Page("views/Reviews.py", icon='📨')  # Reviews
 # represent section names displayed in the navigation bar.
 
 pg = st.navigation(
-    [home,data_analysis,sythentic,the_brains_behind,tech_wizardry,reviews]
+    [home,data_analysis,sythentic,trends,the_brains_behind,tech_wizardry,reviews]
 )
 pg = st.navigation({
     "Home": [home],
-    "Analysis": [data_analysis,sythentic],
+    "Analysis": [data_analysis,sythentic,trends],
     "Credits": [the_brains_behind,tech_wizardry],
     "Review": [reviews]
 })
@@ -40,3 +43,11 @@ pg = st.navigation({
 # Streamlit logic and UI components.
 
 pg.run()
+
+# Background Pre-Warming
+
+# Heavy libraries (statsmodels, sklearn, plotly, ...) are imported lazily by the
+# analyses. Once the selected page has been rendered, load them in a background
+# thread so the first analysis click is fast. Disable with BTM_PREWARM=0.
+
+prewarm.start_prewarm()
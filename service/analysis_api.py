@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import core_functionality.data_validator as dv
+import analysis.teacher_analysis as ta
+import analysis.subject_analysis as sa
+import bias_analysis.bias_detection as bd
+
+# Local HTTP Analysis API
+#
+# Exposes the validator and the analysis modules as JSON endpoints so other
+# systems (e.g. a student information system) can use them without the
+# Streamlit UI. Run it as a stand-alone process:
+#
+#     python -m service.analysis_api --port 8765 --workers 4
+#
+# Endpoints:
+#     GET  /health
+#     POST /datasets?filename=marks.csv          (raw file as request body)
+#     GET  /datasets/<dataset_id>
+#     GET  /datasets/<dataset_id>/teachers
+#     GET  /datasets/<dataset_id>/subjects
+#     GET  /datasets/<dataset_id>/bias?factor=Gender&teacher_model=fixed
+#
+# Uploads are streamed to disk in chunks while being hashed, so the dataset id
+# is the SHA-256 of the file content. Validated datasets and analysis results
+# are cached per dataset id, and identical concurrent requests share one job.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_CONCURRENT = 16
+DEFAULT_CACHE_SIZE = 32
+DEFAULT_MAX_UPLOAD_MB = 50
+CHUNK_SIZE = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """Raised inside a request handler to return an error status with a JSON message."""
+    def __init__(self, status, message):
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+def _json_default(value):
+    """Converts NumPy scalars and arrays into plain JSON types."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class LRUCache:
+    """A small ordered-dict LRU used for datasets and analysis results."""
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def pop(self, key):
+        self._items.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._items
+
+
+# -------------------------------
+# Blocking work (runs in the worker pool)
+# -------------------------------
+
+def _validate_file(path):
+    """Validates an uploaded file stored at `path` and returns (df, subject_names)."""
+    with open(path, "rb") as file:
+        return dv.validate_and_convert_file(file)
+
+
+def _teacher_scores(df, subject_names):
+    return ta.analyze_all_teachers(df, subject_names)
+
+
+def _subject_regressions(df, subject_names):
+    return sa.subject_regressions(df, subject_names)
+
+
+def _bias_summary(df, subject_names, factor, teacher_model="fixed"):
+    """Runs `compute_bias_shap` for every subject, mirroring the bias buttons in the app."""
+    summary = {}
+    for subject in subject_names:
+        try:
+            summary[subject] = {"shap": bd.compute_bias_shap(bd.bias_subject_frame(df, subject, factor), teacher_model)}
+        except ValueError as e:
+            summary[subject] = {"error": str(e)}
+    return summary
+
+
+# -------------------------------
+# Service
+# -------------------------------
+
+class AnalysisService:
+    """
+    Async HTTP front-end around the analysis functions.
+
+    Args:
+    workers (int): Size of the worker pool that runs validation and analyses.
+    max_concurrent (int): Maximum number of requests handled at once; extra requests get 503.
+    cache_size (int): Number of datasets (and per-dataset results) kept in memory.
+    max_upload_bytes (int): Largest accepted upload; bigger bodies get 413.
+    upload_dir (str): Directory used to spool uploads (defaults to the system temp dir).
+    """
+    def __init__(self, workers=DEFAULT_WORKERS, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 cache_size=DEFAULT_CACHE_SIZE, max_upload_bytes=DEFAULT_MAX_UPLOAD_MB * 1024 * 1024,
+                 upload_dir=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-worker")
+        self.max_concurrent = max_concurrent
+        self.max_upload_bytes = max_upload_bytes
+        self.upload_dir = upload_dir
+        self.datasets = LRUCache(cache_size)
+        self.results = LRUCache(cache_size * 4)
+        self._limiter = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def _cached(self, cache, key, func, *args):
+        """
+        Returns the cached result for `key`, computing it in the worker pool at most once.
+
+        The cache holds futures, so concurrent requests for the same key await the
+        same job. Failed jobs are evicted so they can be retried.
+        """
+        future = cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(func, *args))
+            cache.put(key, future)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            cache.pop(key)
+            raise
+
+    # ---- request body streaming ----
+
+    async def _read_body_to_file(self, reader, headers, file):
+        """Streams the request body into `file` chunk by chunk and returns its SHA-256."""
+        digest = hashlib.sha256()
+        received = 0
+
+        def consume(chunk):
+            nonlocal received
+            received += len(chunk)
+            if received > self.max_upload_bytes:
+                raise HTTPError(413, f"Upload exceeds {self.max_upload_bytes} bytes.")
+            digest.update(chunk)
+            file.write(chunk)
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                try:
+                    size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                except ValueError:
+                    raise HTTPError(400, "Malformed chunk size in chunked upload.") from None
+                if size < 0:
+                    raise HTTPError(400, "Malformed chunk size in chunked upload.")
+                if size == 0:
+                    await reader.readline()  # Trailing CRLF after the last chunk
+                    break
+                remaining = size
+                while remaining:
+                    chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise HTTPError(400, "Connection closed mid-upload.")
+                    consume(chunk)
+                    remaining -= len(chunk)
+                try:
+                    delimiter = await reader.readexactly(2)  # CRLF after each chunk
+                except asyncio.IncompleteReadError:
+                    raise HTTPError(400, "Connection closed mid-upload.") from None
+                if delimiter != b"\r\n":
+                    raise HTTPError(400, "Malformed chunk in chunked upload (missing CRLF).")
+        else:
+            if "content-length" not in headers:
+                raise HTTPError(411, "Content-Length or chunked Transfer-Encoding is required.")
+            try:
+                remaining = int(headers["content-length"])
+            except ValueError:
+                raise HTTPError(400, "Content-Length must be an integer.") from None
+            if remaining < 0:
+                raise HTTPError(400, "Content-Length must not be negative.")
+            if remaining > self.max_upload_bytes:
+                raise HTTPError(413, f"Upload exceeds {self.max_upload_bytes} bytes.")
+            while remaining:
+                chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise HTTPError(400, "Connection closed mid-upload.")
+                consume(chunk)
+                remaining -= len(chunk)
+
+        return digest.hexdigest()
+
+    # ---- handlers ----
+
+    async def upload_dataset(self, reader, headers, query):
+        filename = query.get("filename", [""])[0] or headers.get("x-filename", "")
+        extension = os.path.splitext(filename)[1].lower()
+        if not filename.endswith(('.csv', '.xls', '.xlsx', '.xlsm', '.xlsb')):
+            raise HTTPError(422, dv.InvalidExtensionError().message)
+
+        tmp = tempfile.NamedTemporaryFile(suffix=extension, dir=self.upload_dir, delete=False)
+        try:
+            with tmp:
+                dataset_id = await self._read_body_to_file(reader, headers, tmp)
+
+            try:
+                df, subject_names = await self._cached(self.datasets, dataset_id, _validate_file, tmp.name)
+            except (dv.InvalidExtensionError, dv.CorruptedFileError,
+                    dv.InvalidDataStructureError, dv.UnknownColumnError, ValueError) as e:
+                raise HTTPError(422, str(e))
+            except dv.MemoryBudgetExceededError as e:
+                raise HTTPError(413, str(e))
+        finally:
+            os.unlink(tmp.name)
+
+        return 201, self._describe(dataset_id, df, subject_names)
+
+    def _describe(self, dataset_id, df, subject_names):
+        return {
+            "dataset": dataset_id,
+            "rows": len(df),
+            "columns": list(df.columns),
+            "subjects": sorted(subject_names.tolist()),
+        }
+
+    async def _get_dataset(self, dataset_id):
+        future = self.datasets.get(dataset_id)
+        if future is None:
+            raise HTTPError(404, f"Unknown dataset '{dataset_id}'. Upload it to /datasets first.")
+        return await asyncio.shield(future)
+
+    async def dataset_info(self, dataset_id, query):
+        df, subject_names = await self._get_dataset(dataset_id)
+        return 200, self._describe(dataset_id, df, subject_names)
+
+    async def teacher_scores(self, dataset_id, query):
+        df, subject_names = await self._get_dataset(dataset_id)
+        scores = await self._cached(self.results, (dataset_id, "teachers"), _teacher_scores, df, subject_names)
+        return 200, {"dataset": dataset_id, "teachers": scores}
+
+    async def subject_regressions(self, dataset_id, query):
+        df, subject_names = await self._get_dataset(dataset_id)
+        regressions = await self._cached(self.results, (dataset_id, "subjects"), _subject_regressions, df, subject_names)
+        return 200, {"dataset": dataset_id, "subjects": regressions}
+
+    async def bias_summary(self, dataset_id, query):
+        df, subject_names = await self._get_dataset(dataset_id)
+        factor = query.get("factor", ["Gender"])[0]
+        if factor not in ("Gender", "Religion"):
+            raise HTTPError(400, "factor must be 'Gender' or 'Religion'.")
+        if factor not in df.columns:
+            raise HTTPError(422, f"Dataset has no '{factor}' column.")
+        teacher_model = query.get("teacher_model", ["fixed"])[0]
+        if teacher_model not in bd.TEACHER_MODELS:
+            raise HTTPError(400, f"teacher_model must be one of: {', '.join(bd.TEACHER_MODELS)}.")
+        summary = await self._cached(self.results, (dataset_id, "bias", factor, teacher_model), _bias_summary,
+                                     df, subject_names, factor, teacher_model)
+        return 200, {"dataset": dataset_id, "factor": factor, "teacher_model": teacher_model, "bias": summary}
+
+    async def route(self, method, path, query, reader, headers):
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            return 200, {"status": "ok"}
+        if parts == ["datasets"]:
+            if method != "POST":
+                raise HTTPError(405, "Use POST to upload a dataset.")
+            return await self.upload_dataset(reader, headers, query)
+        if len(parts) in (2, 3) and parts[0] == "datasets":
+            if method != "GET":
+                raise HTTPError(405, "Use GET to read dataset results.")
+            handlers = {
+                None: self.dataset_info,
+                "teachers": self.teacher_scores,
+                "subjects": self.subject_regressions,
+                "bias": self.bias_summary,
+            }
+            handler = handlers.get(parts[2] if len(parts) == 3 else None)
+            if handler is not None:
+                return await handler(parts[1], query)
+
+        raise HTTPError(404, f"No route for {method} {path}.")
+
+    # ---- connection handling ----
+
+    async def handle_connection(self, reader, writer):
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, _ = request_line.split(" ", 2)
+            except ValueError:
+                await self._respond(writer, 400, {"error": "Malformed request line."})
+                return
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+
+            # Request concurrency limit: reject instead of queueing unbounded work
+            if self._limiter.locked():
+                await self._respond(writer, 503, {"error": "Server is busy, retry later."})
+                return
+
+            async with self._limiter:
+                try:
+                    status, payload = await self.route(method.upper(), url.path, query, reader, headers)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+            await self._respond(writer, status, payload)
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload):
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._limiter = asyncio.Semaphore(self.max_concurrent)
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"BeyondTheMarks analysis API listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the BeyondTheMarks analysis API as a local HTTP service.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Size of the analysis worker pool.")
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT, help="Requests handled at once before answering 503.")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="Datasets kept in the in-memory cache.")
+    parser.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_MB)
+    args = parser.parse_args(argv)
+
+    service = AnalysisService(
+        workers=args.workers,
+        max_concurrent=args.max_concurrent,
+        cache_size=args.cache_size,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+    )
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,39 @@
+import os
 import streamlit as st
 import pandas as pd
 import core_functionality.data_validator as dv
+import core_functionality.marksheet_editor as me
 import analysis.teacher_analysis as ta
 import analysis.subject_analysis as sa
 import bias_analysis.bias_detection as bd
+import bias_analysis.intersectional as bi
+import analysis.partitioned as ap
+import analysis.student_analysis as stu
+import analysis.at_risk as ar
+import analysis.anomalies as an
+import analysis.distributions as dist
+from analysis.planner import AnalysisPlanner
+import core_functionality.instrumentation as perf
+import core_functionality.lazy_figures as lf
+
+# Resamples behind the error bars of the bias charts
+BIAS_BOOTSTRAP_RESAMPLES = 1000
+
+# How teachers are accounted for in the bias charts (see bd.TEACHER_MODELS)
+TEACHER_MODEL_LABELS = {
+    "fixed": "Teacher fixed effects",
+    "random": "Teacher random effects",
+    "average": "Teacher average marks (legacy)",
+}
 
 # Logo
 image = "images/logo.png"
 st.logo(image, size='large')
 
+# Collect timing/memory spans for this rerun (shown in the optional performance panel)
+perf_spans = perf.start_collection()
+show_performance = perf.performance_panel_toggle()
+
 # -------------------------------
 # Title & File Upload Section
 # -------------------------------
@@ -30,16 +55,79 @@ with open(sample_file_path, "rb") as file:
 
 st.download_button(label="Download sample data", icon="📥", use_container_width=True,data=sample_data,file_name="sample_data.csv")
     
+# The uploaded file is loaded once and kept in session state while it is edited
+# (see core_functionality/marksheet_editor.py); a rejected file opens in the editor.
+
+def session_marksheet(file):
+    """The EditableMarksheet of the uploaded file, loaded on first use."""
+    state = st.session_state.get("marksheet_state")
+    if state is None or state[0] != file.file_id:
+        state = (file.file_id, me.EditableMarksheet.from_file(file))
+        st.session_state["marksheet_state"] = state
+    return state[1]
+
+def apply_marksheet_edits(sheet, editor_key):
+    """Editor callback: applies the edits, revalidates the touched columns and marks dependent results stale."""
+    changed = sheet.apply_edits(st.session_state[editor_key])
+    refresh_session_results(sheet, changed)
+
+# Files too large for the session's memory budget are not loaded; if they can be
+# streamed, they are validated chunk by chunk and the bias check runs on the chunks.
+
+def session_stream(file, plan):
+    """The validated chunked source of an upload too large to load, built on first use."""
+    state = st.session_state.get("stream_state")
+    if state is None or state[0] != file.file_id:
+        with st.spinner("Checking the file chunk by chunk..."):
+            state = (file.file_id, *dv.open_stream(file, plan))
+        st.session_state["stream_state"] = state
+    return state[1], state[2]
+
+def render_streaming_analysis(file, plan):
+    """Bias detection over the chunks of a file that cannot be loaded whole."""
+    source, subject_names = session_stream(file, plan)
+    factors = [factor for factor in ("Gender", "Religion") if factor in plan.columns]
+    st.subheader("🌊 Chunk-by-Chunk Bias Check")
+    if not factors:
+        st.write("This file has no Gender or Religion column, so there is nothing to stream through. Split it to analyze it fully!")
+        return
+    subject = st.selectbox("Subject", subject_names, key="stream_subject")
+    factor = st.selectbox("Factor", factors, key="stream_factor")
+    if st.button("⚖️ Detect Bias in Chunks"):
+        with st.spinner(f"Streaming ~{plan.rows:,} rows..."):
+            perf.timed_plotly_chart(bd.detect_bias_streaming(source, subject, factor, chunksize=plan.chunk_rows))
+
 if marksheet:
 
     # Determine file type and read accordingly
     try:
-        df, subject_names = dv.validate_and_convert_file(marksheet)
-        st.write(df)
-        st.success("Nice! Your file is in—time to dig into the academic drama! 📊")
-        has_error = False
-
-        
+        sheet = session_marksheet(marksheet)
+        df, subject_names = sheet.df, sheet.subject_names
+
+        if st.toggle("✏️ Edit the data in place", value=not sheet.is_valid, key="edit_marksheet"):
+            # A new key per applied edit: the editor starts from the updated frame
+            editor_key = f"marksheet_editor_{sheet.version}"
+            st.data_editor(df, key=editor_key, num_rows="dynamic", on_change=apply_marksheet_edits,
+                           args=(sheet, editor_key))
+        else:
+            st.write(df)
+
+        has_error = not sheet.is_valid
+        if has_error:
+            st.error("You didn't read the `The Grand Data Upload Rulebook 📜`:\n\n"
+                     + "\n".join(f"- {message}" for message in sheet.errors.values())
+                     + "\n\nFix the cells above and the analyses will unlock.")
+        else:
+            st.success("Nice! Your file is in—time to dig into the academic drama! 📊")
+
+    except dv.MemoryBudgetExceededError as e:
+        st.error(f"🐘 Too big to swallow: {e}")
+        has_error = True
+        if e.plan.strategy in (dv.INGEST_CHUNKED, dv.INGEST_OUT_OF_CORE):
+            try:
+                render_streaming_analysis(marksheet, e.plan)
+            except Exception as stream_error:
+                st.error(f"You didn't read the `The Grand Data Upload Rulebook 📜`: {stream_error}.")
 
     except Exception as e:
         st.error(f"You didn't read the `The Grand Data Upload Rulebook 📜`: {e}.\nTry reloading page")
@@ -76,6 +164,10 @@ else:
     ✔ If present, should follow the **"[Subject] Teacher"** format (e.g., "Math Teacher").  
     ✔ If missing, we assume **all teachers are omnipresent beings.**  
 
+    🏫 **School, Section, Term (Optional)**  
+    ✔ Several schools, sections or terms in one file? Add these columns and compare them side by side.  
+    ✔ Roll No then only needs to be unique within each School/Section/Term.  
+
     ---
 
     ### 🔢 **Numerical Discipline**  
@@ -102,146 +194,309 @@ else:
 # -------------------------------
 # Analysis Options with Witty Labels
 # -------------------------------
+# The chosen mode is kept in session state so that picking a subject (which reruns
+# the page) keeps showing the same analysis. Results are cached per uploaded file;
+# per-subject figures are built only when their subject is selected.
+
+def session_results(name, build):
+    """Returns the cached result `name` for the uploaded file, computing it with `build` once."""
+    cache = st.session_state.setdefault("analysis_results", {})
+    if cache.get("file_id") != marksheet.file_id:
+        cache.clear()
+        cache["file_id"] = marksheet.file_id
+        # Subject choices of the previous file may not exist in this one
+        for key in ("teacher_subject", "bias_subject", "scatter_subject", "partition_by", "leaderboard_subject",
+                    "distribution_subject"):
+            st.session_state.pop(key, None)
+    stale = cache.setdefault("stale", {})
+    if name in stale:
+        # The data changed since this result was built: rebuild it, keeping the
+        # per-subject figures of subjects whose columns were not edited
+        subjects, previous = stale.pop(name), cache.pop(name)
+        cache[name] = build()
+        if subjects is not None and isinstance(previous, lf.LazyFigures) and isinstance(cache[name], lf.LazyFigures):
+            cache[name].adopt(previous, exclude=subjects)
+    if name not in cache:
+        cache[name] = build()
+    return cache[name]
+
+def refresh_session_results(sheet, changed):
+    """
+    Marks the cached results that read `changed` columns as stale (None: every column).
+
+    The planner re-checks its own results by column fingerprint.
+    """
+    cache = st.session_state.get("analysis_results")
+    if not cache or cache.get("file_id") != marksheet.file_id:
+        return
+    if "planner" in cache:
+        cache["planner"].update(sheet.df, sheet.subject_names, changed)
+    subjects = sheet.affected_subjects(changed)
+    if subjects is not None and not subjects:
+        return
+    stale = cache.setdefault("stale", {})
+    for name in list(cache):
+        if name in ("file_id", "planner", "stale"):
+            continue
+        previous = stale.get(name, set())
+        stale[name] = None if subjects is None or previous is None else previous | subjects
+
+def session_planner():
+    """The uploaded file's AnalysisPlanner: numeric results that are recomputed only when their columns change."""
+    return session_results("planner", lambda: AnalysisPlanner(df, subject_names))
+
+# The at-risk model is trained on the Trends page; reloaded when the saved file changes
+@st.cache_resource
+def load_at_risk_model(path, modified):
+    return ar.AtRiskModel.load(path)
+
 if marksheet and not has_error:
     st.subheader("🔍 Pick Your Investigation Mode:")
     try:
 
         if st.button("📚 Professor Performance Analyzation"):
-            
-            # Step 1: Extract subjects with teachers
-            teacher_subjects = [subj for subj in subject_names if f"{subj} Teacher" in df.columns]
-
-            teacher_scores = {}  # Dictionary to store scores for each teacher
-            
-            teacher_score_df = {}
-
-            # Step 2: Loop through subjects that have a teacher column
-            for subject in teacher_subjects:
-                teacher_col = f"{subject} Teacher"
-                attendance_col = f"{subject} Attendance"
-                marks_col = f"{subject} Marks"
-
-                # Ensure required columns exist
-                if attendance_col in df.columns and marks_col in df.columns:
-                    # Step 3: Create a DataFrame with Teacher, Attendance, and Marks
-                    teacher_df = df[[teacher_col, attendance_col, marks_col]].dropna()
-                    # Step 4: Compute Teacher Score
-                    teacher_scores[subject] = ta.analyze_teacher_effectiveness(teacher_df)
-                    # Step 5: Display Teacher Scores Matrix
-                    # Check if all subjects contain empty data
-                    can_be_predicted = True
-                    if all(all(not v for v in subject_data.values()) for subject_data in teacher_scores.values()):
-                        can_be_predicted = False
-                    else:
-                        # Convert dictionary to a proper DataFrame
-                        formatted_data = []
-                        
-                        for subject, subject_data in teacher_scores.items():
-                            for category, teacher_dict in subject_data.items():  # 'Marks' and 'Attendance'
-                                for teacher, score in teacher_dict.items():
-                                    formatted_data.append({
-                                        "Subject": subject,
-                                        "Teacher": teacher,
-                                        "Category": category,
-                                        "Score": round(score, 2)  # Keep 2 decimal places
-                                    })
-
-                        # Convert list to DataFrame
-                        teacher_score_df = pd.DataFrame(formatted_data)
-
-                    # Graph
-                    st.subheader(f"Teacher Performance Analysis for {subject}")
-                    teacher_df = teacher_df.rename(columns={f"{subject} Teacher": "Teacher"})
-                    teacher_df = teacher_df.rename(columns={f"{subject} Attendance": "Attendance"})
-                    teacher_df = teacher_df.rename(columns={f"{subject} Marks": "Marks"})
-                    attendance_fig, marks_fig = ta.plot_teacher_distributions(teacher_df)
-
-                    st.plotly_chart(attendance_fig)
-                    st.plotly_chart(marks_fig)
-                        
-                    # Step 6: Plot Teacher Distributions
-                    if not can_be_predicted:
-                        st.subheader(f"Performance Distribution for {subject} Teachers")
-                        st.write("You don't have enough data to give scores to teachers!")
-                    # ta.plot_teacher_distributions(teacher_df)
-            
-            # Display in matrix format using pivot
-            if can_be_predicted:
-                teacher_score_pivot = teacher_score_df.pivot(index=["Subject", "Teacher"], columns="Category", values="Score")
+            st.session_state["analysis_mode"] = "teachers"
+        if st.button("⚖️ Gender Bias Detection"):
+            st.session_state["analysis_mode"] = "Gender"
+        if st.button("☪️✝️🕉️ Religious Bias Detection"):
+            st.session_state["analysis_mode"] = "Religion"
+        if st.button("🔀 Intersectional Bias: Gender × Religion"):
+            st.session_state["analysis_mode"] = "intersectional"
+        if st.button("📊 Subject Showdown: Which One Wins?"):
+            st.session_state["analysis_mode"] = "subjects"
+        if st.button("🎓 Student Spotlight: Ranks & Leaderboards"):
+            st.session_state["analysis_mode"] = "students"
+        if st.button("🕵️ Grading Anomalies: Something Fishy?"):
+            st.session_state["analysis_mode"] = "anomalies"
+        if ap.partition_columns(df) and st.button("🏫 Compare Schools / Sections / Terms"):
+            st.session_state["analysis_mode"] = "partitions"
+
+        analysis_mode = st.session_state.get("analysis_mode")
+        bias_bootstrap = None
+        teacher_model = "fixed"
+        if analysis_mode in ("Gender", "Religion"):
+            teacher_model = st.selectbox("🧑‍🏫 Teacher adjustment", list(TEACHER_MODEL_LABELS), key="bias_teacher_model",
+                                         format_func=TEACHER_MODEL_LABELS.get,
+                                         help="Fixed/random effects compare students with the same teacher; "
+                                              "the legacy model uses the teacher's average marks as a feature.")
+            if st.checkbox("📏 Show bootstrap confidence intervals", key="bias_bootstrap",
+                           help="Adds 95% error bars to the same bars, from "
+                                f"{BIAS_BOOTSTRAP_RESAMPLES} resamples of the students."):
+                bias_bootstrap = BIAS_BOOTSTRAP_RESAMPLES
+
+        if analysis_mode == "teachers":
+            # Scores for every subject are cheap; the box plots are built per selected subject
+            teacher_scores = session_planner().all_teacher_scores()
+            teacher_figures = session_results("teacher_figures", lambda: ta.teacher_distribution_figures(df, subject_names))
+
+            if not teacher_figures.keys:
+                st.write("You don't have any '[Subject] Teacher' columns, so there are no teachers to analyze!")
+            else:
+                subject = lf.subject_selector(teacher_figures.keys, key="teacher_subject")
+
+                # Graph
+                st.subheader(f"Teacher Performance Analysis for {subject}")
+                attendance_fig, marks_fig = teacher_figures.get(subject)
+                perf.timed_plotly_chart(attendance_fig)
+                perf.timed_plotly_chart(marks_fig)
+
+                if not any(teacher_scores[subject].values()):
+                    st.subheader(f"Performance Distribution for {subject} Teachers")
+                    st.write("You don't have enough data to give scores to teachers!")
+
+            # Display in matrix format
+            teacher_score_pivot = ta.teacher_score_matrix(teacher_scores)
+            if teacher_score_pivot is not None:
                 st.subheader("📊 Teacher Score Matrix")
                 st.dataframe(teacher_score_pivot)
-                
-                
-        if st.button("⚖️ Gender Bias Detection"):
+
+
+        if analysis_mode == "Gender":
             if 'Gender' not in df.columns:
                 st.write("🚨 Whoops! Your data doesn't have a 'Gender' column! 🤦‍♂️")
                 st.write("Analyzing gender bias without gender is like judging a cricket match without knowing the teams. 🏏")
             else:
-                for subject in subject_names:
-                    attendance_col = f"{subject} Attendance"
-                    marks_col = f"{subject} Marks"
-                    teacher_col = f"{subject} Teacher" if f"{subject} Teacher" in df.columns else None
+                gender_figures = session_results(f"gender_bias_{bias_bootstrap}_{teacher_model}",
+                                                 lambda: bd.bias_figures(df, subject_names, "Gender", bias_bootstrap, teacher_model))
+                subject = lf.subject_selector(gender_figures.keys, key="bias_subject")
 
-                    if attendance_col not in df.columns or marks_col not in df.columns:
-                        st.write(f"⚠️ Skipping {subject}: Missing necessary columns!")
-                    else:
-                        # Prepare DataFrame slice
-                        cols_to_use = [attendance_col, marks_col, "Gender"]
-                        if teacher_col:
-                            cols_to_use.append(teacher_col)
+                # Call the bias detection method for the selected subject only
+                st.write(f"🔍 Running bias detection for {subject}...")
+                try:
+                    perf.timed_plotly_chart(gender_figures.get(subject))
+                    st.write("✅ Bias analysis complete! If the results make you uncomfortable, welcome to reality. 😉")
+                except ValueError as e:
+                    st.write(f"⚠️ Skipping {subject}: {e}")
 
-                        subject_df = df[cols_to_use]
 
-                        # Call the bias detection method
-                        st.write(f"🔍 Running bias detection for {subject}...")
-                        st.plotly_chart(bd.detect_bias(subject_df))
-
-                st.write("✅ Bias analysis complete! If the results make you uncomfortable, welcome to reality. 😉")
-
-
-        if st.button("☪️✝️🕉️ Religious Bias Detection"):
+        if analysis_mode == "Religion":
             if 'Religion' not in df.columns:
                 st.write("🙏 Oh no! Your data doesn't have a 'Religion' column! 😇")
                 st.write("Trying to analyze religious bias without religion is like arguing about food without knowing what's on the plate. 🍛")
             else:
-                for subject in subject_names:
-                    attendance_col = f"{subject} Attendance"
-                    marks_col = f"{subject} Marks"
-                    teacher_col = f"{subject} Teacher" if f"{subject} Teacher" in df.columns else None
-
-                    if attendance_col not in df.columns or marks_col not in df.columns:
-                        st.write(f"⚠️ Skipping {subject}: Missing necessary columns! Maybe the data needs a divine intervention. ✨")
-                    else:
-                        # Prepare DataFrame slice
-                        cols_to_use = [attendance_col, marks_col, "Religion"]
-                        if teacher_col:
-                            cols_to_use.append(teacher_col)
-
-                        subject_df = df[cols_to_use]
-
-                        # Call the bias detection method
-                        st.write(f"🔍 Running religious bias detection for {subject}... 🙏")
-                        st.plotly_chart(bd.detect_bias(subject_df))
-
-                st.write("✅ Bias analysis complete! If the results are shocking, just remember—faith can move mountains, but data doesn’t lie. 📊😉")
-
-
-        if st.button("📊 Subject Showdown: Which One Wins?"):
-            fig1, fig2, scatter_list = sa.analyze_subject_performance(df, subject_names)
+                religion_figures = session_results(f"religion_bias_{bias_bootstrap}_{teacher_model}",
+                                                   lambda: bd.bias_figures(df, subject_names, "Religion", bias_bootstrap, teacher_model))
+                subject = lf.subject_selector(religion_figures.keys, key="bias_subject")
+
+                # Call the bias detection method for the selected subject only
+                st.write(f"🔍 Running religious bias detection for {subject}... 🙏")
+                try:
+                    perf.timed_plotly_chart(religion_figures.get(subject))
+                    st.write("✅ Bias analysis complete! If the results are shocking, just remember—faith can move mountains, but data doesn’t lie. 📊😉")
+                except ValueError as e:
+                    st.write(f"⚠️ Skipping {subject}: {e} Maybe the data needs a divine intervention. ✨")
+
+
+        if analysis_mode == "intersectional":
+            missing_factors = [col for col in ("Gender", "Religion") if col not in df.columns]
+            if missing_factors:
+                st.write(f"🚨 Intersections need both factors, but your data has no {' or '.join(missing_factors)} column! 🤷")
+            else:
+                teacher_effects = st.checkbox("🧑‍🏫 Teacher fixed effects", value=True, key="intersectional_teachers",
+                                              help="Give every teacher their own baseline, so a teacher's grading "
+                                                   "is not mistaken for a Gender × Religion gap.")
+                intersectional = session_results(f"intersectional_{teacher_effects}",
+                                                 lambda: bi.intersectional_results(df, subject_names, teacher_effects))
+                subject = lf.subject_selector(intersectional.keys, key="bias_subject")
+
+                st.write(f"🔍 Crossing Gender and Religion for {subject}...")
+                try:
+                    heatmap, coefficients = intersectional.get(subject)
+                    perf.timed_plotly_chart(heatmap)
+                    st.subheader("📐 Model Coefficients")
+                    st.dataframe(coefficients.style.format("{:.3f}", na_rep="—"))
+                    st.write("✅ Each cell is the modelled marks gap against the most common combination. Small p-values (P>|t| < 0.05) are the ones worth a closer look.")
+                except ValueError as e:
+                    st.write(f"⚠️ Skipping {subject}: {e}")
+
+
+        if analysis_mode == "subjects":
+            fig1, fig2, scatter_figures = session_results("subjects", lambda: sa.analyze_subject_performance(df, subject_names))
 
             if fig1: 
-                st.plotly_chart(fig1)  # Show correlation matrix
+                perf.timed_plotly_chart(fig1)  # Show correlation matrix
             if fig2: 
-                st.plotly_chart(fig2)  # Show box plot
-            
-            for fig in scatter_list:
-                st.plotly_chart(fig)  # Show each scatter plot
+                perf.timed_plotly_chart(fig2)  # Show box plot
+
+            # Show the scatter plot of the selected subject
+            subject = lf.subject_selector(scatter_figures.keys, key="scatter_subject")
+            perf.timed_plotly_chart(scatter_figures.get(subject))
+
+            # Histograms are drawn from per-group bin counts, computed for every subject and teacher at once
+            st.subheader("📶 Grade Distributions")
+            thresholds = st.multiselect("Pass marks", [33, 35, 40, 45, 50, 60], default=list(dist.PASS_THRESHOLDS),
+                                        key="distribution_thresholds")
+            summary, histograms = session_results(f"distributions_{sorted(thresholds)}",
+                                                  lambda: dist.distribution_summaries(df, subject_names, thresholds=thresholds))
+            subject = lf.subject_selector(list(subject_names), key="distribution_subject")
+            by_teacher = f"{subject} Teacher" in df.columns and st.toggle("Compare teachers", key="distribution_by_teacher")
+            perf.timed_plotly_chart(dist.histogram_figure(summary, histograms, subject, by_teacher))
+            pass_columns = [dist.pass_rate_column(threshold) for threshold in sorted(thresholds)]
+            st.dataframe(summary[summary["Subject"] == subject].drop(columns="Subject").style.format(
+                {"Mean": "{:.2f}", "Std": "{:.2f}", "Skew": "{:+.2f}", "Kurtosis": "{:+.2f}",
+                 **{col: "{:.0%}" for col in pass_columns}}, na_rep="—"), hide_index=True)
+            st.write("ℹ️ Skew below 0 means a long tail of low marks; kurtosis above 0 means more extreme marks than a bell curve.")
+
+
+        if analysis_mode == "students":
+            rankings = session_results("student_rankings", lambda: stu.student_rankings(df, subject_names))
+            student_index = session_results("student_index", lambda: stu.StudentIndex(rankings))
+
+            st.subheader("🏆 Leaderboard")
+            subject = lf.subject_selector(list(subject_names), key="leaderboard_subject")
+            board_size = st.slider("Students per board", 3, 50, 10, key="leaderboard_k")
+            bottom = st.toggle("Show the bottom instead (the ones who need help)", key="leaderboard_bottom")
+            by_teacher = f"{subject} Teacher" in df.columns and st.toggle("One board per teacher", key="leaderboard_by_teacher")
+            st.dataframe(stu.leaderboard(df, subject, board_size, largest=not bottom, by_teacher=by_teacher), hide_index=True)
+
+            st.subheader("🔎 Student Drill-Down")
+            roll_no = st.text_input("Roll No", key="student_roll_no", placeholder="e.g. 101")
+            if roll_no:
+                # Roll numbers are numeric in most files; fall back to the text as typed
+                key = int(roll_no) if roll_no.strip().lstrip("-").isdigit() else roll_no.strip()
+                if key not in student_index:
+                    st.write(f"🤷 No student with Roll No {roll_no}. Are you sure they exist?")
+                else:
+                    matches = student_index.lookup(key)
+                    identity = [col for col in ("School", "Section", "Term", "Name") if col in matches.columns]
+                    if identity:
+                        st.write(" · ".join(str(matches.iloc[0][col]) for col in identity))
+                    if len(matches) > 1:
+                        st.write(f"ℹ️ {len(matches)} students share this Roll No (different schools, sections or terms); showing the first.")
+                    st.dataframe(student_index.subject_table(key, subject_names).style.format(
+                        {"Marks": "{:.2f}", "Percentile": "{:.1f}", "Z": "{:+.2f}"}, na_rep="—"))
+                    st.write("✅ Rank 1 is the top of the class; percentile is the share of students at or below these marks.")
+
+            st.subheader("🚨 At-Risk Students")
+            if not os.path.exists(ar.DEFAULT_MODEL_PATH):
+                st.write("ℹ️ No at-risk model yet. Store past terms in 📈 Trends and train it there!")
+            else:
+                model = load_at_risk_model(ar.DEFAULT_MODEL_PATH, os.path.getmtime(ar.DEFAULT_MODEL_PATH))
+                threshold = st.slider("Flag students with a failing risk of at least", 0.05, 0.95, 0.5, 0.05,
+                                      key="at_risk_threshold")
+                flagged = ar.at_risk_students(df, subject_names, model, threshold)
+                st.write(f"⚠️ {len(flagged)} student-subject pair(s) flagged (pass mark {model.pass_mark:g}).")
+                st.dataframe(flagged.style.format({"Risk": "{:.0%}", "Attendance": "{:.2f}", "Marks": "{:.2f}"}),
+                             hide_index=True)
+                st.write("ℹ️ The risk comes from attendance and marks in the other subjects, so it also flags students before a subject's marks are in.")
+
+
+        if analysis_mode == "anomalies":
+            pass_mark = st.number_input("Pass mark", 0.0, 100.0, an.PASS_MARK, step=1.0, key="anomaly_pass_mark")
+            flagged, groups = session_results(f"anomalies_{pass_mark:g}",
+                                              lambda: an.detect_anomalies(df, subject_names, pass_mark))
+
+            st.subheader("📊 Suspicious Classes")
+            suspicious = groups[groups["Spike Mark"].notna() | (groups["Clump p"] < an.SPIKE_ALPHA)]
+            if suspicious.empty:
+                st.write("✅ No class has a pile of identical marks or a crowd just above the pass mark.")
+            else:
+                st.dataframe(suspicious[["Subject", "Teacher", "Students", "Spike Mark", "Spike Count", "Above Pass", "Below Pass"]],
+                             hide_index=True)
+                st.write("ℹ️ A spike is a mark given to far more students than the marks around it; "
+                         "'Above Pass' counts students within a few marks above the pass mark, 'Below Pass' just below it.")
+
+            st.subheader("🚩 Flagged Marks")
+            reasons = st.multiselect("Reasons", [an.REASON_ROBUST_Z, an.REASON_RESIDUAL, an.REASON_SPIKE, an.REASON_CLUMP],
+                                     key="anomaly_reasons", placeholder="All reasons")
+            if reasons:
+                flagged = flagged[flagged["Reasons"].str.contains("|".join(reasons), regex=True)]
+            st.write(f"⚠️ {len(flagged)} mark(s) flagged.")
+            st.dataframe(flagged.style.format({"Attendance": "{:.2f}", "Marks": "{:.2f}", "Robust Z": "{:+.2f}",
+                                               "Residual Z": "{:+.2f}"}, na_rep="—"), hide_index=True)
+            st.write("ℹ️ Flags are leads, not verdicts: robust z-scores beyond ±3.5 within the class, or marks far "
+                     "from what the subject's attendance trend predicts.")
+
+
+        if analysis_mode == "partitions" and ap.partition_columns(df):
+            partition_by = st.multiselect("🏫 Compare by", ap.partition_columns(df), default=ap.partition_columns(df),
+                                          key="partition_by")
+            if not partition_by:
+                st.write("Pick at least one column to split the class by!")
+            else:
+                by_key = ",".join(partition_by)
+                regressions, skipped = session_results(f"partition_subjects_{by_key}",
+                                                       lambda: ap.partitioned_subject_regressions(df, subject_names, partition_by))
+                teacher_scores, _ = session_results(f"partition_teachers_{by_key}",
+                                                    lambda: ap.partitioned_teacher_scores(df, subject_names, partition_by))
+
+                st.subheader("📈 Attendance → Marks, per group")
+                st.dataframe(regressions, hide_index=True)
+                if not teacher_scores.empty:
+                    st.subheader("📚 Teacher Scores, per group")
+                    st.dataframe(teacher_scores, hide_index=True)
+                if not skipped.empty:
+                    st.write("⚠️ These groups were too small to say anything about:")
+                    st.dataframe(skipped, hide_index=True)
 
 
     except TypeError as e:
         st.error(f"You didn't read the `The Grand Data Upload Rulebook 📜`: {e}.\nTry reloading page")
 
 
+if show_performance:
+    perf.render_performance_panel(perf_spans)
+
 # -------------------------------
 # Fun Closing Line
 # -------------------------------
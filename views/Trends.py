@@ -0,0 +1,106 @@
+import streamlit as st
+import core_functionality.data_validator as dv
+import core_functionality.instrumentation as perf
+import core_functionality.lazy_figures as lf
+import analysis.trends as tr
+import analysis.at_risk as ar
+from core_functionality.term_store import TermStore
+
+# Logo
+image = "images/logo.png"
+st.logo(image, size='large')
+
+# Collect timing/memory spans for this rerun (shown in the optional performance panel)
+perf_spans = perf.start_collection()
+show_performance = perf.performance_panel_toggle()
+
+# One store per server process; it opens a fresh SQLite connection per operation
+@st.cache_resource
+def get_term_store():
+    return TermStore()
+
+term_store = get_term_store()
+
+# -------------------------------
+# Add a Term
+# -------------------------------
+# A term is analyzed once, when it is stored; the charts below only read its summary rows.
+
+st.title("📈 Time Machine: Are Things Getting Better?")
+
+st.subheader("📂 Add a Term to the History")
+term_file = st.file_uploader("Upload a Term's Marksheet (CSV, XLSX)", type=["csv", "xlsx"])
+
+if term_file:
+    try:
+        df, subject_names = dv.validate_and_convert_file(term_file)
+    except Exception as e:
+        st.error(f"You didn't read the `The Grand Data Upload Rulebook 📜`: {e}.\nTry reloading page")
+    else:
+        if "Term" in df.columns:
+            term = None
+            st.write(f"🗓️ Found {df['Term'].nunique()} term(s) in the 'Term' column; each is stored on its own.")
+        else:
+            term = st.text_input("🗓️ Term name", placeholder="e.g. 2024-T1", key="trend_term")
+        if st.button("💾 Save to History", disabled=term is not None and not term.strip()):
+            with st.spinner("Summarizing the term(s)..."):
+                status = tr.store_marksheet(term_store, df, subject_names, term)
+            for label, outcome in status.items():
+                st.write(f"✅ {label}: stored" if outcome == "stored" else f"ℹ️ {label}: already stored, nothing changed")
+
+# -------------------------------
+# Trends
+# -------------------------------
+
+terms = term_store.terms()
+if terms.empty:
+    st.write("No terms stored yet. Upload one above and the trends will appear here! ⏳")
+else:
+    st.subheader("🗂️ Stored Terms")
+    st.dataframe(terms[["term", "students"]].rename(columns={"term": "Term", "students": "Students"}), hide_index=True)
+
+    st.subheader("📊 Subjects Across Terms")
+    subject_stat = st.selectbox("Statistic", ["mean_marks", "mean_attendance", "std_marks", "slope"],
+                                format_func=tr.STAT_LABELS.get, key="trend_subject_stat")
+    subject_trend = term_store.subject_trend()
+    perf.timed_plotly_chart(tr.trend_figure(subject_trend, subject_stat, "subject",
+                                            f"{tr.STAT_LABELS[subject_stat]} per Subject"))
+
+    st.subheader("🧑‍🏫 Teachers Across Terms")
+    subjects = [subject for subject in term_store.subjects() if term_store.teachers(subject)]
+    if not subjects:
+        st.write("None of the stored terms has '[Subject] Teacher' columns, so there are no teachers to follow!")
+    else:
+        subject = lf.subject_selector(subjects, key="trend_subject")
+        teachers = st.multiselect("Teachers", term_store.teachers(subject), key=f"trend_teachers_{subject}",
+                                  placeholder="All teachers")
+        teacher_stat = st.selectbox("Statistic", ["marks_score", "attendance_score", "mean_marks", "iqr_marks",
+                                                  "mean_attendance"],
+                                    format_func=tr.STAT_LABELS.get, key="trend_teacher_stat")
+        teacher_trend = term_store.teacher_trend(teachers or None, subject)
+        perf.timed_plotly_chart(tr.trend_figure(teacher_trend, teacher_stat, "teacher",
+                                                f"{tr.STAT_LABELS[teacher_stat]}: {subject} Teachers"))
+        st.write("ℹ️ Teacher scores are only given in terms where teachers differed significantly (ANOVA), so some lines have gaps.")
+
+    # The at-risk model learns from the stored marksheets; Data Analysis uses it to flag students
+    st.subheader("🚨 At-Risk Model")
+    pass_mark = st.number_input("Pass mark", 0.0, 100.0, ar.PASS_MARK, step=1.0, key="at_risk_pass_mark")
+    if st.button("🧠 Train on the Stored Terms"):
+        try:
+            with st.spinner("Learning who tends to fall below the pass mark..."):
+                model = ar.train_from_term_store(term_store, pass_mark)
+                model.save(ar.DEFAULT_MODEL_PATH)
+        except ValueError as e:
+            st.error(f"Could not train the model: {e}")
+        else:
+            st.write(f"✅ Trained on {len(model.lines)} subject(s). Open 🎓 Student Spotlight in Data Analysis to see who is at risk.")
+
+
+if show_performance:
+    perf.render_performance_panel(perf_spans)
+
+# -------------------------------
+# Fun Closing Line
+# -------------------------------
+
+st.markdown("☕ *Made with Caffine*")